@@ -3,8 +3,18 @@ import json
 from flask import Flask, render_template
 from flask_login import LoginManager
 from config import Config
+import assets
+import auth_utils
 from auth_utils import AnonymousUser, load_user_from_db
-from db import get_db_connection
+import db
+import catalog
+import compression
+import issue_reports
+import login_audit
+import log_partitions
+import rate_limit
+import site_data
+import static_export
 import routes.public as public_routes
 import routes.auth as auth_routes
 import routes.admin_system as admin_system
@@ -14,6 +24,13 @@ import routes.admin_logs as admin_logs
 
 app = Flask(__name__)
 app.config.from_object(Config)
+db.init_app(app)
+auth_utils.init_app(app)
+login_audit.init_app(app)
+issue_reports.init_app(app)
+rate_limit.init_app(app)
+compression.init_app(app)
+assets.init_app(app)
 
 # --- Template Filters ---
 @app.template_filter('from_json')
@@ -30,25 +47,12 @@ def from_json_filter(value):
 def inject_globals():
     """
     Injects global variables into all templates.
-    Fetches the latest statute update date for the global navbar badge.
+    The latest statute update date for the navbar badge comes from a process-level
+    cache, so rendering a template (including error pages) does not touch the DB.
     """
-    last_updated = None
-    try:
-        conn = get_db_connection()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT MAX(updated_dt) FROM statutes")
-            result = cursor.fetchone()
-            if result:
-                last_updated = result[0]
-            cursor.close()
-            conn.close()
-    except Exception as e:
-        print(f"Global Injection Error: {e}")
-
     return {
         'now': datetime.datetime.utcnow(), 
-        'last_updated': last_updated
+        'last_updated': site_data.last_updated.get()
     }
 
 # --- Error Handlers ---
@@ -79,5 +83,10 @@ admin_content.register(app)
 admin_approvals.register(app)
 admin_logs.register(app)
 
+# Warm the public catalog snapshot so the first visitor doesn't pay for the load
+catalog.init_app(app)
+static_export.init_app(app)
+log_partitions.init_app(app)
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,186 @@
+# Fingerprinted static assets.
+# The build step ("python assets.py static") copies every file under static/ to a name
+# carrying a hash of its content (css/style.css -> css/style.1a2b3c4d5e.css) and writes
+# static/manifest.json mapping one to the other. url_for('static', filename=...) resolves
+# through the manifest, and hashed files are served with a one-year immutable
+# Cache-Control: a changed file gets a new name, so browsers never need to revalidate.
+# Without a manifest (development) the plain names are served as before.
+#
+# With --vendor the build first downloads the Bootstrap and Font Awesome bundles (and
+# the fonts their CSS refers to) into static/vendor/, and pages load those instead of
+# the CDN copies.
+import argparse
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import urllib.request
+from urllib.parse import urljoin
+from flask import request, url_for
+
+MANIFEST = 'manifest.json'
+IMMUTABLE_MAX_AGE = 31536000  # one year
+HASHED_RE = re.compile(r'\.[0-9a-f]{10}(\.[^./]+)$')
+CSS_URL_RE = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+SKIPPED_SUFFIXES = ('.gz', '.br')
+
+# Template name -> (CDN URL, path under static/ when vendored)
+VENDOR_ASSETS = {
+    'bootstrap.css': ('https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+                      'vendor/bootstrap/css/bootstrap.min.css'),
+    'bootstrap.js': ('https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+                     'vendor/bootstrap/js/bootstrap.bundle.min.js'),
+    'fontawesome.css': ('https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css',
+                        'vendor/fontawesome/css/all.min.css'),
+}
+
+def _relative_refs(css):
+    """Paths (without query or fragment) of the files a stylesheet refers to relatively."""
+    refs = []
+    for match in CSS_URL_RE.finditer(css):
+        ref = match.group(2).strip()
+        if ref.startswith(('data:', '#', '/')) or '//' in ref:
+            continue
+        refs.append(re.split(r'[?#]', ref, maxsplit=1)[0])
+    return refs
+
+def _download(url, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with urllib.request.urlopen(url, timeout=30) as response, open(path, 'wb') as f:
+        shutil.copyfileobj(response, f)
+
+def vendor(directory):
+    """Downloads the CDN bundles (and files their CSS refers to) into `directory`/vendor."""
+    for url, local in VENDOR_ASSETS.values():
+        path = os.path.join(directory, local)
+        _download(url, path)
+        if local.endswith('.css'):
+            with open(path, encoding='utf-8') as f:
+                refs = set(_relative_refs(f.read()))
+            for ref in sorted(refs):
+                target = posixpath.normpath(posixpath.join(posixpath.dirname(local), ref))
+                _download(urljoin(url, ref), os.path.join(directory, target))
+        print(f"Vendored {url}")
+
+def _is_source(name):
+    return not (name == MANIFEST or HASHED_RE.search(name) or name.endswith(SKIPPED_SUFFIXES))
+
+def _hashed_name(name, data):
+    stem, ext = posixpath.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+
+def _rewrite_css(css, name, manifest):
+    """Points relative url() references of stylesheet `name` at the hashed copies."""
+    def replace(match):
+        quote, ref = match.group(1), match.group(2).strip()
+        if ref.startswith(('data:', '#', '/')) or '//' in ref:
+            return match.group(0)
+        path, suffix = re.match(r'([^?#]*)(.*)', ref).groups()
+        target = manifest.get(posixpath.normpath(posixpath.join(posixpath.dirname(name), path)))
+        if target is None:
+            return match.group(0)
+        return f"url({quote}{posixpath.relpath(target, posixpath.dirname(name) or '.')}{suffix}{quote})"
+    return CSS_URL_RE.sub(replace, css)
+
+def build(directory):
+    """Writes hashed copies of the files under `directory` and their manifest. Returns the manifest."""
+    sources = []
+    for root, _, files in os.walk(directory):
+        for file_name in files:
+            name = os.path.relpath(os.path.join(root, file_name), directory).replace(os.sep, '/')
+            if _is_source(name):
+                sources.append(name)
+    # Stylesheets last, so the files they refer to already have their hashed names
+    sources.sort(key=lambda name: (name.endswith('.css'), name))
+
+    manifest = {}
+    for name in sources:
+        path = os.path.join(directory, name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        if name.endswith('.css'):
+            data = _rewrite_css(data.decode('utf-8'), name, manifest).encode('utf-8')
+        manifest[name] = _hashed_name(name, data)
+        target = os.path.join(directory, manifest[name])
+        if os.path.isfile(target):
+            # Same content by construction; refresh it so it isn't taken for stale (see load_manifest)
+            os.utime(target)
+        else:
+            with open(target, 'wb') as f:
+                f.write(data)
+
+    # Drop hashed copies (and their .gz/.br siblings) from earlier builds
+    current = set(manifest.values())
+    for root, _, files in os.walk(directory):
+        for file_name in files:
+            name = os.path.relpath(os.path.join(root, file_name), directory).replace(os.sep, '/')
+            base = name[:-3] if name.endswith(SKIPPED_SUFFIXES) else name
+            if HASHED_RE.search(base) and base not in current:
+                os.remove(os.path.join(root, file_name))
+
+    with open(os.path.join(directory, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+def load_manifest(directory):
+    """The build manifest, minus entries whose source changed after the build."""
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Asset Manifest Error: {e}")
+        return {}
+    fresh = {}
+    for name, hashed in manifest.items():
+        try:
+            if os.path.getmtime(os.path.join(directory, hashed)) >= os.path.getmtime(os.path.join(directory, name)):
+                fresh[name] = hashed
+        except OSError:
+            continue
+    return fresh
+
+manifest = {}
+hashed_names = frozenset()
+
+def vendor_url(name):
+    """URL of a vendor bundle: the local fingerprinted copy if the build vendored it, else the CDN."""
+    cdn, local = VENDOR_ASSETS[name]
+    if local in manifest:
+        return url_for('static', filename=local)
+    return cdn
+
+def _resolve_static(endpoint, values):
+    if endpoint == 'static' and 'filename' in values:
+        values['filename'] = manifest.get(values['filename'], values['filename'])
+
+def _immutable(response):
+    if request.endpoint == 'static' and response.status_code in (200, 304) \
+            and (request.view_args or {}).get('filename') in hashed_names:
+        response.cache_control.public = True
+        response.cache_control.no_cache = None
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+def init_app(app):
+    global manifest, hashed_names
+    app.add_template_global(vendor_url)
+    if not app.config.get('ASSETS_FINGERPRINT', True):
+        return
+    manifest = load_manifest(app.static_folder)
+    hashed_names = frozenset(manifest.values())
+    app.url_defaults(_resolve_static)
+    app.after_request(_immutable)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fingerprint the files under the static directory.')
+    parser.add_argument('directory', nargs='?', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
+    parser.add_argument('--vendor', action='store_true', help='Download the CDN bundles into static/vendor first.')
+    args = parser.parse_args()
+    if args.vendor:
+        vendor(args.directory)
+    print(f"Fingerprinted {len(build(args.directory))} static file(s) in {args.directory}")
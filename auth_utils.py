@@ -1,22 +1,77 @@
 import json
+import threading
 from functools import wraps
 from flask import redirect, url_for, flash
 from flask_login import UserMixin, AnonymousUserMixin, current_user
 from db import get_db_connection
+from cache import LRUCache
+
+# The resource x action grid edited on the roles page
+RESOURCES = ('users', 'roles', 'issues', 'small_claims', 'statutes', 'approvals', 'logs')
+ACTIONS = ('create', 'read', 'update', 'delete')
+PERMISSION_BITS = {(res, act): 1 << i for i, (res, act) in enumerate((r, a) for r in RESOURCES for a in ACTIONS)}
+
+class PermissionSet:
+    """A role's permissions as an immutable bitmask over RESOURCES x ACTIONS."""
+
+    __slots__ = ('mask',)
+
+    def __init__(self, mask):
+        object.__setattr__(self, 'mask', mask)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('PermissionSet is immutable')
+
+    @classmethod
+    def from_json(cls, permissions):
+        """Compiles the roles.permissions JSON ({"statutes": {"read": 1, ...}, ...})."""
+        if isinstance(permissions, (str, bytes, bytearray)):
+            permissions = json.loads(permissions)
+        mask = 0
+        for (res, act), bit in PERMISSION_BITS.items():
+            if (permissions or {}).get(res, {}).get(act, 0) == 1:
+                mask |= bit
+        return cls(mask)
+
+    def can(self, resource, action):
+        return bool(self.mask & PERMISSION_BITS.get((resource, action), 0))
+
+    def as_dict(self):
+        return {res: {act: int(self.can(res, act)) for act in ACTIONS} for res in RESOURCES}
+
+NO_PERMISSIONS = PermissionSet(0)
+ALL_PERMISSIONS = PermissionSet(sum(PERMISSION_BITS.values()))
+
+# role id -> (permissions JSON it was compiled from, PermissionSet), shared by all users of the role
+_role_permissions = {}
+_role_permissions_lock = threading.Lock()
+
+def role_permissions(role_id, role_name, permissions):
+    """The role's compiled PermissionSet, recompiled only when its JSON changes."""
+    if role_name == 'Administrator':
+        return ALL_PERMISSIONS
+    if role_id is None:
+        return PermissionSet.from_json(permissions)
+    entry = _role_permissions.get(role_id)
+    if entry is not None and entry[0] == permissions:
+        return entry[1]
+    compiled = PermissionSet.from_json(permissions)
+    with _role_permissions_lock:
+        _role_permissions[role_id] = (permissions, compiled)
+    return compiled
 
 class User(UserMixin):
-    def __init__(self, id, username, email, role_name, permissions):
+    def __init__(self, id, username, email, role_name, permissions, role_id=None):
         self.id = id
         self.username = username
         self.email = email
         self.role_name = role_name
-        self.permissions = permissions if isinstance(permissions, dict) else json.loads(permissions)
+        self.role_id = role_id
+        self.permissions = permissions if isinstance(permissions, PermissionSet) \
+            else role_permissions(role_id, role_name, permissions)
 
     def can(self, resource, action):
-        if self.role_name == 'Administrator':
-            return True
-        res = self.permissions.get(resource, {})
-        return res.get(action, 0) == 1
+        return self.permissions.can(resource, action)
 
 class AnonymousUser(AnonymousUserMixin):
     def can(self, resource, action):
@@ -26,15 +81,25 @@ class AnonymousUser(AnonymousUserMixin):
         return 'Guest'
     @property
     def permissions(self):
-        return {}
+        return NO_PERMISSIONS
+
+# Users loaded for authenticated requests, keyed by user id (see init_app)
+user_cache = None
 
 def load_user_from_db(user_id):
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
     conn = get_db_connection()
     if not conn:
         return None
     cursor = conn.cursor(dictionary=True)
     cursor.execute("""
-        SELECT u.id, u.username, u.email, r.name as role_name, r.permissions
+        SELECT u.id, u.username, u.email, r.id as role_id, r.name as role_name, r.permissions
         FROM users u
         JOIN roles r ON u.role_id = r.id
         WHERE u.id = %s
@@ -44,15 +109,26 @@ def load_user_from_db(user_id):
     conn.close()
     
     if user_data:
-        return User(
+        user = User(
             user_data['id'], 
             user_data['username'], 
             user_data['email'], 
             user_data['role_name'],
-            user_data['permissions']
+            user_data['permissions'],
+            user_data['role_id']
         )
+        user_cache.set(user_id, user)
+        return user
     return None
 
+def invalidate_user(user_id):
+    """Call after changing or deleting a user."""
+    user_cache.invalidate(lambda key, user: key == user_id)
+
+def invalidate_role(role_id=None):
+    """Call after changing a role's permissions; without a role id, drops every cached user."""
+    user_cache.invalidate(None if role_id is None else lambda key, user: user.role_id == role_id)
+
 def permission_required(resource, action):
     def decorator(f):
         @wraps(f)
@@ -64,4 +140,12 @@ def permission_required(resource, action):
                 return redirect(url_for('admin_dashboard'))
             return f(*args, **kwargs)
         return decorated_function
-    return decorator
\ No newline at end of file
+    return decorator
+
+def init_app(app):
+    global user_cache
+    user_cache = LRUCache(
+        maxsize=app.config.get('USER_CACHE_SIZE', 1024),
+        ttl=app.config.get('USER_CACHE_TTL', 60),
+        stamp_file=app.config.get('USER_CACHE_STAMP_FILE'),
+    )
@@ -0,0 +1,98 @@
+import os
+import queue
+import threading
+import time
+
+class BatchWriter:
+    """
+    Bounded in-process queue drained by one background thread per worker process.
+    A batch is handed to `write()` when it reaches `batch_size` items or `flush_interval`
+    seconds after its first item. When the queue is full, new items are dropped and counted.
+    Subclasses implement `write(batch)` and raise to have the batch counted as failed.
+    """
+
+    name = 'batch-writer'
+
+    def __init__(self, app, queue_size=10000, batch_size=200, flush_interval=1.0):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats = {'queued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'flushes': 0, 'batch_max': 0}
+
+    def put(self, item):
+        """Queues `item`; returns False if the queue is full and the item was dropped."""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self._stats['dropped'] += 1
+            return False
+        with self._lock:
+            self._stats['queued'] += 1
+        return True
+
+    def _ensure_thread(self):
+        # Started lazily, and again in each forked worker: threads don't survive fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            if self._stopping.is_set():
+                timeout = 0
+            elif deadline is None:
+                timeout = self.flush_interval
+            else:
+                timeout = max(deadline - time.monotonic(), 0)
+            try:
+                batch.append(self._queue.get(timeout=timeout) if timeout else self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            self.write(batch)
+        except Exception as e:
+            print(f"Batch Writer Error ({self.name}): {e}")
+            with self._lock:
+                self._stats['failed'] += len(batch)
+            return
+        with self._lock:
+            self._stats['written'] += len(batch)
+            self._stats['flushes'] += 1
+            self._stats['batch_max'] = max(self._stats['batch_max'], len(batch))
+
+    def write(self, batch):
+        raise NotImplementedError
+
+    def close(self, timeout=10.0):
+        """Stops waiting for new items, writes whatever is still queued and joins the thread."""
+        self._stopping.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, pending=self._queue.qsize())
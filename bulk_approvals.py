@@ -0,0 +1,171 @@
+# Applies queued change requests (statute_approvals, small_claims_approvals) in bulk.
+# Each action type is applied with one set-based statement per batch of ids, all in the
+# caller's transaction. If a statement fails, that batch is retried item by item under
+# savepoints so one bad row is reported instead of sinking the rest.
+from mysql.connector import Error
+
+BATCH_SIZE = 1000
+
+class ApprovalQueue:
+    """Describes one approvals table and the live table its rows are applied to."""
+
+    def __init__(self, approvals_table, target_table, target_column, columns, natural_key):
+        self.approvals_table = approvals_table
+        self.target_table = target_table
+        self.target_column = target_column  # approvals column holding the live row id
+        self.columns = columns  # copied verbatim from the approval to the live row
+        self.natural_key = natural_key  # unique key of the live table, used to spot clashes
+
+    def insert_sql(self, placeholders):
+        columns = ', '.join(self.columns)
+        selected = ', '.join(f'a.{c}' for c in self.columns)
+        return f"""
+            INSERT INTO {self.target_table} ({columns}, updated_by, updated_dt)
+            SELECT {selected}, a.submitted_by, NOW()
+            FROM {self.approvals_table} a WHERE a.id IN ({placeholders}) ORDER BY a.id
+        """
+
+    def update_sql(self, placeholders):
+        assignments = ', '.join(f't.{c} = a.{c}' for c in self.columns)
+        return f"""
+            UPDATE {self.target_table} t
+            JOIN {self.approvals_table} a ON t.id = a.{self.target_column}
+            SET {assignments}, t.updated_by = a.submitted_by, t.updated_dt = NOW()
+            WHERE a.id IN ({placeholders})
+        """
+
+    def delete_sql(self, placeholders):
+        return f"""
+            DELETE t FROM {self.target_table} t
+            JOIN {self.approvals_table} a ON t.id = a.{self.target_column}
+            WHERE a.id IN ({placeholders})
+        """
+
+STATUTES = ApprovalQueue(
+    'statute_approvals', 'statutes', 'statute_id',
+    ['state_id', 'issue_id', 'issue_info', 'time_limit_type', 'time_limit_min', 'time_limit_max', 'duration',
+     'details', 'code_reference', 'official_source_url', 'other_source_url', 'conditions_exceptions',
+     'examples', 'tolling'],
+    ('state_id', 'issue_id'),
+)
+
+SMALL_CLAIMS = ApprovalQueue(
+    'small_claims_approvals', 'small_claims', 'claim_id',
+    ['state_id', 'small_claims_cap', 'small_claims_info'],
+    ('state_id',),
+)
+
+class BulkResult:
+    def __init__(self):
+        self.applied = {'INSERT': [], 'UPDATE': [], 'DELETE': []}
+        self.rejected = []
+        self.failures = {}  # approval id -> reason
+
+    @property
+    def approved_count(self):
+        return sum(len(ids) for ids in self.applied.values())
+
+    def failure_summary(self, limit=10):
+        items = [f'#{approval_id}: {reason}' for approval_id, reason in sorted(self.failures.items())]
+        if len(items) > limit:
+            items = items[:limit] + [f'and {len(items) - limit} more']
+        return '; '.join(items)
+
+def _batches(ids):
+    for i in range(0, len(ids), BATCH_SIZE):
+        yield ids[i:i + BATCH_SIZE]
+
+def _placeholders(ids):
+    return ', '.join(['%s'] * len(ids))
+
+def _lock_pending(cursor, queue, ids, result):
+    """Locks the requested rows and returns the still-PENDING ones; the rest are recorded as failures."""
+    rows = {}
+    key_columns = ', '.join(f'a.{c}' for c in queue.natural_key)
+    for batch in _batches(ids):
+        cursor.execute(f"""
+            SELECT a.id, a.action_type, a.status, a.{queue.target_column} AS target_id, {key_columns},
+                   t.id AS live_id
+            FROM {queue.approvals_table} a
+            LEFT JOIN {queue.target_table} t ON t.id = a.{queue.target_column}
+            WHERE a.id IN ({_placeholders(batch)})
+            FOR UPDATE
+        """, tuple(batch))
+        for row in cursor.fetchall():
+            rows[row['id']] = row
+    pending = []
+    for approval_id in ids:
+        row = rows.get(approval_id)
+        if not row or row['status'] != 'PENDING':
+            result.failures[approval_id] = 'No longer pending'
+        else:
+            pending.append(row)
+    return pending
+
+def _check_conflicts(queue, pending, result):
+    """
+    Drops rows that cannot be applied in a batch: updates/deletes whose live row is gone,
+    and several changes to the same record (the latest one wins; earlier ones stay pending).
+    """
+    latest = {}
+    for row in pending:
+        if row['action_type'] in ('UPDATE', 'DELETE') and row['live_id'] is None:
+            result.failures[row['id']] = 'Target record no longer exists'
+            continue
+        if row['action_type'] == 'INSERT':
+            key = ('new',) + tuple(row[c] for c in queue.natural_key)
+        else:
+            key = ('live', row['live_id'])
+        if key in latest:
+            earlier = min(latest[key], row, key=lambda r: r['id'])
+            result.failures[earlier['id']] = 'Superseded by a newer change to the same record in this batch'
+            if earlier is row:
+                continue
+        latest[key] = row
+    groups = {'INSERT': [], 'UPDATE': [], 'DELETE': []}
+    for row in sorted(latest.values(), key=lambda r: r['id']):
+        groups[row['action_type']].append(row['id'])
+    return groups
+
+def _apply_batch(cursor, sql_for, ids, result, action_type):
+    try:
+        cursor.execute('SAVEPOINT bulk_batch')
+        cursor.execute(sql_for(_placeholders(ids)), tuple(ids))
+        result.applied[action_type].extend(ids)
+        return
+    except Error:
+        cursor.execute('ROLLBACK TO SAVEPOINT bulk_batch')
+    # Something in the batch is bad: find out which, keeping the good ones
+    for approval_id in ids:
+        try:
+            cursor.execute('SAVEPOINT bulk_item')
+            cursor.execute(sql_for('%s'), (approval_id,))
+            result.applied[action_type].append(approval_id)
+        except Error as e:
+            cursor.execute('ROLLBACK TO SAVEPOINT bulk_item')
+            result.failures[approval_id] = e.msg or str(e)
+
+def approve(cursor, queue, ids):
+    """
+    Applies the given approvals. The caller commits (or rolls back) afterwards.
+    Deletes run first and inserts last so a batch can replace a record it removes.
+    """
+    result = BulkResult()
+    pending = _lock_pending(cursor, queue, list(dict.fromkeys(ids)), result)
+    groups = _check_conflicts(queue, pending, result)
+    for action_type, sql_for in (('DELETE', queue.delete_sql), ('UPDATE', queue.update_sql), ('INSERT', queue.insert_sql)):
+        for batch in _batches(groups[action_type]):
+            _apply_batch(cursor, sql_for, batch, result, action_type)
+
+    approved = [approval_id for ids in result.applied.values() for approval_id in ids]
+    for batch in _batches(approved):
+        cursor.execute(f"UPDATE {queue.approvals_table} SET status='APPROVED' WHERE id IN ({_placeholders(batch)})", tuple(batch))
+    return result
+
+def reject(cursor, queue, ids):
+    result = BulkResult()
+    pending = _lock_pending(cursor, queue, list(dict.fromkeys(ids)), result)
+    result.rejected = [row['id'] for row in pending]
+    for batch in _batches(result.rejected):
+        cursor.execute(f"UPDATE {queue.approvals_table} SET status='REJECTED' WHERE id IN ({_placeholders(batch)})", tuple(batch))
+    return result
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+class CachedValue:
+    """
+    Process-level cache for a single value produced by `loader`.
+    The value is reloaded after `ttl` seconds or when invalidated. If a reload
+    fails, the previous value is kept and the next attempt waits another `ttl`.
+    """
+
+    def __init__(self, loader, ttl=60):
+        self.loader = loader
+        self.ttl = ttl
+        self._value = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        if time.monotonic() < self._expires:
+            return self._value
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if time.monotonic() < self._expires:
+                return self._value
+            try:
+                self._value = self.loader()
+            except Exception as e:
+                print(f"Cache Refresh Error ({self.loader.__name__}): {e}")
+            self._expires = time.monotonic() + self.ttl
+            return self._value
+
+    def set(self, value):
+        with self._lock:
+            self._value = value
+            self._expires = time.monotonic() + self.ttl
+
+    def invalidate(self):
+        self._expires = 0.0
+
+class LRUCache:
+    """
+    Process-level cache of up to `maxsize` entries, each kept for `ttl` seconds.
+    The least recently used entry is evicted first. If `stamp_file` is set,
+    `invalidate()` touches it and every other worker on the host drops its
+    entries on its next lookup.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60, stamp_file=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stamp_file = stamp_file
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._stamp_seen = self._stamp_mtime()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def _stamp_mtime(self):
+        try:
+            return os.stat(self.stamp_file).st_mtime_ns
+        except (OSError, TypeError):
+            return None
+
+    def get(self, key):
+        """The cached value, or None on a miss."""
+        stamp = self._stamp_mtime()
+        with self._lock:
+            if stamp != self._stamp_seen:
+                self._entries.clear()
+                self._stamp_seen = stamp
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() >= entry[1]:
+                self._entries.pop(key, None)
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, predicate=None):
+        """
+        Drops this worker's entries for which predicate(key, value) is true (all of them
+        without a predicate) and has every other worker drop its entries.
+        """
+        previous = self._stamp_mtime()
+        if self.stamp_file:
+            try:
+                with open(self.stamp_file, 'a'):
+                    os.utime(self.stamp_file, None)
+            except OSError as e:
+                print(f"Cache Stamp Error: {e}")
+        stamp = self._stamp_mtime()
+        with self._lock:
+            if previous != self._stamp_seen:
+                # Another worker invalidated since our last lookup
+                self._entries.clear()
+            self._stamp_seen = stamp
+            for key in [k for k, (v, _) in self._entries.items() if predicate is None or predicate(k, v)]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
@@ -0,0 +1,232 @@
+import hashlib
+import os
+import threading
+import time
+from db import get_db_connection
+
+def _digest(value):
+    return hashlib.sha1(repr(value).encode('utf-8')).hexdigest()[:16]
+
+class StateRecord:
+    __slots__ = ('id', 'name', 'slug', 'state_code')
+
+    def __init__(self, id, name, slug, state_code):
+        self.id = id
+        self.name = name
+        self.slug = slug
+        self.state_code = state_code
+
+class IssueRecord:
+    __slots__ = ('id', 'name', 'slug', 'issue_group')
+
+    def __init__(self, id, name, slug, issue_group):
+        self.id = id
+        self.name = name
+        self.slug = slug
+        self.issue_group = issue_group
+
+    def as_dict(self):
+        return {'id': self.id, 'name': self.name, 'slug': self.slug, 'issue_group': self.issue_group}
+
+class StatuteRecord:
+    """One published statute with the state/issue/small-claims fields the public pages render."""
+
+    __slots__ = (
+        'id', 'state_id', 'issue_id', 'state_slug', 'issue_slug',
+        'state_name', 'state_code', 'small_claims_cap', 'small_claims_info',
+        'issue_name', 'issue_group', 'issue_desc',
+        'duration', 'time_limit_type', 'time_limit_min', 'time_limit_max',
+        'details', 'issue_info', 'conditions_exceptions', 'examples', 'tolling',
+        'code_reference', 'official_source_url', 'other_source_url', 'updated_dt',
+        'modified_dt', 'version',
+    )
+
+    # Fields the statute page query exposes, in its column order (used by the JSON APIs)
+    PUBLIC_FIELDS = (
+        'state_name', 'state_code', 'small_claims_cap', 'small_claims_info',
+        'issue_name', 'issue_group', 'issue_desc',
+        'duration', 'time_limit_type', 'time_limit_min', 'time_limit_max',
+        'details', 'issue_info', 'conditions_exceptions', 'examples',
+        'code_reference', 'official_source_url', 'other_source_url', 'updated_dt',
+    )
+
+    def __init__(self, row):
+        for field in self.__slots__[:-1]:
+            setattr(self, field, row[field])
+        # Content fingerprint, used as the page's ETag
+        self.version = _digest(tuple(row[f] for f in self.__slots__[:-1]))
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.PUBLIC_FIELDS}
+
+class Catalog:
+    """
+    Immutable snapshot of everything the public site reads.
+    Built in one pass and replaced wholesale; never mutated after construction.
+    """
+
+    __slots__ = ('states', 'statutes', 'statutes_by_key', 'statutes_by_state',
+                 'issues_by_state', 'issue_versions', 'modified_by_state',
+                 'last_updated', 'last_modified', 'version')
+
+    def __init__(self, rows):
+        statutes = tuple(StatuteRecord(row) for row in rows)
+        states = {}
+        statutes_by_state = {}
+        issues_by_state = {}
+        for st in statutes:
+            if st.state_slug not in states:
+                states[st.state_slug] = StateRecord(st.state_id, st.state_name, st.state_slug, st.state_code)
+            statutes_by_state.setdefault(st.state_slug, []).append(st)
+            issues_by_state.setdefault(st.state_slug, []).append(
+                IssueRecord(st.issue_id, st.issue_name, st.issue_slug, st.issue_group)
+            )
+
+        self.statutes = statutes
+        self.states = tuple(sorted(states.values(), key=lambda s: s.name))
+        self.statutes_by_key = {(st.state_slug, st.issue_slug): st for st in statutes}
+        self.statutes_by_state = {slug: tuple(items) for slug, items in statutes_by_state.items()}
+        # Same shape and order as the old /api/issues query (DISTINCT ... ORDER BY i.name)
+        self.issues_by_state = {
+            slug: tuple(i.as_dict() for i in sorted(items, key=lambda i: i.name))
+            for slug, items in issues_by_state.items()
+        }
+        self.issue_versions = {slug: _digest(items) for slug, items in self.issues_by_state.items()}
+        self.modified_by_state = {
+            slug: max((st.modified_dt for st in items if st.modified_dt), default=None)
+            for slug, items in self.statutes_by_state.items()
+        }
+        dates = [st.updated_dt for st in statutes if st.updated_dt]
+        self.last_updated = max(dates) if dates else None
+        self.last_modified = max((st.modified_dt for st in statutes if st.modified_dt), default=None)
+        # Changes on any insert, update or delete of a published statute, state, issue or small claims row
+        self.version = _digest(tuple(sorted((st.id, st.version) for st in statutes)))
+
+    def get_statute(self, state_slug, issue_slug):
+        return self.statutes_by_key.get((state_slug, issue_slug))
+
+    def get_issues(self, state_slug):
+        return self.issues_by_state.get(state_slug, ())
+
+CATALOG_QUERY = """
+    SELECT
+        st.id,
+        st.state_id,
+        st.issue_id,
+        s.slug as state_slug,
+        i.slug as issue_slug,
+        s.name as state_name,
+        s.state_code,
+        sc.small_claims_cap,
+        sc.small_claims_info,
+        i.name as issue_name,
+        i.issue_group,
+        i.description as issue_desc,
+        st.duration,
+        st.time_limit_type,
+        st.time_limit_min,
+        st.time_limit_max,
+        st.details,
+        st.issue_info,
+        st.conditions_exceptions,
+        st.examples,
+        st.tolling,
+        st.code_reference,
+        st.official_source_url,
+        st.other_source_url,
+        st.updated_dt,
+        GREATEST(
+            st.updated_dt, COALESCE(i.updated_dt, st.updated_dt), COALESCE(sc.updated_dt, st.updated_dt)
+        ) as modified_dt
+    FROM statutes st
+    JOIN states s ON st.state_id = s.id
+    JOIN issues i ON st.issue_id = i.id
+    LEFT JOIN small_claims sc ON s.id = sc.state_id
+    ORDER BY st.id
+"""
+
+RETRY_AFTER = 5  # seconds between reload attempts while the DB is failing
+
+_current = None
+_stamp_seen = None
+_checked_at = 0.0
+_lock = threading.Lock()
+_subscribers = []
+_config = {'stamp_file': None, 'max_age': 300}
+
+def load_catalog():
+    conn = get_db_connection()
+    if not conn:
+        raise RuntimeError("Database unavailable")
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(CATALOG_QUERY)
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return Catalog(rows)
+
+def _stamp_mtime():
+    try:
+        return os.stat(_config['stamp_file']).st_mtime_ns
+    except (OSError, TypeError):
+        return None
+
+def _is_stale():
+    if time.monotonic() - _checked_at > _config['max_age']:
+        return True
+    return _stamp_mtime() != _stamp_seen
+
+def _reload(stamp):
+    global _current, _stamp_seen, _checked_at
+    _checked_at = time.monotonic()
+    try:
+        _current = load_catalog()
+        _stamp_seen = stamp
+    except Exception as e:
+        # Keep serving the previous snapshot (if any) and retry shortly instead of on every request
+        print(f"Catalog Load Error: {e}")
+        _stamp_seen = stamp
+        _checked_at = time.monotonic() - _config['max_age'] + RETRY_AFTER
+
+def get_catalog():
+    """
+    Returns the current snapshot, loading it on first use or when another
+    worker has published a change. Returns None only if nothing could be loaded.
+    """
+    snapshot = _current
+    if snapshot is not None and not _is_stale():
+        return snapshot
+    with _lock:
+        if _current is None or _is_stale():
+            _reload(_stamp_mtime())
+        return _current
+
+def subscribe(callback):
+    """Registers callback(previous, current), run in the publishing worker after each publish()."""
+    _subscribers.append(callback)
+
+def publish():
+    """
+    Rebuilds this worker's snapshot and touches the stamp file so every other
+    worker rebuilds on its next request. Call after committing content changes.
+    """
+    with _lock:
+        previous = _current
+        stamp_file = _config['stamp_file']
+        if stamp_file:
+            try:
+                with open(stamp_file, 'a'):
+                    os.utime(stamp_file, None)
+            except OSError as e:
+                print(f"Catalog Stamp Error: {e}")
+        _reload(_stamp_mtime())
+        current = _current
+    if current is not previous:
+        for callback in _subscribers:
+            callback(previous, current)
+
+def init_app(app):
+    _config['stamp_file'] = app.config.get('CATALOG_STAMP_FILE')
+    _config['max_age'] = app.config.get('CATALOG_MAX_AGE', 300)
+    with app.app_context():
+        get_catalog()
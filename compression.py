@@ -0,0 +1,185 @@
+# Response compression (brotli or gzip, whichever the client prefers).
+# Responses carrying an ETag are built from a data version, so their compressed bytes
+# are cached under (path, ETag, encoding); views that call cached_response() before
+# rendering then answer repeat hits without the template or the compressor. Other
+# responses are compressed per request at a cheap level. Compressed variants get a
+# weak ETag (same content, different bytes), which If-None-Match still matches, so
+# 304 revalidation keeps working.
+#
+# Files under static/ are compressed ahead of time ("python compression.py" at image
+# build) into .br/.gz siblings, which the static route sends as-is.
+import gzip
+import mimetypes
+import os
+import sys
+from flask import Response, request, send_from_directory, session
+from werkzeug.security import safe_join
+from cache import LRUCache
+from http_cache import add_validators
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = frozenset((
+    'text/html', 'text/css', 'text/plain', 'text/xml', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'application/xml', 'image/svg+xml',
+))
+STATIC_EXTENSIONS = ('.css', '.js', '.map', '.svg', '.json', '.txt', '.xml', '.html')
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+def encodings():
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+def compress(data, encoding, best=False):
+    """Compressed `data`; `best` for bytes that are cached or built once, else a fast level."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if best else 4)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=9 if best else 5, mtime=0)
+
+def negotiate():
+    """The client's preferred encoding we support, or None for identity."""
+    return request.accept_encodings.best_match(encodings())
+
+def _cache_key(etag, encoding):
+    return (request.path, request.query_string, etag, encoding)
+
+def _mark_encoded(response, encoding):
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    etag, _ = response.get_etag()
+    if etag:
+        response.set_etag(etag, weak=True)
+
+class Compressor:
+    def __init__(self, min_size=1024, cache_size=2000, cache_ttl=3600):
+        self.enabled = False
+        self.min_size = min_size
+        self.cache = LRUCache(maxsize=cache_size, ttl=cache_ttl)
+
+    def _eligible(self, response):
+        return (response.status_code == 200
+                and not response.direct_passthrough
+                and not response.is_streamed
+                and 'Content-Encoding' not in response.headers
+                and response.mimetype in COMPRESSIBLE_TYPES)
+
+    def after_request(self, response):
+        if response.status_code == 304:
+            # Answer a revalidation of a compressed copy with the ETag that copy was sent with
+            etag, weak = response.get_etag()
+            if etag and not weak and request.if_none_match.is_weak(etag):
+                response.set_etag(etag, weak=True)
+            return response
+        if not self._eligible(response):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate()
+        if not encoding or response.content_length is None or response.content_length < self.min_size:
+            return response
+
+        etag, weak = response.get_etag()
+        # A request that changed its session (e.g. showed flashed messages) got a page of its own
+        key = _cache_key(etag, encoding) if etag and not weak and not session.modified else None
+        entry = self.cache.get(key) if key else None
+        if entry is None:
+            body = compress(response.get_data(), encoding, best=key is not None)
+            if key:
+                self.cache.set(key, (body, response.mimetype))
+        else:
+            body = entry[0]
+        response.set_data(body)
+        _mark_encoded(response, encoding)
+        return response
+
+    def cached_response(self, etag, last_modified=None, max_age=None):
+        encoding = negotiate()
+        if not encoding or '_flashes' in session:
+            return None
+        entry = self.cache.get(_cache_key(etag, encoding))
+        if entry is None:
+            return None
+        body, mimetype = entry
+        response = add_validators(Response(body, mimetype=mimetype), etag, last_modified, max_age)
+        _mark_encoded(response, encoding)
+        return response
+
+    def stats(self):
+        return dict(self.cache.stats(), brotli=brotli is not None)
+
+def send_static(app, filename):
+    """Static route: the precompressed sibling of `filename` when the client accepts it."""
+    encoding = negotiate()
+    if encoding:
+        original = safe_join(app.static_folder, filename)
+        compressed = original and original + SUFFIXES[encoding]
+        # A sibling older than the file is left over from an earlier build
+        if compressed and os.path.isfile(original) and os.path.isfile(compressed) \
+                and os.path.getmtime(compressed) >= os.path.getmtime(original):
+            response = send_from_directory(
+                app.static_folder, filename + SUFFIXES[encoding],
+                mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                max_age=app.get_send_file_max_age(filename),
+            )
+            response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+            return response
+    response = app.send_static_file(filename)
+    if filename.endswith(STATIC_EXTENSIONS):
+        response.vary.add('Accept-Encoding')
+    return response
+
+def compress_static(directory, min_size=1024):
+    """Writes .br/.gz siblings of the compressible files under `directory`. Returns the number written."""
+    written = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(STATIC_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            if os.path.getsize(path) < min_size:
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            for encoding in encodings():
+                target = path + SUFFIXES[encoding]
+                if os.path.isfile(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                    continue
+                body = compress(data, encoding, best=True)
+                if len(body) >= len(data):
+                    continue
+                with open(target, 'wb') as f:
+                    f.write(body)
+                written += 1
+    return written
+
+compressor = None
+
+def cached_response(etag, last_modified=None, max_age=None):
+    """
+    The cached compressed copy of this URL at version `etag` for the client's encoding,
+    else None. Call after not_modified() and before rendering.
+    """
+    if compressor is None or not compressor.enabled:
+        return None
+    return compressor.cached_response(etag, last_modified, max_age)
+
+def init_app(app):
+    global compressor
+    compressor = Compressor(
+        min_size=app.config.get('COMPRESS_MIN_SIZE', 1024),
+        cache_size=app.config.get('COMPRESS_CACHE_SIZE', 2000),
+        cache_ttl=app.config.get('COMPRESS_CACHE_TTL', 3600),
+    )
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+    compressor.enabled = True
+    app.after_request(compressor.after_request)
+    app.view_functions['static'] = lambda filename: send_static(app, filename)
+
+if __name__ == '__main__':
+    # Build step: python compression.py [static dir]
+    directory = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    print(f"Compressed {compress_static(directory)} static file variant(s) in {directory}")
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,7 +14,105 @@ class Config:
     MYSQL_USER = os.environ.get('MYSQL_USER', 'root')
     MYSQL_PASSWORD = os.environ.get('MYSQL_PASSWORD', 'vaug') # Encrypted/Hidden in env
     MYSQL_DB = os.environ.get('MYSQL_DB', 'statute_checker')
+
+    # Connection Pool (per worker process)
+    MYSQL_POOL_SIZE = int(os.environ.get('MYSQL_POOL_SIZE', 10))
+    MYSQL_POOL_TIMEOUT = float(os.environ.get('MYSQL_POOL_TIMEOUT', 5))  # seconds to wait for a free connection
+    MYSQL_POOL_PING_INTERVAL = float(os.environ.get('MYSQL_POOL_PING_INTERVAL', 30))  # ping idle connections older than this
     
+    # Process-level cache lifetimes (seconds)
+    LAST_UPDATED_TTL = int(os.environ.get('LAST_UPDATED_TTL', 60))
+    ADMIN_COUNT_TTL = int(os.environ.get('ADMIN_COUNT_TTL', 60))  # admin list totals, recounted in the background
+
+    # Logged-in users (role and permissions) cached per worker. Role and user changes touch
+    # USER_CACHE_STAMP_FILE so every worker on this host drops its cached users.
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    USER_CACHE_STAMP_FILE = os.environ.get('USER_CACHE_STAMP_FILE', os.path.join(tempfile.gettempdir(), 'statute_checker_users.stamp'))
+
+    # Public catalog snapshot. Touching the stamp file makes every worker on this host reload;
+    # CATALOG_MAX_AGE bounds staleness when workers run on separate hosts.
+    CATALOG_STAMP_FILE = os.environ.get('CATALOG_STAMP_FILE', os.path.join(tempfile.gettempdir(), 'statute_checker_catalog.stamp'))
+    CATALOG_MAX_AGE = int(os.environ.get('CATALOG_MAX_AGE', 300))
+
+    # Static export ("flask export-static"). When STATIC_EXPORT_DIR is set, approvals
+    # also rewrite the affected exported pages in place.
+    SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000')
+    STATIC_EXPORT_DIR = os.environ.get('STATIC_EXPORT_DIR')
+
+    # URLs per child sitemap (protocol limit is 50,000)
+    SITEMAP_SHARD_SIZE = int(os.environ.get('SITEMAP_SHARD_SIZE', 10000))
+
+    # Response compression (brotli/gzip). Compressed bytes of versioned (ETag) responses
+    # are cached per worker; smaller responses are sent as they are.
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', '1') == '1'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # bytes
+    COMPRESS_CACHE_SIZE = int(os.environ.get('COMPRESS_CACHE_SIZE', 2000))  # compressed responses kept per worker
+    COMPRESS_CACHE_TTL = int(os.environ.get('COMPRESS_CACHE_TTL', 3600))
+
+    # Fingerprinted static files ("python assets.py" at image build). url_for('static')
+    # resolves through static/manifest.json when the build wrote one.
+    ASSETS_FINGERPRINT = os.environ.get('ASSETS_FINGERPRINT', '1') == '1'
+
+    # Batch statute lookup API
+    BATCH_LOOKUP_LIMIT = int(os.environ.get('BATCH_LOOKUP_LIMIT', 1000))  # max pairs per request
+    BATCH_STREAM_THRESHOLD = int(os.environ.get('BATCH_STREAM_THRESHOLD', 200))  # stream responses above this
+    DEADLINE_BATCH_LIMIT = int(os.environ.get('DEADLINE_BATCH_LIMIT', 100000))  # max rows per deadline request
+    SEARCH_RESULT_LIMIT = int(os.environ.get('SEARCH_RESULT_LIMIT', 50))  # max results per /api/search request
+    TYPEAHEAD_RESULT_LIMIT = int(os.environ.get('TYPEAHEAD_RESULT_LIMIT', 100))  # max issues per /api/typeahead request
+    TYPEAHEAD_MAX_AGE = int(os.environ.get('TYPEAHEAD_MAX_AGE', 300))  # seconds browsers may reuse a typeahead response
+
+    # Bulk statute upload. Files are streamed in UPLOAD_CHUNK_SIZE-row chunks, so the
+    # row limit is about request time rather than worker memory.
+    UPLOAD_ROW_LIMIT = int(os.environ.get('UPLOAD_ROW_LIMIT', 20000))
+    UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 1000))
+    # Per-row error reports are kept here for download
+    UPLOAD_REPORT_DIR = os.environ.get('UPLOAD_REPORT_DIR', os.path.join(tempfile.gettempdir(), 'statute_checker_reports'))
+
+    # CSV/XLSX exports of the admin lists: rows fetched per round trip from the streaming cursor
+    EXPORT_FETCH_SIZE = int(os.environ.get('EXPORT_FETCH_SIZE', 1000))
+
+    # Background jobs (uploads, "approve all matching"). Threads per worker process; uploaded files
+    # wait in JOB_UPLOAD_DIR until their job picks them up.
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    JOB_STALL_AFTER = int(os.environ.get('JOB_STALL_AFTER', 300))  # seconds without progress before a job is reported stalled
+    JOB_UPLOAD_DIR = os.environ.get('JOB_UPLOAD_DIR', os.path.join(tempfile.gettempdir(), 'statute_checker_uploads'))
+
+    # Login history: failures per IP/username in the summary window that get flagged
+    LOGIN_BRUTE_FORCE_THRESHOLD = int(os.environ.get('LOGIN_BRUTE_FORCE_THRESHOLD', 20))
+    # The trend chart covers at most the last LOGIN_TREND_MAX_DAYS of the selected range
+    LOGIN_TREND_MAX_DAYS = int(os.environ.get('LOGIN_TREND_MAX_DAYS', 366))
+    # The username filter matches anywhere in the name; with LOGIN_LOG_USERNAME_PREFIX_SEARCH=1
+    # only names starting with it, which the (username_attempted, login_dt) index can serve
+    LOGIN_LOG_USERNAME_PREFIX_SEARCH = os.environ.get('LOGIN_LOG_USERNAME_PREFIX_SEARCH', '0') == '1'
+    # Login attempts are queued and written in batches of up to LOGIN_AUDIT_BATCH_SIZE,
+    # at most LOGIN_AUDIT_FLUSH_INTERVAL seconds after they happen
+    LOGIN_AUDIT_QUEUE_SIZE = int(os.environ.get('LOGIN_AUDIT_QUEUE_SIZE', 10000))
+    LOGIN_AUDIT_BATCH_SIZE = int(os.environ.get('LOGIN_AUDIT_BATCH_SIZE', 200))
+    LOGIN_AUDIT_FLUSH_INTERVAL = float(os.environ.get('LOGIN_AUDIT_FLUSH_INTERVAL', 1.0))
+    # login_logs is partitioned by month; `flask rotate-login-logs` archives months older
+    # than the retention to gzip NDJSON files and drops them
+    LOGIN_LOG_RETENTION_MONTHS = int(os.environ.get('LOGIN_LOG_RETENTION_MONTHS', 12))
+    LOGIN_LOG_PARTITIONS_AHEAD = int(os.environ.get('LOGIN_LOG_PARTITIONS_AHEAD', 2))
+    LOGIN_LOG_ARCHIVE_DIR = os.environ.get('LOGIN_LOG_ARCHIVE_DIR', os.path.join(tempfile.gettempdir(), 'statute_checker_login_archive'))
+    # Issue reports are queued and written in batches; a report matching the page and
+    # (case/whitespace-normalized) details of a pending report seen within
+    # REPORT_DEDUP_WINDOW seconds is counted on that report instead of adding a row
+    REPORT_QUEUE_SIZE = int(os.environ.get('REPORT_QUEUE_SIZE', 1000))
+    REPORT_BATCH_SIZE = int(os.environ.get('REPORT_BATCH_SIZE', 100))
+    REPORT_FLUSH_INTERVAL = float(os.environ.get('REPORT_FLUSH_INTERVAL', 2.0))
+    REPORT_DEDUP_WINDOW = int(os.environ.get('REPORT_DEDUP_WINDOW', 86400))
+
+    # Rate limits ('<count>/<period>', empty to disable a rule). Buckets are shared by all
+    # workers on the host through RATE_LIMIT_FILE; RATE_LIMIT_SLOTS bounds the clients tracked.
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+    RATE_LIMIT_FILE = os.environ.get('RATE_LIMIT_FILE', os.path.join(tempfile.gettempdir(), 'statute_checker_ratelimit.bin'))
+    RATE_LIMIT_SLOTS = int(os.environ.get('RATE_LIMIT_SLOTS', 8192))
+    RATE_LIMIT_LOGIN_IP = os.environ.get('RATE_LIMIT_LOGIN_IP', '20/minute')
+    RATE_LIMIT_LOGIN_USER = os.environ.get('RATE_LIMIT_LOGIN_USER', '5/minute')
+    RATE_LIMIT_REPORT_IP = os.environ.get('RATE_LIMIT_REPORT_IP', '10/hour')
+    RATE_LIMIT_API_IP = os.environ.get('RATE_LIMIT_API_IP', '120/minute')
+
     # Email / SMTP Config for "Report Issue"
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = 587
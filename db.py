@@ -1,17 +1,208 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 import mysql.connector
 from mysql.connector import Error
-from flask import current_app
+from flask import current_app, g
+
+class PoolTimeout(Error):
+    """Raised when no pooled connection becomes free within the wait timeout."""
+
+class ConnectionPool:
+    """
+    Bounded pool of MySQL connections for one worker process.
+    Connections are created lazily up to `size`; once that many are checked out,
+    callers wait up to `timeout` seconds for one to be released.
+    """
+
+    def __init__(self, connect_args, size=10, timeout=5.0, ping_interval=30.0):
+        self.connect_args = connect_args
+        self.size = size
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self._idle = deque()  # (connection, released_at)
+        self._created = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'reconnects': 0,
+            'checkout_ms_total': 0.0,
+            'checkout_ms_max': 0.0,
+        }
+
+    def _connect(self):
+        return mysql.connector.connect(**self.connect_args)
+
+    def _is_healthy(self, conn, released_at):
+        # Only ping connections that sat idle long enough for the server to drop them
+        if time.monotonic() - released_at < self.ping_interval:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        conn = None
+        with self._cond:
+            waited = False
+            while True:
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                    break
+                if self._created < self.size:
+                    # Reserve the slot now, connect outside the lock
+                    self._created += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(msg=f"No MySQL connection available after {timeout}s (pool size {self.size})")
+                if not waited:
+                    self._stats['waits'] += 1
+                    waited = True
+                self._cond.wait(remaining)
+
+        try:
+            if conn is not None and not self._is_healthy(conn, released_at):
+                self._discard(conn)
+                self._stats['reconnects'] += 1
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Error:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._cond:
+            self._stats['checkouts'] += 1
+            self._stats['checkout_ms_total'] += elapsed_ms
+            self._stats['checkout_ms_max'] = max(self._stats['checkout_ms_max'], elapsed_ms)
+        return conn
+
+    def release(self, conn):
+        try:
+            # An abandoned unbuffered read still has rows on the wire; dropping the
+            # connection is cheaper than draining them
+            if conn.unread_result:
+                raise Error(msg="Connection released with an unread result")
+            # Never hand the next request an open transaction (or its stale snapshot)
+            if conn.in_transaction:
+                conn.rollback()
+        except Error:
+            self._discard(conn)
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Error:
+            pass
+
+    def stats(self):
+        with self._cond:
+            checkouts = self._stats['checkouts']
+            return {
+                'size': self.size,
+                'open': self._created,
+                'idle': len(self._idle),
+                'in_use': self._created - len(self._idle),
+                'checkouts': checkouts,
+                'waits': self._stats['waits'],
+                'timeouts': self._stats['timeouts'],
+                'reconnects': self._stats['reconnects'],
+                'checkout_ms_avg': round(self._stats['checkout_ms_total'] / checkouts, 3) if checkouts else 0.0,
+                'checkout_ms_max': round(self._stats['checkout_ms_max'], 3),
+            }
+
+class RequestConnection:
+    """
+    Proxy handed to route code. Routes still call conn.close() when done;
+    the real connection stays with the request and is returned to the pool on teardown.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(app=None):
+    app = app or current_app._get_current_object()
+    # Keyed by pid so gunicorn workers never share sockets inherited across fork
+    key = (id(app), os.getpid())
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(
+                    connect_args={
+                        'host': app.config['MYSQL_HOST'],
+                        'user': app.config['MYSQL_USER'],
+                        'password': app.config['MYSQL_PASSWORD'],
+                        'database': app.config['MYSQL_DB'],
+                    },
+                    size=app.config.get('MYSQL_POOL_SIZE', 10),
+                    timeout=app.config.get('MYSQL_POOL_TIMEOUT', 5.0),
+                    ping_interval=app.config.get('MYSQL_POOL_PING_INTERVAL', 30.0),
+                )
+                _pools[key] = pool
+    return pool
 
 def get_db_connection():
+    """Returns the request's pooled connection, checking one out on first use."""
+    conn = g.get('db_conn')
+    if conn is not None:
+        return conn
     try:
-        connection = mysql.connector.connect(
-            host=current_app.config['MYSQL_HOST'],
-            user=current_app.config['MYSQL_USER'],
-            password=current_app.config['MYSQL_PASSWORD'],
-            database=current_app.config['MYSQL_DB']
-        )
-        if connection.is_connected():
-            return connection
+        conn = RequestConnection(get_pool().acquire())
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
-        return None
\ No newline at end of file
+        return None
+    g.db_conn = conn
+    return conn
+
+@contextmanager
+def pooled_connection(app=None):
+    """
+    A dedicated pooled connection outside the request's own one, for background work
+    or writes that must commit independently of the request transaction.
+    """
+    pool = get_pool(app)
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+def release_db_connection(exception=None):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        get_pool().release(conn._conn)
+
+def init_app(app):
+    app.teardown_appcontext(release_db_connection)
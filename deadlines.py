@@ -0,0 +1,75 @@
+import datetime
+import numpy as np
+
+NAT = np.datetime64('NaT', 'D')
+URGENT_DAYS = 90
+
+def add_duration(dates, amounts, units):
+    """
+    Adds `amounts` of `units` ('years', 'months', 'days') to datetime64[D] `dates`, elementwise.
+    Mirrors the browser calculator (JS Date.setFullYear/setMonth/setDate): a day past the end
+    of the target month rolls over into the next month, so Jan 31 + 1 month is Mar 2/3 and
+    Feb 29 + 1 year is Mar 1. Missing amounts or unknown units give NaT.
+    """
+    amounts = np.asarray(amounts, dtype='float64')
+    units = np.asarray(units)
+    valid = ~np.isnan(amounts) & ~np.isnat(dates)
+    whole = np.where(valid, amounts, 0).astype('int64')
+
+    by_year = units == 'years'
+    by_month = by_year | (units == 'months')
+    by_day = units == 'days'
+
+    # Calendar arithmetic: step whole months from the 1st, then re-add the day of month
+    month_start = dates.astype('datetime64[M]')
+    day_of_month = dates - month_start.astype('datetime64[D]')
+    months = np.where(by_year, whole * 12, whole).astype('timedelta64[M]')
+    calendar = (month_start + months).astype('datetime64[D]') + day_of_month
+
+    plain = dates + whole.astype('timedelta64[D]')
+    result = np.where(by_month, calendar, np.where(by_day, plain, NAT))
+    return np.where(valid & (by_month | by_day), result, NAT)
+
+def compute_deadlines(incident_dates, limit_types, min_times, max_times, durations, today=None):
+    """
+    Vectorized version of calculateDeadline() in statute.html.
+    Returns a dict of equal-length arrays: earliest, latest, target (the deadline the
+    page reports status against), days_remaining and status ('expired', 'urgent', 'ok').
+    """
+    incident_dates = np.asarray(incident_dates, dtype='datetime64[D]')
+    limit_types = np.asarray(limit_types)
+    durations = np.char.lower(np.asarray(durations, dtype=str))
+    min_times = np.asarray(min_times, dtype='float64')
+    max_times = np.asarray(max_times, dtype='float64')
+    today = np.datetime64(today or datetime.date.today(), 'D')
+
+    earliest = add_duration(incident_dates, min_times, durations)
+    # 'exact' only uses the min value; ranges fall back to the min when max is missing
+    latest = np.where(
+        (limit_types != 'exact') & ~np.isnan(max_times),
+        add_duration(incident_dates, max_times, durations),
+        earliest,
+    )
+    # Once the earliest deadline has passed, the page counts down to the latest one
+    target = np.where((limit_types != 'exact') & (today > earliest), latest, earliest)
+
+    days_remaining = (target - today).astype('float64')
+    days_remaining[np.isnat(target)] = np.nan
+    status = np.where(days_remaining < 0, 'expired', np.where(days_remaining <= URGENT_DAYS, 'urgent', 'ok'))
+    status = np.where(np.isnan(days_remaining), None, status)
+
+    return {
+        'earliest': earliest,
+        'latest': latest,
+        'target': target,
+        'days_remaining': days_remaining,
+        'status': status,
+    }
+
+def dates_to_list(values):
+    """datetime64[D] array -> list of ISO strings, with None for NaT."""
+    strings = np.datetime_as_string(values, unit='D')
+    return np.where(np.isnat(values), None, strings).tolist()
+
+def numbers_to_list(values):
+    return np.where(np.isnan(values), None, np.nan_to_num(values).astype('int64')).tolist()
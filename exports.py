@@ -0,0 +1,151 @@
+# Streaming CSV / XLSX exports of the admin lists.
+# Rows are read from an unbuffered cursor on a dedicated pooled connection in batches
+# of EXPORT_FETCH_SIZE, so memory stays flat however many rows match. CSV is written
+# to the response as it is read; XLSX goes through openpyxl's write-only mode into a
+# temporary file (a zip can't be finished before its last row) and is then sent from disk.
+import csv
+import datetime
+import tempfile
+from flask import Response, current_app, send_file
+from mysql.connector import Error
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from db import pooled_connection
+
+FORMATS = ('csv', 'xlsx')
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+XLSX_MAX_ROWS = 1048575  # Excel's sheet limit, less the header row
+
+# Same headers (and order) the statute upload reads, so an export can be edited and re-uploaded.
+# Exact limits are stored with max == min but the upload rejects a Max Time on them.
+STATUTE_COLUMNS = [
+    ('State', 's.name'),
+    ('Issue', 'i.name'),
+    ('Time Limit Type', 'st.time_limit_type'),
+    ('Min Time', 'st.time_limit_min'),
+    ('Max Time', "CASE WHEN st.time_limit_type = 'exact' THEN NULL ELSE st.time_limit_max END"),
+    ('Duration', 'st.duration'),
+    ('Issue Info', 'st.issue_info'),
+    ('Details', 'st.details'),
+    ('Code Reference', 'st.code_reference'),
+    ('Official URL', 'st.official_source_url'),
+    ('Other URL', 'st.other_source_url'),
+    ('Exceptions', 'st.conditions_exceptions'),
+    ('Examples', 'st.examples'),
+    ('Tolling', 'st.tolling'),
+]
+
+REPORT_COLUMNS = [
+    ('Page', 'page_context'),
+    ('Details', 'details'),
+    ('Official Source', 'official_source'),
+    ('Reporter Email', 'reporter_email'),
+    ('Status', "CASE is_valid WHEN 1 THEN 'Valid' WHEN 0 THEN 'Invalid' ELSE 'Pending' END"),
+    ('Occurrences', 'occurrences'),
+    ('First Reported', 'created_at'),
+    ('Last Reported', 'last_reported_at'),
+]
+
+LOGIN_LOG_COLUMNS = [
+    ('Time', 'login_dt'),
+    ('Username', 'username_attempted'),
+    ('Status', 'status'),
+    ('IP Address', 'ip_address'),
+    ('User Agent', 'user_agent'),
+]
+
+def iter_rows(app, columns, from_sql, conditions, params, order_by):
+    """Yields lists of row tuples, one fetch batch at a time, from an unbuffered cursor."""
+    where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+    sql = f"SELECT {', '.join(expr for _, expr in columns)} FROM {from_sql} {where_clause} ORDER BY {order_by}"
+    batch_size = app.config.get('EXPORT_FETCH_SIZE', 1000)
+    with pooled_connection(app) as conn:
+        cursor = conn.cursor(buffered=False)
+        try:
+            cursor.execute(sql, tuple(params))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            try:
+                cursor.close()
+            except Error:
+                # Client went away mid-export; the pool drops the connection with its unread rows
+                pass
+
+class _Echo:
+    """File-like object that hands back what csv.writer writes, so rows can be yielded."""
+
+    def write(self, value):
+        return value
+
+def _csv_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+def _xlsx_cell(sheet, value):
+    if isinstance(value, str):
+        value = ILLEGAL_CHARACTERS_RE.sub('', value)
+    cell = WriteOnlyCell(sheet, value)
+    if isinstance(value, str) and value.startswith('='):
+        # Text, not a formula
+        cell.data_type = 's'
+    return cell
+
+def _filename(name, fmt):
+    return f"{name}-{datetime.date.today().isoformat()}.{fmt}"
+
+def csv_response(name, columns, from_sql, conditions, params, order_by):
+    app = current_app._get_current_object()
+    rows = iter_rows(app, columns, from_sql, conditions, params, order_by)
+    # Run the query now so a database error surfaces before the response starts
+    first = next(rows, [])
+
+    def generate():
+        writer = csv.writer(_Echo())
+        yield writer.writerow([header for header, _ in columns])
+        batch = first
+        try:
+            while batch:
+                yield ''.join(writer.writerow([_csv_value(v) for v in row]) for row in batch)
+                batch = next(rows, None)
+        finally:
+            # Also runs when the client disconnects, returning the connection to the pool
+            rows.close()
+
+    response = Response(generate(), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename="{_filename(name, "csv")}"'
+    return response
+
+def xlsx_response(name, columns, from_sql, conditions, params, order_by):
+    app = current_app._get_current_object()
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(name.replace('-', ' ').title()[:31])
+    sheet.append([header for header, _ in columns])
+    written = 0
+    rows = iter_rows(app, columns, from_sql, conditions, params, order_by)
+    for batch in rows:
+        if written + len(batch) > XLSX_MAX_ROWS:
+            sheet.append([f'Truncated at {XLSX_MAX_ROWS} rows; export as CSV for the full data.'])
+            rows.close()
+            break
+        for row in batch:
+            sheet.append([_xlsx_cell(sheet, v) for v in row])
+        written += len(batch)
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return send_file(output, mimetype=XLSX_MIMETYPE, as_attachment=True, download_name=_filename(name, 'xlsx'))
+
+def export_response(fmt, name, columns, from_sql, conditions, params, order_by):
+    """
+    CSV or XLSX download of `columns` ([(header, sql expression)]) for the filtered rows.
+    Raises mysql.connector.Error if the query fails before anything was sent.
+    """
+    if fmt == 'xlsx':
+        return xlsx_response(name, columns, from_sql, conditions, params, order_by)
+    return csv_response(name, columns, from_sql, conditions, params, order_by)
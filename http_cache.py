@@ -0,0 +1,37 @@
+import datetime
+import hashlib
+from flask import request, Response
+from werkzeug.http import is_resource_modified
+
+def make_etag(*parts):
+    """Strong ETag from the data version(s) a response is built from."""
+    return hashlib.sha1('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()[:20]
+
+def page_day():
+    # Pages render `now` (footer year, date picker max), so their validators roll over daily
+    return datetime.datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+def latest(*dates):
+    return max((d for d in dates if d), default=None)
+
+def not_modified(etag, last_modified=None, max_age=None):
+    """
+    Returns a 304 response if the client's cached copy matches, otherwise None.
+    Call before rendering so a revalidation costs no template work.
+    """
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    return add_validators(Response(status=304), etag, last_modified, max_age)
+
+def add_validators(response, etag, last_modified=None, max_age=None):
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    # Let browsers and crawlers keep a copy but revalidate it on every use,
+    # or only after `max_age` seconds for responses that may be slightly stale
+    response.cache_control.public = True
+    if max_age:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response
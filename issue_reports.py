@@ -0,0 +1,126 @@
+# Public "Report Issue" submissions. Reports are accepted into an in-process queue and
+# written in batches by a background thread. A report whose page and normalized details
+# match a pending report seen within REPORT_DEDUP_WINDOW is folded into that row
+# (occurrences + 1) instead of adding a duplicate for reviewers to work through.
+import atexit
+import datetime
+import hashlib
+from urllib.parse import urlsplit
+from batch_writer import BatchWriter
+from db import pooled_connection
+
+INSERT_SQL = """
+    INSERT INTO issue_reports (page_context, details, details_hash, reporter_email, official_source,
+                               is_valid, occurrences, created_at, last_reported_at)
+    VALUES (%s, %s, %s, %s, %s, NULL, %s, %s, %s)
+"""
+
+# Keeps the first reporter's contact details, filling them in if the first report had none
+MERGE_SQL = """
+    UPDATE issue_reports
+    SET occurrences = occurrences + %s,
+        last_reported_at = GREATEST(last_reported_at, %s),
+        reporter_email = COALESCE(reporter_email, %s),
+        official_source = COALESCE(official_source, %s)
+    WHERE id = %s
+"""
+
+def normalize_page(page_context):
+    """Path of the reported page without query string, fragment or trailing slash."""
+    if not page_context:
+        return None
+    path = urlsplit(page_context.strip()).path.rstrip('/') or '/'
+    return path[:255]
+
+def details_hash(details):
+    """Case- and whitespace-insensitive fingerprint of the report text."""
+    normalized = ' '.join(details.lower().split())
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+class Report:
+    __slots__ = ('page_context', 'details', 'details_hash', 'reporter_email', 'official_source',
+                 'occurrences', 'first_seen', 'last_seen')
+
+    def __init__(self, page_context, details, reporter_email, official_source, reported_at):
+        self.page_context = normalize_page(page_context)
+        self.details = details
+        self.details_hash = details_hash(details)
+        self.reporter_email = (reporter_email or '').strip()[:100] or None
+        self.official_source = (official_source or '').strip()[:255] or None
+        self.occurrences = 1
+        self.first_seen = self.last_seen = reported_at
+
+    @property
+    def key(self):
+        return (self.page_context, self.details_hash)
+
+    def absorb(self, other):
+        self.occurrences += other.occurrences
+        self.last_seen = max(self.last_seen, other.last_seen)
+        self.reporter_email = self.reporter_email or other.reporter_email
+        self.official_source = self.official_source or other.official_source
+
+class ReportWriter(BatchWriter):
+    name = 'issue-reports'
+
+    def __init__(self, app, dedup_window=86400, **kwargs):
+        super().__init__(app, **kwargs)
+        self.dedup_window = datetime.timedelta(seconds=dedup_window)
+
+    def submit(self, page_context, details, reporter_email, official_source):
+        return self.put(Report(page_context, details, reporter_email, official_source, datetime.datetime.now()))
+
+    def write(self, batch):
+        # Collapse duplicates inside the batch first, then against pending rows in the table
+        reports = {}
+        for report in batch:
+            if report.key in reports:
+                reports[report.key].absorb(report)
+            else:
+                reports[report.key] = report
+
+        with pooled_connection(self.app) as conn:
+            cursor = conn.cursor()
+            hashes = sorted({report.details_hash for report in reports.values()})
+            placeholders = ', '.join(['%s'] * len(hashes))
+            cursor.execute(f"""
+                SELECT id, page_context, details_hash FROM issue_reports
+                WHERE details_hash IN ({placeholders}) AND is_valid IS NULL AND last_reported_at >= %s
+                ORDER BY last_reported_at DESC
+                FOR UPDATE
+            """, hashes + [datetime.datetime.now() - self.dedup_window])
+            existing = {}
+            for row_id, page_context, row_hash in cursor.fetchall():
+                existing.setdefault((page_context, row_hash), row_id)
+
+            merges, inserts = [], []
+            for key, report in reports.items():
+                if key in existing:
+                    merges.append((report.occurrences, report.last_seen, report.reporter_email,
+                                   report.official_source, existing[key]))
+                else:
+                    inserts.append((report.page_context, report.details, report.details_hash, report.reporter_email,
+                                    report.official_source, report.occurrences, report.first_seen, report.last_seen))
+            if merges:
+                cursor.executemany(MERGE_SQL, merges)
+            if inserts:
+                cursor.executemany(INSERT_SQL, inserts)
+            conn.commit()
+            cursor.close()
+
+writer = None
+
+def init_app(app):
+    global writer
+    writer = ReportWriter(
+        app,
+        dedup_window=app.config.get('REPORT_DEDUP_WINDOW', 86400),
+        queue_size=app.config.get('REPORT_QUEUE_SIZE', 1000),
+        batch_size=app.config.get('REPORT_BATCH_SIZE', 100),
+        flush_interval=app.config.get('REPORT_FLUSH_INTERVAL', 2.0),
+    )
+    atexit.register(writer.close)
+
+def submit(page_context, details, reporter_email=None, official_source=None):
+    """Queues a report for the background writer. Returns False if the queue is full."""
+    return writer.submit(page_context, details, reporter_email, official_source)
@@ -0,0 +1,130 @@
+# Background jobs for long admin operations (statute uploads, "approve all matching").
+# Each worker process runs its own small thread pool; job state lives in the `jobs`
+# table so any worker can answer status polls while the work proceeds elsewhere.
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from mysql.connector import Error
+from db import get_db_connection, pooled_connection
+
+QUEUED = 'QUEUED'
+RUNNING = 'RUNNING'
+SUCCEEDED = 'SUCCEEDED'
+FAILED = 'FAILED'
+FINISHED = (SUCCEEDED, FAILED)
+
+# Columns a running job may report on; anything else is a programming error
+PROGRESS_COLUMNS = ('status', 'progress', 'rows_total', 'rows_processed', 'rows_failed', 'message', 'result')
+
+_handlers = {}
+_executors = {}
+_executors_lock = threading.Lock()
+
+def handler(job_type):
+    """Registers `func(job, payload)` as the runner for `job_type`."""
+    def decorator(func):
+        _handlers[job_type] = func
+        return func
+    return decorator
+
+class Job:
+    """
+    Handed to job handlers. Progress updates commit on their own connection, so
+    pollers see them while the job's main transaction is still open.
+    """
+
+    def __init__(self, app, job_id, job_type):
+        self.app = app
+        self.id = job_id
+        self.job_type = job_type
+        self.result = {}
+
+    def update(self, **fields):
+        _update(self.app, self.id, fields)
+
+    def set_result(self, **values):
+        self.result.update(values)
+        self.update(result=json.dumps(self.result))
+
+def _update(app, job_id, fields, stamp=None):
+    for name in fields:
+        if name not in PROGRESS_COLUMNS:
+            raise ValueError(f'Unknown job column: {name}')
+    assignments = [f'{name} = %s' for name in fields] + ['updated_dt = NOW()']
+    if stamp:
+        assignments.append(f'{stamp} = NOW()')
+    with pooled_connection(app) as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"UPDATE jobs SET {', '.join(assignments)} WHERE id = %s", (*fields.values(), job_id))
+        conn.commit()
+        cursor.close()
+
+def _get_executor(app):
+    # One pool per process: threads don't survive a gunicorn fork
+    key = os.getpid()
+    executor = _executors.get(key)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(key)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=app.config.get('JOB_WORKERS', 2), thread_name_prefix='job')
+                _executors[key] = executor
+    return executor
+
+def submit(job_type, payload, submitted_by):
+    """Persists a QUEUED job, hands it to the worker pool and returns its id."""
+    if job_type not in _handlers:
+        raise ValueError(f'No handler registered for job type: {job_type}')
+    app = current_app._get_current_object()
+    with pooled_connection(app) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO jobs (job_type, status, payload, submitted_by, created_dt, updated_dt) VALUES (%s, %s, %s, %s, NOW(), NOW())",
+            (job_type, QUEUED, json.dumps(payload), submitted_by)
+        )
+        job_id = cursor.lastrowid
+        conn.commit()
+        cursor.close()
+    _get_executor(app).submit(_run, app, job_id, job_type, payload)
+    return job_id
+
+def _run(app, job_id, job_type, payload):
+    job = Job(app, job_id, job_type)
+    # The app context gives the handler the usual get_db_connection(), released on exit
+    with app.app_context():
+        try:
+            _update(app, job_id, {'status': RUNNING}, stamp='started_dt')
+            _handlers[job_type](job, payload)
+            _update(app, job_id, {'status': SUCCEEDED, 'progress': 100}, stamp='finished_dt')
+        except Exception as e:
+            print(f"Job Error ({job_type} #{job_id}): {e}")
+            try:
+                _update(app, job_id, {'status': FAILED, 'message': str(e)}, stamp='finished_dt')
+            except Error as db_error:
+                print(f"Job Error ({job_type} #{job_id}): could not record failure: {db_error}")
+
+def get_job(job_id):
+    """
+    The job row as a dict (payload omitted), or None. `stalled` is set when an unfinished
+    job has not reported for JOB_STALL_AFTER seconds, e.g. because its worker restarted.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT id, job_type, status, progress, rows_total, rows_processed, rows_failed,
+               message, result, submitted_by, created_dt, started_dt, finished_dt,
+               TIMESTAMPDIFF(SECOND, updated_dt, NOW()) AS idle_seconds
+        FROM jobs WHERE id = %s
+    """, (job_id,))
+    job = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    if not job:
+        return None
+    idle_seconds = job.pop('idle_seconds') or 0
+    job['result'] = json.loads(job['result']) if job['result'] else {}
+    job['finished'] = job['status'] in FINISHED
+    job['stalled'] = not job['finished'] and idle_seconds > current_app.config['JOB_STALL_AFTER']
+    return job
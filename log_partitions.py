@@ -0,0 +1,178 @@
+# Monthly RANGE partitions for login_logs and archival of expired months.
+# Partitions are named p<YYYYMM> and hold [first of month, first of next month); a
+# trailing `pmax` partition catches anything beyond the newest month. Run
+# `flask rotate-login-logs` from cron (daily is plenty): it keeps LOGIN_LOG_PARTITIONS_AHEAD
+# future months ready, and exports each month older than LOGIN_LOG_RETENTION_MONTHS to
+# LOGIN_LOG_ARCHIVE_DIR/login_logs-YYYY-MM.ndjson.gz before dropping its partition.
+import datetime
+import gzip
+import json
+import os
+import click
+from db import pooled_connection
+
+TABLE = 'login_logs'
+
+def month_start(value):
+    return datetime.datetime(value.year, value.month, 1)
+
+def add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return datetime.datetime(index // 12, index % 12 + 1, 1)
+
+def partition_name(month):
+    return f'p{month:%Y%m}'
+
+def list_partitions(cursor):
+    """Monthly partitions as [(name, month_start)], oldest first; None if the table isn't partitioned."""
+    cursor.execute("""
+        SELECT PARTITION_NAME AS name
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (TABLE,))
+    names = [row['name'] for row in cursor.fetchall()]
+    if not names:
+        return None
+    monthly = []
+    for name in names:
+        if name != 'pmax':
+            monthly.append((name, datetime.datetime.strptime(name[1:], '%Y%m')))
+    return monthly
+
+def archived_months(archive_dir, start=None, end=None):
+    """Months with an archive file in archive_dir, optionally limited to [start, end)."""
+    try:
+        names = os.listdir(archive_dir)
+    except FileNotFoundError:
+        return []
+    months = []
+    prefix, suffix = f'{TABLE}-', '.ndjson.gz'
+    for name in names:
+        if not (name.startswith(prefix) and name.endswith(suffix)):
+            continue
+        try:
+            month = datetime.datetime.strptime(name[len(prefix):-len(suffix)], '%Y-%m')
+        except ValueError:
+            continue
+        if (start is None or add_months(month, 1) > start) and (end is None or month < end):
+            months.append(month)
+    return sorted(months)
+
+def ensure_partitions(cursor, now, ahead):
+    """
+    Splits pmax so every month up to `ahead` months past `now` has its own partition.
+    On a table with only pmax, the first month is the one holding the oldest row.
+    Returns the names of the partitions created.
+    """
+    partitions = list_partitions(cursor)
+    if partitions is None:
+        raise click.ClickException(f'{TABLE} is not partitioned; apply update.sql first.')
+    if partitions:
+        first = add_months(partitions[-1][1], 1)
+    else:
+        cursor.execute(f"SELECT MIN(login_dt) AS oldest FROM {TABLE}")
+        oldest = cursor.fetchone()['oldest']
+        first = month_start(oldest or now)
+    last = add_months(month_start(now), ahead)
+    months = []
+    month = first
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    if not months:
+        return []
+    definitions = [
+        f"PARTITION {partition_name(m)} VALUES LESS THAN ('{add_months(m, 1):%Y-%m-%d %H:%M:%S}')" for m in months
+    ] + ["PARTITION pmax VALUES LESS THAN (MAXVALUE)"]
+    cursor.execute(f"ALTER TABLE {TABLE} REORGANIZE PARTITION pmax INTO ({', '.join(definitions)})")
+    return [partition_name(m) for m in months]
+
+def archive_partition(conn, name, month, archive_dir, batch_size=5000):
+    """
+    Streams one partition to a gzip NDJSON file (written to a temp name, fsynced, renamed)
+    and returns its path and row count. The caller drops the partition afterwards.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f'{TABLE}-{month:%Y-%m}.ndjson.gz')
+    tmp_path = path + '.part'
+    rows = 0
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(f"SELECT * FROM {TABLE} PARTITION ({name}) ORDER BY login_dt, id")
+        with open(tmp_path, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    for row in batch:
+                        f.write(json.dumps(row, default=str).encode('utf-8') + b'\n')
+                    rows += len(batch)
+            raw.flush()
+            os.fsync(raw.fileno())
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        cursor.close()
+    os.replace(tmp_path, path)
+    return path, rows
+
+def expire_partitions(conn, now, retention_months, archive_dir, dry_run=False):
+    """Archives and drops every monthly partition that ends before the retention cutoff."""
+    cursor = conn.cursor(dictionary=True)
+    partitions = list_partitions(cursor) or []
+    cutoff = add_months(month_start(now), -retention_months)
+    expired = [(name, month) for name, month in partitions if add_months(month, 1) <= cutoff]
+    results = []
+    for name, month in expired:
+        if dry_run:
+            results.append((name, None, None))
+            continue
+        path, rows = archive_partition(conn, name, month, archive_dir)
+        # End the archive's read snapshot, then hold writers off while comparing and dropping,
+        # so rows written to the partition since it was read are seen and not dropped unarchived
+        conn.commit()
+        cursor.execute(f"LOCK TABLES {TABLE} WRITE")
+        try:
+            cursor.execute(f"SELECT COUNT(*) AS total FROM {TABLE} PARTITION ({name})")
+            remaining = cursor.fetchone()['total']
+            if remaining != rows:
+                raise click.ClickException(f'{name}: archived {rows} rows but the partition now holds {remaining}; not dropping it.')
+            cursor.execute(f"ALTER TABLE {TABLE} DROP PARTITION {name}")
+        finally:
+            cursor.execute("UNLOCK TABLES")
+        results.append((name, path, rows))
+    cursor.close()
+    return results
+
+def init_app(app):
+    @app.cli.command('rotate-login-logs')
+    @click.option('--retention-months', type=int, default=None, help='Months kept online (defaults to LOGIN_LOG_RETENTION_MONTHS).')
+    @click.option('--ahead', type=int, default=None, help='Future months to pre-create (defaults to LOGIN_LOG_PARTITIONS_AHEAD).')
+    @click.option('--archive-dir', default=None, help='Where expired months are written (defaults to LOGIN_LOG_ARCHIVE_DIR).')
+    @click.option('--dry-run', is_flag=True, help='Only report which partitions would be archived.')
+    def rotate_login_logs_command(retention_months, ahead, archive_dir, dry_run):
+        """Add upcoming login_logs partitions and archive expired ones."""
+        retention_months = app.config['LOGIN_LOG_RETENTION_MONTHS'] if retention_months is None else retention_months
+        ahead = app.config['LOGIN_LOG_PARTITIONS_AHEAD'] if ahead is None else ahead
+        archive_dir = archive_dir or app.config['LOGIN_LOG_ARCHIVE_DIR']
+        if retention_months < 1:
+            raise click.UsageError('--retention-months must be at least 1.')
+        now = datetime.datetime.now()
+        with pooled_connection(app) as conn:
+            cursor = conn.cursor(dictionary=True)
+            if dry_run:
+                created = []
+            else:
+                created = ensure_partitions(cursor, now, ahead)
+            cursor.close()
+            for name in created:
+                click.echo(f"Created partition {name}")
+            for name, path, rows in expire_partitions(conn, now, retention_months, archive_dir, dry_run):
+                if dry_run:
+                    click.echo(f"Would archive and drop {name}")
+                else:
+                    click.echo(f"Archived {rows} rows from {name} to {path} and dropped it")
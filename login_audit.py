@@ -0,0 +1,149 @@
+# Login audit trail: the raw login_logs rows plus an hourly rollup of success/failure
+# counts per (username, IP) that the login history page reads its trends from.
+# Attempts are queued in-process and written by a background thread in multi-row
+# batches, so a burst of logins doesn't turn into a burst of single-row commits.
+import atexit
+import datetime
+from collections import Counter
+from batch_writer import BatchWriter
+from db import pooled_connection
+
+INSERT_LOG_SQL = """
+    INSERT INTO login_logs (username_attempted, status, ip_address, user_agent, login_dt)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+# Incremental rollup: each batch bumps the hour buckets it touched
+UPSERT_ROLLUP_SQL = """
+    INSERT INTO login_stats_hourly (bucket_start, username, ip_address, success_count, failure_count)
+    VALUES (%s, %s, %s, %s, %s) AS new
+    ON DUPLICATE KEY UPDATE
+        success_count = login_stats_hourly.success_count + new.success_count,
+        failure_count = login_stats_hourly.failure_count + new.failure_count
+"""
+
+class AuditWriter(BatchWriter):
+    """Login events queued per worker process and written in multi-row batches."""
+
+    name = 'login-audit'
+
+    def submit(self, username, status, ip_address, user_agent):
+        self.put(((username or '')[:50], status, ip_address, (user_agent or '')[:255], datetime.datetime.now()))
+
+    def write(self, batch):
+        rollup = Counter()
+        for username, status, ip_address, _, login_dt in batch:
+            bucket = login_dt.replace(minute=0, second=0, microsecond=0)
+            rollup[(bucket, username, ip_address or '', status == 'SUCCESS')] += 1
+        rollup_rows = {}
+        for (bucket, username, ip_address, success), count in rollup.items():
+            row = rollup_rows.setdefault((bucket, username, ip_address), [0, 0])
+            row[0 if success else 1] += count
+        with pooled_connection(self.app) as conn:
+            cursor = conn.cursor()
+            cursor.executemany(INSERT_LOG_SQL, batch)
+            cursor.executemany(UPSERT_ROLLUP_SQL, [key + tuple(counts) for key, counts in rollup_rows.items()])
+            conn.commit()
+            cursor.close()
+
+writer = None
+
+def init_app(app):
+    global writer
+    writer = AuditWriter(
+        app,
+        queue_size=app.config.get('LOGIN_AUDIT_QUEUE_SIZE', 10000),
+        batch_size=app.config.get('LOGIN_AUDIT_BATCH_SIZE', 200),
+        flush_interval=app.config.get('LOGIN_AUDIT_FLUSH_INTERVAL', 1.0),
+    )
+    # Drain pending events when the worker exits
+    atexit.register(writer.close)
+
+def record(username, status, ip_address, user_agent):
+    """Queues one login attempt for the audit log; never blocks the request."""
+    writer.submit(username, status, ip_address, user_agent)
+
+def date_range(start_date, end_date):
+    """
+    Turns the page's inclusive YYYY-MM-DD inputs into a half-open [start, end) datetime
+    range, so queries compare raw login_dt values and can use its index. Bad input, and
+    dates outside 1970-9999 (no log rows there, and date arithmetic would overflow), are ignored.
+    """
+    def parse(value):
+        try:
+            date = datetime.date.fromisoformat(value)
+        except (TypeError, ValueError):
+            return None
+        if not 1970 <= date.year < 9999:
+            return None
+        return datetime.datetime.combine(date, datetime.time())
+    start = parse(start_date)
+    end = parse(end_date)
+    if end is not None:
+        end += datetime.timedelta(days=1)
+    return start, end
+
+# Bucket SQL expression, step and label format per trend granularity
+TREND_BUCKETS = {
+    'hour': ("bucket_start", datetime.timedelta(hours=1), '%H:00'),
+    'day': ("CAST(DATE(bucket_start) AS DATETIME)", datetime.timedelta(days=1), '%b %d'),
+    'week': ("CAST(DATE(bucket_start) - INTERVAL WEEKDAY(bucket_start) DAY AS DATETIME)",
+             datetime.timedelta(weeks=1), '%b %d'),
+}
+
+def trend(cursor, start, end, max_days=366):
+    """
+    Success/failure counts per bucket between start and end (datetimes), from the rollup.
+    Only the last `max_days` of the range are charted. Hourly buckets for ranges up to
+    two days, daily up to three months, weekly beyond. Empty buckets are filled in.
+    """
+    if end - start > datetime.timedelta(days=max_days):
+        start = end - datetime.timedelta(days=max_days)
+    span = end - start
+    granularity = 'hour' if span <= datetime.timedelta(days=2) else 'day' if span <= datetime.timedelta(days=92) else 'week'
+    bucket, step, label = TREND_BUCKETS[granularity]
+    cursor.execute(f"""
+        SELECT {bucket} AS bucket, SUM(success_count) AS successes, SUM(failure_count) AS failures
+        FROM login_stats_hourly
+        WHERE bucket_start >= %s AND bucket_start < %s
+        GROUP BY bucket
+    """, (start, end))
+    found = {row['bucket']: row for row in cursor.fetchall()}
+
+    current = start.replace(minute=0, second=0, microsecond=0)
+    if granularity != 'hour':
+        current = current.replace(hour=0)
+    if granularity == 'week':
+        current -= datetime.timedelta(days=current.weekday())
+    points = []
+    while current < end:
+        row = found.get(current)
+        points.append({
+            'bucket': current,
+            'label': current.strftime(label),
+            'successes': int(row['successes']) if row else 0,
+            'failures': int(row['failures']) if row else 0,
+        })
+        current += step
+    return points
+
+def top_failures(cursor, start, end, group_by, limit=10):
+    """
+    Brute-force summary: the IPs (group_by='ip_address') or usernames (group_by='username')
+    with the most failed attempts in [start, end), with how widely each one spread.
+    """
+    spread = 'username' if group_by == 'ip_address' else 'ip_address'
+    cursor.execute(f"""
+        SELECT {group_by} AS name,
+               SUM(failure_count) AS failures,
+               SUM(success_count) AS successes,
+               COUNT(DISTINCT {spread}) AS spread,
+               MAX(bucket_start) AS last_seen
+        FROM login_stats_hourly
+        WHERE bucket_start >= %s AND bucket_start < %s
+        GROUP BY {group_by}
+        HAVING failures > 0
+        ORDER BY failures DESC
+        LIMIT %s
+    """, (start, end, limit))
+    return cursor.fetchall()
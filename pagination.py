@@ -0,0 +1,147 @@
+# Keyset ("seek") pagination for the admin list views.
+# Pages are addressed by an opaque cursor holding the sort key of the first or last row
+# shown, so fetching page N costs the same as page 1. Totals come from a count cache
+# that is refreshed in the background instead of running COUNT(*) on every request.
+import base64
+import json
+import threading
+import time
+from flask import current_app
+from mysql.connector import Error
+from db import pooled_connection
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=str, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token, size):
+    """Sort-key values from a cursor, or None if it is missing or malformed."""
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    # Only scalars can be bound as seek parameters (bool is an int subclass, but no sort key is one)
+    if not all(isinstance(v, (str, int, float)) and not isinstance(v, bool) for v in values):
+        return None
+    return values
+
+def _seek_condition(columns, values, op):
+    """
+    `(c1, c2, ...) op (v1, v2, ...)` spelled out so MySQL can range-scan the sort index:
+    c1 op= v1 AND (c1 op v1 OR (c1 = v1 AND c2 op v2) OR ...)
+    """
+    branches = []
+    params = []
+    for i, column in enumerate(columns):
+        equal = [f'{c} = %s' for c in columns[:i]]
+        branches.append('(' + ' AND '.join(equal + [f'{column} {op} %s']) + ')')
+        params.extend(values[:i] + [values[i]])
+    return f"{columns[0]} {op}= %s AND ({' OR '.join(branches)})", [values[0]] + params
+
+class Page:
+    def __init__(self, items, order, has_prev, has_next, total):
+        self.items = items
+        self.has_prev = has_prev
+        self.has_next = has_next
+        self.total = total
+        fields = [field for _, field in order]
+        self.prev_cursor = encode_cursor([items[0][f] for f in fields]) if items else None
+        self.next_cursor = encode_cursor([items[-1][f] for f in fields]) if items else None
+
+def fetch_page(cursor, select_sql, conditions, params, order, per_page, descending=False,
+               after=None, before=None, total=None):
+    """
+    Runs `select_sql` (SELECT ... FROM ... JOIN ..., no WHERE) with `conditions` ANDed,
+    ordered by `order` — (sql expression, result field) pairs ending in a unique column;
+    the seek compares tuples, so the expressions must never be NULL (COALESCE them if they can) —
+    and returns the page after `after` or before `before`. An unreadable cursor gives the first page.
+    """
+    columns = [expr for expr, _ in order]
+    backwards = False
+    conditions = list(conditions)
+    params = list(params)
+    values = decode_cursor(before, len(order))
+    if values is not None:
+        backwards = True
+    else:
+        values = decode_cursor(after, len(order))
+    if values is not None:
+        op = '<' if descending != backwards else '>'
+        seek, seek_params = _seek_condition(columns, values, op)
+        conditions.append(seek)
+        params.extend(seek_params)
+
+    direction = 'DESC' if descending != backwards else 'ASC'
+    where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+    order_clause = ', '.join(f'{c} {direction}' for c in columns)
+    cursor.execute(f"{select_sql} {where_clause} ORDER BY {order_clause} LIMIT %s", tuple(params) + (per_page + 1,))
+    rows = cursor.fetchall()
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+        return Page(rows, order, has_prev=more, has_next=True, total=total)
+    return Page(rows, order, has_prev=values is not None, has_next=more, total=total)
+
+class CountCache:
+    """
+    Cached COUNT(*) results keyed by query and parameters. A stale entry is still served
+    while one background thread recounts it, so only the first request for a given
+    filter waits on the count.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = {}  # key -> [value, expires_at, refreshing]
+        self._lock = threading.Lock()
+
+    def get(self, cursor, count_sql, params=()):
+        key = (count_sql, tuple(params))
+        ttl = current_app.config.get('ADMIN_COUNT_TTL', 60)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if time.monotonic() >= entry[1] and not entry[2]:
+                    entry[2] = True
+                    threading.Thread(
+                        target=self._refresh, args=(current_app._get_current_object(), key, ttl), daemon=True
+                    ).start()
+                return entry[0]
+        cursor.execute(count_sql, key[1])
+        value = cursor.fetchone()['total']
+        self._store(key, value, ttl)
+        return value
+
+    def _refresh(self, app, key, ttl):
+        try:
+            with pooled_connection(app) as conn:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute(*key)
+                value = cursor.fetchone()['total']
+                cursor.close()
+        except Error as e:
+            print(f"Count Refresh Error: {e}")
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry[1] = time.monotonic() + ttl
+                    entry[2] = False
+            return
+        self._store(key, value, ttl)
+
+    def _store(self, key, value, ttl):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = [value, time.monotonic() + ttl, False]
+            while len(self._entries) > self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+counts = CountCache()
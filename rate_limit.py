@@ -0,0 +1,230 @@
+# Token-bucket rate limiting shared by every worker process on the host.
+# Buckets live in a fixed-size open-addressed table in a memory-mapped file
+# (RATE_LIMIT_FILE), so a client hitting several gunicorn workers still draws from
+# one bucket. Updates are serialized with flock on the file; each operation touches
+# a handful of bytes, so the lock is held for microseconds.
+#
+# File layout (little endian):
+#   header    magic(8) slots(u32) reserved(u32)
+#   counters  MAX_RULES x [name(24) allowed(u64) limited(u64)], plus one eviction counter
+#   buckets   slots x [key(u64) tokens(f64) updated(f64)]
+import fcntl
+import functools
+import hashlib
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from flask import request, jsonify
+
+MAGIC = b'RLIMIT01'
+HEADER = struct.Struct('<8sII')
+COUNTER = struct.Struct('<24sQQ')
+EVICTIONS = struct.Struct('<Q')
+BUCKET = struct.Struct('<Qdd')
+MAX_RULES = 32
+PROBES = 8
+
+COUNTERS_OFFSET = HEADER.size
+EVICTIONS_OFFSET = COUNTERS_OFFSET + MAX_RULES * COUNTER.size
+BUCKETS_OFFSET = EVICTIONS_OFFSET + EVICTIONS.size
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+class Rule:
+    """`limit` requests per `period` seconds, refilled continuously, bursts up to `limit`."""
+
+    def __init__(self, name, limit, period):
+        self.name = name
+        self.limit = limit
+        self.period = period
+        self.rate = limit / period
+
+    @classmethod
+    def parse(cls, name, spec):
+        """'20/minute', '5/10 seconds' -> Rule. An empty spec disables the rule (None)."""
+        if not spec:
+            return None
+        match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*', spec)
+        if not match or int(match.group(1)) < 1:
+            raise ValueError(f"Invalid rate limit for {name}: {spec!r}")
+        return cls(name, int(match.group(1)), int(match.group(2) or 1) * PERIODS[match.group(3)])
+
+class RateLimiter:
+    def __init__(self, path, slots=8192):
+        self.path = path
+        self.slots = slots
+        self.size = BUCKETS_OFFSET + slots * BUCKET.size
+        self.rules = {}
+        self._pid = None
+        self._file = None
+        self._map = None
+        self._lock = threading.Lock()
+
+    def add_rule(self, rule):
+        if len(self.rules) >= MAX_RULES:
+            raise ValueError('Too many rate limit rules')
+        self.rules[rule.name] = rule
+
+    def _open(self):
+        # flock is held per open file description, so every forked worker opens its own
+        if self._pid == os.getpid():
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        f = os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b')
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.seek(0)
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size or HEADER.unpack(header)[:2] != (MAGIC, self.slots) \
+                    or os.fstat(f.fileno()).st_size != self.size:
+                # New file, or one written with a different layout: start from empty buckets
+                f.truncate(0)
+                f.truncate(self.size)
+                f.seek(0)
+                f.write(HEADER.pack(MAGIC, self.slots, 0))
+                f.flush()
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+        self._file = f
+        self._map = mmap.mmap(f.fileno(), self.size)
+        self._pid = os.getpid()
+
+    def _key(self, rule_name, key):
+        digest = hashlib.blake2b(f'{rule_name}\0{key}'.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little') or 1  # 0 marks an empty slot
+
+    def _find_slot(self, key, now):
+        """Slot holding `key`, else a free one, else the least recently used one in the probe range."""
+        start = key % self.slots
+        victim = None
+        for i in range(PROBES):
+            offset = BUCKETS_OFFSET + ((start + i) % self.slots) * BUCKET.size
+            slot_key, tokens, updated = BUCKET.unpack_from(self._map, offset)
+            if slot_key == key:
+                return offset, tokens, updated
+            if slot_key == 0:
+                return offset, None, now
+            if victim is None or updated < victim[1]:
+                victim = (offset, updated)
+        self._count_eviction()
+        return victim[0], None, now
+
+    def _counter_offset(self, rule_name):
+        name = rule_name.encode('utf-8')[:24].ljust(24, b'\0')
+        for i in range(MAX_RULES):
+            offset = COUNTERS_OFFSET + i * COUNTER.size
+            slot_name = COUNTER.unpack_from(self._map, offset)[0]
+            if slot_name == name:
+                return offset
+            if slot_name == b'\0' * 24:
+                COUNTER.pack_into(self._map, offset, name, 0, 0)
+                return offset
+        return None
+
+    def _count(self, rule_name, allowed):
+        offset = self._counter_offset(rule_name)
+        if offset is not None:
+            name, allowed_count, limited_count = COUNTER.unpack_from(self._map, offset)
+            if allowed:
+                allowed_count += 1
+            else:
+                limited_count += 1
+            COUNTER.pack_into(self._map, offset, name, allowed_count, limited_count)
+
+    def _count_eviction(self):
+        EVICTIONS.pack_into(self._map, EVICTIONS_OFFSET, EVICTIONS.unpack_from(self._map, EVICTIONS_OFFSET)[0] + 1)
+
+    def hit(self, rule_name, key):
+        """
+        Takes one token from the `rule_name` bucket of `key`.
+        Returns 0 if the request is allowed, else the seconds until a token is available.
+        """
+        rule = self.rules.get(rule_name)
+        if rule is None or key is None:
+            return 0
+        bucket_key = self._key(rule_name, key)
+        with self._lock:
+            self._open()
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                offset, tokens, updated = self._find_slot(bucket_key, now)
+                if tokens is None:
+                    tokens = rule.limit
+                else:
+                    # Wall clock is shared by all workers; never refill backwards if it steps back
+                    tokens = min(rule.limit, tokens + max(now - updated, 0) * rule.rate)
+                allowed = tokens >= 1
+                if allowed:
+                    tokens -= 1
+                BUCKET.pack_into(self._map, offset, bucket_key, tokens, now)
+                self._count(rule_name, allowed)
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+        return 0 if allowed else max(1, math.ceil((1 - tokens) / rule.rate))
+
+    def stats(self):
+        """Allowed/limited totals per rule across all workers since the file was created."""
+        with self._lock:
+            self._open()
+            fcntl.flock(self._file, fcntl.LOCK_SH)
+            try:
+                rules = {}
+                for i in range(MAX_RULES):
+                    name, allowed, limited = COUNTER.unpack_from(self._map, COUNTERS_OFFSET + i * COUNTER.size)
+                    if name != b'\0' * 24:
+                        rules[name.rstrip(b'\0').decode('utf-8')] = {'allowed': allowed, 'limited': limited}
+                evictions = EVICTIONS.unpack_from(self._map, EVICTIONS_OFFSET)[0]
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+        return {'rules': rules, 'evictions': evictions, 'slots': self.slots}
+
+limiter = None
+
+# Config key per rule; the value is a spec like '20/minute' (empty to disable)
+RULES = {
+    'login_ip': 'RATE_LIMIT_LOGIN_IP',
+    'login_user': 'RATE_LIMIT_LOGIN_USER',
+    'report_ip': 'RATE_LIMIT_REPORT_IP',
+    'api_ip': 'RATE_LIMIT_API_IP',
+}
+
+def init_app(app):
+    global limiter
+    limiter = RateLimiter(app.config['RATE_LIMIT_FILE'], app.config.get('RATE_LIMIT_SLOTS', 8192))
+    if not app.config.get('RATE_LIMIT_ENABLED', True):
+        return
+    for name, config_key in RULES.items():
+        rule = Rule.parse(name, app.config.get(config_key))
+        if rule:
+            limiter.add_rule(rule)
+
+def hit(rule_name, key):
+    """Seconds the caller must wait before retrying, or 0 if the request may proceed."""
+    return limiter.hit(rule_name, key)
+
+def too_many_requests(response, retry_after):
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def limit(rule_name, key=lambda: request.remote_addr):
+    """Route decorator: answers with a JSON 429 once `key()` has used up its bucket."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(*args, **kwargs):
+            retry_after = hit(rule_name, key())
+            if retry_after:
+                return too_many_requests(jsonify({
+                    'status': 'error',
+                    'message': f'Too many requests. Please try again in {retry_after} seconds.',
+                }), retry_after)
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
@@ -1,9 +1,139 @@
-import math
 from flask import render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from mysql.connector import Error
 from db import get_db_connection
 from auth_utils import permission_required
+import bulk_approvals
+import catalog
+import jobs
+import pagination
+import search_index
+import site_data
+
+def _flash_bulk(result, label):
+    if result.approved_count:
+        counts = ', '.join(f"{action.title()}: {len(ids)}" for action, ids in result.applied.items() if ids)
+        flash(f'{result.approved_count} {label} change(s) approved ({counts}).', 'success')
+    if result.rejected:
+        flash(f'{len(result.rejected)} {label} change request(s) rejected.', 'warning')
+    if result.failures:
+        flash(f'{len(result.failures)} item(s) were left pending: {result.failure_summary()}', 'danger')
+
+def _search_condition(search, **columns):
+    if not search:
+        return "1 = 1", []
+    return search_index.filter_condition(search, **columns)
+
+def _pending_small_claims_ids(cursor, search):
+    condition, params = _search_condition(search, states=('sca.state_id', 's.name'))
+    cursor.execute(f"""
+        SELECT sca.id FROM small_claims_approvals sca
+        JOIN states s ON sca.state_id = s.id
+        WHERE sca.status = 'PENDING' AND {condition}
+        ORDER BY sca.id
+    """, params)
+    return [row['id'] for row in cursor.fetchall()]
+
+def _pending_statute_ids(cursor, search):
+    condition, params = _search_condition(search, states=('sa.state_id', 's.name'), issues=('sa.issue_id', 'i.name'))
+    cursor.execute(f"""
+        SELECT sa.id FROM statute_approvals sa
+        JOIN states s ON sa.state_id = s.id
+        JOIN issues i ON sa.issue_id = i.id
+        WHERE sa.status = 'PENDING' AND {condition}
+        ORDER BY sa.id
+    """, params)
+    return [row['id'] for row in cursor.fetchall()]
+
+# Queue name (job payload) -> (approval queue, pending-id lookup, label for messages)
+BULK_QUEUES = {
+    'small_claims': (bulk_approvals.SMALL_CLAIMS, _pending_small_claims_ids, 'small claims'),
+    'statutes': (bulk_approvals.STATUTES, _pending_statute_ids, 'statute'),
+}
+
+def _publish_approvals(queue_name, result):
+    pagination.counts.invalidate()
+    if result.approved_count:
+        if queue_name == 'statutes':
+            site_data.last_updated.invalidate()
+        catalog.publish()
+
+@jobs.handler('bulk_approval')
+def run_bulk_job(job, payload):
+    """
+    Approves or rejects every pending change matching a search ("Approve All Matching").
+    The whole selection is one transaction, as for a bulk action on ticked rows.
+    """
+    queue, pending_ids, label = BULK_QUEUES[payload['queue']]
+    job.set_result(queue=payload['queue'])
+    conn = get_db_connection()
+    if conn is None:
+        raise RuntimeError('Could not connect to the database.')
+    cursor = conn.cursor(dictionary=True)
+    try:
+        ids = pending_ids(cursor, payload['search'])
+        job.update(rows_total=len(ids))
+        if payload['action'] == 'approve':
+            result = bulk_approvals.approve(cursor, queue, ids)
+        else:
+            result = bulk_approvals.reject(cursor, queue, ids)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    _publish_approvals(payload['queue'], result)
+
+    done = result.approved_count + len(result.rejected)
+    message = f"{result.approved_count} {label} change(s) approved, {len(result.rejected)} rejected."
+    if result.failures:
+        message += f" {len(result.failures)} left pending: {result.failure_summary()}"
+    job.set_result(queue=payload['queue'], approved=result.approved_count, rejected=len(result.rejected),
+                   failed=len(result.failures))
+    job.update(rows_processed=done, rows_failed=len(result.failures), message=message)
+
+def _bulk_action(queue_name, list_endpoint):
+    """Bulk form handler: ticked rows are applied here, "all matching" runs as a background job."""
+    queue, pending_ids, label = BULK_QUEUES[queue_name]
+    action = request.form.get('action')
+    search = request.form.get('search', '')
+    if action not in ('approve', 'reject'):
+        flash('No approvals selected.', 'warning')
+        return redirect(url_for(list_endpoint, search=search))
+    if request.form.get('scope') == 'filter':
+        try:
+            job_id = jobs.submit('bulk_approval', {'queue': queue_name, 'action': action, 'search': search},
+                                 current_user.username)
+        except Error as e:
+            flash(f'Database Error: Could not queue the bulk {action}. {e}', 'danger')
+            return redirect(url_for(list_endpoint, search=search))
+        flash(f'Bulk {action} queued as job #{job_id}.', 'info')
+        return redirect(url_for('admin_job', job_id=job_id))
+
+    ids = request.form.getlist('ids', type=int)
+    if not ids:
+        flash('No approvals selected.', 'warning')
+        return redirect(url_for(list_endpoint, search=search))
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        # One transaction for the whole selection; failed items stay pending and are listed
+        if action == 'approve':
+            result = bulk_approvals.approve(cursor, queue, ids)
+        else:
+            result = bulk_approvals.reject(cursor, queue, ids)
+        conn.commit()
+        _publish_approvals(queue_name, result)
+        _flash_bulk(result, label)
+    except Error as e:
+        conn.rollback()
+        flash(f'Database Error during bulk {action}: {e}', 'danger')
+    finally:
+        cursor.close()
+        conn.close()
+
+    return redirect(url_for(list_endpoint, search=search))
 
 def register(app):
     # --- SMALL CLAIMS APPROVALS ---
@@ -14,43 +144,42 @@ def register(app):
             flash('Access denied', 'danger')
             return redirect(url_for('admin_dashboard'))
         
-        page = request.args.get('page', 1, type=int)
         search = request.args.get('search', '')
-        per_page = 10
-        offset = (page - 1) * per_page
+        conditions, params = ["sca.status = 'PENDING'"], []
+        if search:
+            condition, condition_params = search_index.filter_condition(search, states=('sca.state_id', 's.name'))
+            conditions.append(condition)
+            params.extend(condition_params)
         
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        count_sql = """
+        count_sql = f"""
             SELECT COUNT(*) as total 
             FROM small_claims_approvals sca 
             JOIN states s ON sca.state_id = s.id 
-            WHERE sca.status = 'PENDING' AND s.name LIKE %s
+            WHERE {' AND '.join(conditions)}
         """
-        search_param = f"%{search}%"
-        cursor.execute(count_sql, (search_param,))
-        total_records = cursor.fetchone()['total']
-        total_pages = math.ceil(total_records / per_page)
+        total = pagination.counts.get(cursor, count_sql, params)
         
-        sql = """
+        page = pagination.fetch_page(
+            cursor,
+            """
             SELECT sca.*, s.name as state_name 
             FROM small_claims_approvals sca 
             JOIN states s ON sca.state_id = s.id 
-            WHERE sca.status = 'PENDING' AND s.name LIKE %s 
-            ORDER BY sca.submitted_dt DESC 
-            LIMIT %s OFFSET %s
-        """
-        cursor.execute(sql, (search_param, per_page, offset))
-        approvals = cursor.fetchall()
+            """,
+            conditions, params,
+            order=[('sca.submitted_dt', 'submitted_dt'), ('sca.id', 'id')], per_page=10, descending=True,
+            after=request.args.get('after'), before=request.args.get('before'), total=total,
+        )
         
         cursor.close()
         conn.close()
         
         return render_template('admin/small_claims_approvals.html', 
-                               approvals=approvals, 
-                               page=page, 
-                               total_pages=total_pages, 
+                               approvals=page.items, 
+                               pagination=page, 
                                search=search)
 
     @app.route('/admin/approvals/small_claims/view/<int:approval_id>')
@@ -97,37 +226,19 @@ def register(app):
         cursor = conn.cursor(dictionary=True)
         
         try:
-            cursor.execute("SELECT * FROM small_claims_approvals WHERE id = %s", (approval_id,))
-            approval = cursor.fetchone()
-            
-            if not approval or approval['status'] != 'PENDING':
-                flash('Invalid approval request.', 'danger')
+            result = bulk_approvals.approve(cursor, bulk_approvals.SMALL_CLAIMS, [approval_id])
+            if not result.approved_count:
+                conn.rollback()
+                flash(f"Invalid approval request: {result.failures.get(approval_id, 'not found')}.", 'danger')
                 return redirect(url_for('admin_small_claims_approvals'))
-                
-            if approval['action_type'] == 'INSERT':
-                cursor.execute(
-                    """INSERT INTO small_claims (state_id, small_claims_cap, small_claims_info, updated_by, updated_dt) 
-                       VALUES (%s, %s, %s, %s, NOW())""",
-                    (approval['state_id'], approval['small_claims_cap'], approval['small_claims_info'], approval['submitted_by'])
-                )
-            
-            elif approval['action_type'] == 'UPDATE':
-                cursor.execute(
-                    """UPDATE small_claims 
-                       SET state_id=%s, small_claims_cap=%s, small_claims_info=%s, updated_by=%s, updated_dt=NOW() 
-                       WHERE id=%s""",
-                    (approval['state_id'], approval['small_claims_cap'], approval['small_claims_info'], approval['submitted_by'], approval['claim_id'])
-                )
-                
-            elif approval['action_type'] == 'DELETE':
-                cursor.execute("DELETE FROM small_claims WHERE id = %s", (approval['claim_id'],))
-                
-            cursor.execute("UPDATE small_claims_approvals SET status='APPROVED' WHERE id = %s", (approval_id,))
-            
             conn.commit()
-            flash(f"Change ({approval['action_type']}) approved successfully.", 'success')
+            pagination.counts.invalidate()
+            catalog.publish()
+            action_type = next(action for action, ids in result.applied.items() if ids)
+            flash(f"Change ({action_type}) approved successfully.", 'success')
             
         except Error as e:
+            conn.rollback()
             flash(f'Database Error during approval: {e}', 'danger')
         finally:
             cursor.close()
@@ -144,6 +255,7 @@ def register(app):
         try:
             cursor.execute("UPDATE small_claims_approvals SET status='REJECTED' WHERE id = %s", (approval_id,))
             conn.commit()
+            pagination.counts.invalidate()
             flash('Change request rejected.', 'warning')
         except Error as e:
             flash(f'Database Error: {e}', 'danger')
@@ -153,6 +265,12 @@ def register(app):
             
         return redirect(url_for('admin_small_claims_approvals'))
 
+    @app.route('/admin/approvals/small_claims/bulk', methods=['POST'])
+    @login_required
+    @permission_required('approvals', 'update')
+    def admin_small_claims_bulk():
+        return _bulk_action('small_claims', 'admin_small_claims_approvals')
+
     # --- STATUTE APPROVALS ---
     @app.route('/admin/approvals/statutes')
     @login_required
@@ -161,45 +279,44 @@ def register(app):
             flash('Access denied', 'danger')
             return redirect(url_for('admin_dashboard'))
         
-        page = request.args.get('page', 1, type=int)
         search = request.args.get('search', '')
-        per_page = 10
-        offset = (page - 1) * per_page
+        conditions, params = ["sa.status = 'PENDING'"], []
+        if search:
+            condition, condition_params = search_index.filter_condition(search, states=('sa.state_id', 's.name'), issues=('sa.issue_id', 'i.name'))
+            conditions.append(condition)
+            params.extend(condition_params)
         
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        count_sql = """
+        count_sql = f"""
             SELECT COUNT(*) as total 
             FROM statute_approvals sa 
             JOIN states s ON sa.state_id = s.id 
             JOIN issues i ON sa.issue_id = i.id
-            WHERE sa.status = 'PENDING' AND (s.name LIKE %s OR i.name LIKE %s)
+            WHERE {' AND '.join(conditions)}
         """
-        search_param = f"%{search}%"
-        cursor.execute(count_sql, (search_param, search_param))
-        total_records = cursor.fetchone()['total']
-        total_pages = math.ceil(total_records / per_page)
+        total = pagination.counts.get(cursor, count_sql, params)
         
-        sql = """
+        page = pagination.fetch_page(
+            cursor,
+            """
             SELECT sa.*, s.name as state_name, i.name as issue_name
             FROM statute_approvals sa 
             JOIN states s ON sa.state_id = s.id 
             JOIN issues i ON sa.issue_id = i.id
-            WHERE sa.status = 'PENDING' AND (s.name LIKE %s OR i.name LIKE %s) 
-            ORDER BY sa.submitted_dt DESC 
-            LIMIT %s OFFSET %s
-        """
-        cursor.execute(sql, (search_param, search_param, per_page, offset))
-        approvals = cursor.fetchall()
+            """,
+            conditions, params,
+            order=[('sa.submitted_dt', 'submitted_dt'), ('sa.id', 'id')], per_page=10, descending=True,
+            after=request.args.get('after'), before=request.args.get('before'), total=total,
+        )
         
         cursor.close()
         conn.close()
         
         return render_template('admin/statute_approvals.html', 
-                               approvals=approvals, 
-                               page=page, 
-                               total_pages=total_pages, 
+                               approvals=page.items, 
+                               pagination=page, 
                                search=search)
 
     @app.route('/admin/approvals/statutes/view/<int:approval_id>')
@@ -253,45 +370,20 @@ def register(app):
         cursor = conn.cursor(dictionary=True)
         
         try:
-            cursor.execute("SELECT * FROM statute_approvals WHERE id = %s", (approval_id,))
-            approval = cursor.fetchone()
-            
-            if not approval or approval['status'] != 'PENDING':
-                flash('Invalid approval request.', 'danger')
+            result = bulk_approvals.approve(cursor, bulk_approvals.STATUTES, [approval_id])
+            if not result.approved_count:
+                conn.rollback()
+                flash(f"Invalid approval request: {result.failures.get(approval_id, 'not found')}.", 'danger')
                 return redirect(url_for('admin_statutes_approvals'))
-            
-            if approval['action_type'] == 'INSERT':
-                cursor.execute("""
-                    INSERT INTO statutes (
-                        state_id, issue_id, issue_info, time_limit_type, time_limit_min, time_limit_max, duration,
-                        details, code_reference, official_source_url, other_source_url, conditions_exceptions, examples, tolling,
-                        updated_by, updated_dt
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                """, (approval['state_id'], approval['issue_id'], approval['issue_info'], approval['time_limit_type'], 
-                      approval['time_limit_min'], approval['time_limit_max'], approval['duration'], approval['details'], 
-                      approval['code_reference'], approval['official_source_url'], approval['other_source_url'], 
-                      approval['conditions_exceptions'], approval['examples'], approval['tolling'], approval['submitted_by']))
-            
-            elif approval['action_type'] == 'UPDATE':
-                cursor.execute("""
-                    UPDATE statutes SET 
-                        state_id=%s, issue_id=%s, issue_info=%s, time_limit_type=%s, time_limit_min=%s, time_limit_max=%s, duration=%s,
-                        details=%s, code_reference=%s, official_source_url=%s, other_source_url=%s, conditions_exceptions=%s, examples=%s, tolling=%s,
-                        updated_by=%s, updated_dt=NOW()
-                    WHERE id=%s
-                """, (approval['state_id'], approval['issue_id'], approval['issue_info'], approval['time_limit_type'], 
-                      approval['time_limit_min'], approval['time_limit_max'], approval['duration'], approval['details'], 
-                      approval['code_reference'], approval['official_source_url'], approval['other_source_url'], 
-                      approval['conditions_exceptions'], approval['examples'], approval['tolling'], approval['submitted_by'], approval['statute_id']))
-                
-            elif approval['action_type'] == 'DELETE':
-                cursor.execute("DELETE FROM statutes WHERE id = %s", (approval['statute_id'],))
-                
-            cursor.execute("UPDATE statute_approvals SET status='APPROVED' WHERE id = %s", (approval_id,))
             conn.commit()
-            flash(f"Statute change ({approval['action_type']}) approved successfully.", 'success')
+            pagination.counts.invalidate()
+            site_data.last_updated.invalidate()
+            catalog.publish()
+            action_type = next(action for action, ids in result.applied.items() if ids)
+            flash(f"Statute change ({action_type}) approved successfully.", 'success')
             
         except Error as e:
+            conn.rollback()
             flash(f'Database Error during approval: {e}', 'danger')
         finally:
             cursor.close()
@@ -308,6 +400,7 @@ def register(app):
         try:
             cursor.execute("UPDATE statute_approvals SET status='REJECTED' WHERE id = %s", (approval_id,))
             conn.commit()
+            pagination.counts.invalidate()
             flash('Statute change request rejected.', 'warning')
         except Error as e:
             flash(f'Database Error: {e}', 'danger')
@@ -315,4 +408,10 @@ def register(app):
             cursor.close()
             conn.close()
             
-        return redirect(url_for('admin_statutes_approvals'))
\ No newline at end of file
+        return redirect(url_for('admin_statutes_approvals'))
+
+    @app.route('/admin/approvals/statutes/bulk', methods=['POST'])
+    @login_required
+    @permission_required('approvals', 'update')
+    def admin_statutes_bulk():
+        return _bulk_action('statutes', 'admin_statutes_approvals')
\ No newline at end of file
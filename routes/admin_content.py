@@ -1,10 +1,51 @@
-import math
-import pandas as pd
-from flask import render_template, request, redirect, url_for, flash, current_app
+import os
+import uuid
+from flask import render_template, request, redirect, url_for, flash, current_app, send_file
 from flask_login import login_required, current_user
 from mysql.connector import Error
 from db import get_db_connection
 from auth_utils import permission_required
+import catalog
+import exports
+import jobs
+import pagination
+import search_index
+import statute_upload
+
+# Distinct reports shown under each page on the reports list
+REPORTS_PER_PAGE_CONTEXT = 10
+
+STATUTES_FROM = """
+    statutes st
+    JOIN states s ON st.state_id = s.id
+    JOIN issues i ON st.issue_id = i.id
+"""
+
+def _statute_filters(search, state_filter, issue_filter):
+    """WHERE conditions and params shared by the statutes list and its export."""
+    conditions = []
+    params = []
+    if search:
+        condition, condition_params = search_index.filter_condition(search, states=('st.state_id', 's.name'), issues=('st.issue_id', 'i.name'))
+        conditions.append(condition)
+        params.extend(condition_params)
+    if state_filter:
+        conditions.append("st.state_id = %s")
+        params.append(state_filter)
+    if issue_filter:
+        conditions.append("st.issue_id = %s")
+        params.append(issue_filter)
+    return conditions, params
+
+def _report_filters(status_filter):
+    """WHERE conditions for the reports list and its export (status: all, pending, valid, invalid)."""
+    if status_filter == 'pending':
+        return ["is_valid IS NULL"], []
+    if status_filter == 'valid':
+        return ["is_valid = 1"], []
+    if status_filter == 'invalid':
+        return ["is_valid = 0"], []
+    return [], []
 
 def register(app):
     # --- ISSUES ---
@@ -14,23 +55,24 @@ def register(app):
         if not current_user.can('issues', 'read'):
             flash('Access denied', 'danger')
             return redirect(url_for('admin_dashboard'))
-        page = request.args.get('page', 1, type=int)
         search = request.args.get('search', '')
-        per_page = 10
-        offset = (page - 1) * per_page
+        conditions, params = [], []
+        if search:
+            condition, condition_params = search_index.filter_condition(search, issues=('id', 'name'))
+            conditions.append(condition)
+            params.extend(condition_params)
+        where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
-        count_query = "SELECT COUNT(*) as total FROM issues WHERE name LIKE %s"
-        search_param = f"%{search}%"
-        cursor.execute(count_query, (search_param,))
-        total_records = cursor.fetchone()['total']
-        total_pages = math.ceil(total_records / per_page)
-        query = "SELECT * FROM issues WHERE name LIKE %s ORDER BY name ASC LIMIT %s OFFSET %s"
-        cursor.execute(query, (search_param, per_page, offset))
-        issues = cursor.fetchall()
+        total = pagination.counts.get(cursor, f"SELECT COUNT(*) as total FROM issues {where_clause}", params)
+        page = pagination.fetch_page(
+            cursor, "SELECT * FROM issues", conditions, params,
+            order=[('name', 'name'), ('id', 'id')], per_page=10,
+            after=request.args.get('after'), before=request.args.get('before'), total=total,
+        )
         cursor.close()
         conn.close()
-        return render_template('admin/issues.html', issues=issues, page=page, total_pages=total_pages, search=search)
+        return render_template('admin/issues.html', issues=page.items, pagination=page, search=search)
 
     @app.route('/admin/issues/add', methods=['GET', 'POST'])
     @login_required
@@ -60,6 +102,8 @@ def register(app):
                     (name, slug, description, issue_group, current_user.username)
                 )
                 conn.commit()
+                # Not on the public site until it has statutes, but the search index picks it up on publish
+                catalog.publish()
                 flash('Issue category added.', 'success')
                 return redirect(url_for('admin_issues'))
             except Error as e:
@@ -93,6 +137,7 @@ def register(app):
                     (name, slug, description, issue_group, current_user.username, issue_id)
                 )
                 conn.commit()
+                catalog.publish()
                 flash('Issue updated successfully.', 'success')
                 return redirect(url_for('admin_issues'))
             except Error as e:
@@ -115,6 +160,7 @@ def register(app):
         try:
             cursor.execute("DELETE FROM issues WHERE id = %s", (issue_id,))
             conn.commit()
+            catalog.publish()
             flash('Issue deleted.', 'success')
         except Error as e:
             flash(f'Cannot delete issue: It may be linked to existing statutes.', 'danger')
@@ -130,23 +176,24 @@ def register(app):
         if not current_user.can('small_claims', 'read'):
             flash('Access denied', 'danger')
             return redirect(url_for('admin_dashboard'))
-        page = request.args.get('page', 1, type=int)
         search = request.args.get('search', '')
-        per_page = 10
-        offset = (page - 1) * per_page
+        conditions, params = [], []
+        if search:
+            condition, condition_params = search_index.filter_condition(search, states=('sc.state_id', 's.name'))
+            conditions.append(condition)
+            params.extend(condition_params)
+        where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
-        count_sql = "SELECT COUNT(*) as total FROM small_claims sc JOIN states s ON sc.state_id = s.id WHERE s.name LIKE %s"
-        search_param = f"%{search}%"
-        cursor.execute(count_sql, (search_param,))
-        total_records = cursor.fetchone()['total']
-        total_pages = math.ceil(total_records / per_page)
-        sql = "SELECT sc.*, s.name as state_name FROM small_claims sc JOIN states s ON sc.state_id = s.id WHERE s.name LIKE %s ORDER BY s.name ASC LIMIT %s OFFSET %s"
-        cursor.execute(sql, (search_param, per_page, offset))
-        claims = cursor.fetchall()
+        total = pagination.counts.get(cursor, f"SELECT COUNT(*) as total FROM small_claims sc JOIN states s ON sc.state_id = s.id {where_clause}", params)
+        page = pagination.fetch_page(
+            cursor, "SELECT sc.*, s.name as state_name FROM small_claims sc JOIN states s ON sc.state_id = s.id",
+            conditions, params, order=[('s.name', 'state_name'), ('sc.id', 'id')], per_page=10,
+            after=request.args.get('after'), before=request.args.get('before'), total=total,
+        )
         cursor.close()
         conn.close()
-        return render_template('admin/small_claims.html', claims=claims, page=page, total_pages=total_pages, search=search)
+        return render_template('admin/small_claims.html', claims=page.items, pagination=page, search=search)
 
     @app.route('/admin/small_claims/add', methods=['GET', 'POST'])
     @login_required
@@ -258,14 +305,10 @@ def register(app):
             flash('Access denied', 'danger')
             return redirect(url_for('admin_dashboard'))
         
-        page = request.args.get('page', 1, type=int)
         search = request.args.get('search', '')
         state_filter = request.args.get('state_filter', '')
         issue_filter = request.args.get('issue_filter', '')
         
-        per_page = 15
-        offset = (page - 1) * per_page
-        
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
@@ -274,58 +317,51 @@ def register(app):
         cursor.execute("SELECT id, name FROM issues ORDER BY name ASC")
         all_issues = cursor.fetchall()
         
-        conditions = []
-        params = []
-        
-        if search:
-            conditions.append("(s.name LIKE %s OR i.name LIKE %s)")
-            params.extend([f"%{search}%", f"%{search}%"])
-        if state_filter:
-            conditions.append("st.state_id = %s")
-            params.append(state_filter)
-        if issue_filter:
-            conditions.append("st.issue_id = %s")
-            params.append(issue_filter)
-            
+        conditions, params = _statute_filters(search, state_filter, issue_filter)
         where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
         
-        count_sql = f"""
-            SELECT COUNT(*) as total 
-            FROM statutes st
-            JOIN states s ON st.state_id = s.id
-            JOIN issues i ON st.issue_id = i.id
-            {where_clause}
-        """
-        cursor.execute(count_sql, tuple(params))
-        total_records = cursor.fetchone()['total']
-        total_pages = math.ceil(total_records / per_page)
+        count_sql = f"SELECT COUNT(*) as total FROM {STATUTES_FROM} {where_clause}"
+        total = pagination.counts.get(cursor, count_sql, params)
         
-        sql = f"""
-            SELECT st.*, s.name as state_name, i.name as issue_name
-            FROM statutes st
-            JOIN states s ON st.state_id = s.id
-            JOIN issues i ON st.issue_id = i.id
-            {where_clause}
-            ORDER BY s.name ASC, i.name ASC
-            LIMIT %s OFFSET %s
-        """
-        params.extend([per_page, offset])
-        cursor.execute(sql, tuple(params))
-        statutes = cursor.fetchall()
+        # Seek on (state, issue, id) so deep pages cost the same as the first
+        page = pagination.fetch_page(
+            cursor,
+            f"SELECT st.*, s.name as state_name, i.name as issue_name FROM {STATUTES_FROM}",
+            conditions, params,
+            order=[('s.name', 'state_name'), ('i.name', 'issue_name'), ('st.id', 'id')], per_page=15,
+            after=request.args.get('after'), before=request.args.get('before'), total=total,
+        )
         
         cursor.close()
         conn.close()
         
         return render_template('admin/statutes.html', 
-                               statutes=statutes, 
-                               page=page, 
-                               total_pages=total_pages, 
+                               statutes=page.items, 
+                               pagination=page, 
                                search=search,
                                state_filter=state_filter,
                                issue_filter=issue_filter,
                                all_states=all_states,
                                all_issues=all_issues)
 
+    @app.route('/admin/statutes/export')
+    @login_required
+    def admin_statutes_export():
+        if not current_user.can('statutes', 'read'):
+            flash('Access denied', 'danger')
+            return redirect(url_for('admin_dashboard'))
+        
+        conditions, params = _statute_filters(request.args.get('search', ''),
+                                              request.args.get('state_filter', ''),
+                                              request.args.get('issue_filter', ''))
+        try:
+            # Upload layout, so the file can be edited and uploaded again
+            return exports.export_response(request.args.get('format', 'csv'), 'statutes', exports.STATUTE_COLUMNS,
+                                           STATUTES_FROM, conditions, params, 's.name, i.name, st.id')
+        except Error as e:
+            flash(f'Database Error: {e}', 'danger')
+            return redirect(url_for('admin_statutes', **request.args))
+
     @app.route('/admin/statutes/upload', methods=['POST'])
     @login_required
     @permission_required('statutes', 'create')
@@ -336,139 +372,41 @@ def register(app):
             return redirect(url_for('admin_statutes'))
 
         try:
-            df = pd.read_excel(file)
-            df.columns = [c.lower().strip() for c in df.columns]
-        except Exception as e:
-            flash(f'Error reading file: {e}', 'danger')
+            extension = statute_upload.file_extension(file.filename)
+        except statute_upload.UploadError as e:
+            flash(str(e), 'danger')
             return redirect(url_for('admin_statutes'))
 
-        upload_limit = current_app.config.get('UPLOAD_ROW_LIMIT', 50)
-        if len(df) > upload_limit:
-            flash(f'Upload failed: Exceeds row limit of {upload_limit}.', 'danger')
+        # Parsing and validation run in a background job; the request only saves the file
+        upload_dir = current_app.config['JOB_UPLOAD_DIR']
+        os.makedirs(upload_dir, exist_ok=True)
+        path = os.path.join(upload_dir, f'{uuid.uuid4().hex}{extension}')
+        file.save(path)
+        try:
+            job_id = jobs.submit('statute_upload', {
+                'path': path,
+                'filename': file.filename,
+                'username': current_user.username,
+                'row_limit': current_app.config['UPLOAD_ROW_LIMIT'],
+                'chunk_size': current_app.config['UPLOAD_CHUNK_SIZE'],
+            }, current_user.username)
+        except Error as e:
+            os.remove(path)
+            flash(f'Upload failed, no rows were queued. Database Error: {e}', 'danger')
             return redirect(url_for('admin_statutes'))
 
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        # Fetch Mappings
-        cursor.execute("SELECT id, name FROM states")
-        state_map = {row['name'].lower(): row['id'] for row in cursor.fetchall()}
-        
-        cursor.execute("SELECT id, name FROM issues")
-        issue_map = {row['name'].lower(): row['id'] for row in cursor.fetchall()}
-
-        new_count, updated_count, failed_count = 0, 0, 0
-        failed_rows = []
-
-        valid_types = ['exact', 'range', 'conditional']
-        valid_durations = ['years', 'months', 'days']
-
-        for index, row in df.iterrows():
-            state_name = str(row.get('state', '')).strip()
-            issue_name = str(row.get('issue', '')).strip()
-            
-            # Validation 1: Mappings
-            state_id = state_map.get(state_name.lower())
-            issue_id = issue_map.get(issue_name.lower())
-            
-            if not state_id or not issue_id:
-                failed_count += 1
-                failed_rows.append(f"{state_name} / {issue_name} (Invalid State or Issue)")
-                continue
-
-            # Validation 2: Types & Durations
-            time_limit_type = str(row.get('time limit type', 'exact')).strip().lower()
-            duration = str(row.get('duration', 'years')).strip().lower()
-
-            if time_limit_type not in valid_types:
-                failed_count += 1
-                failed_rows.append(f"{state_name} / {issue_name} (Invalid Type: {time_limit_type})")
-                continue
-            if duration not in valid_durations:
-                failed_count += 1
-                failed_rows.append(f"{state_name} / {issue_name} (Invalid Duration: {duration})")
-                continue
-
-            # Validation 3: Logic Checks
-            min_time = row.get('min time')
-            max_time = row.get('max time')
-            
-            # Ensure numeric safety
-            try:
-                min_val = int(float(min_time)) if pd.notna(min_time) else None
-                max_val = int(float(max_time)) if pd.notna(max_time) else None
-            except (ValueError, TypeError):
-                failed_count += 1
-                failed_rows.append(f"{state_name} / {issue_name} (Numeric Error)")
-                continue
+        flash(f'Upload queued as job #{job_id}.', 'info')
+        return redirect(url_for('admin_job', job_id=job_id))
 
-            if time_limit_type == 'exact' and max_val is not None:
-                failed_count += 1
-                failed_rows.append(f"{state_name} / {issue_name} (Exact type cannot have Max Time)")
-                continue
-            
-            if time_limit_type in ['range', 'conditional']:
-                if min_val is None or max_val is None:
-                    failed_count += 1
-                    failed_rows.append(f"{state_name} / {issue_name} (Range/Conditional needs both Min and Max)")
-                    continue
-
-            # Handle 'Exact' logic for DB storage (Min is used as primary value usually, or handle based on schema preference)
-            # If exact, usually min_time holds the value, max can be same or null. 
-            # Logic in add_statute form sets both to same value. Let's mirror that for consistency if needed,
-            # or strictly follow schema. Schema has both.
-            if time_limit_type == 'exact':
-                # If exact, ensure min_val is set
-                if min_val is None: 
-                    failed_count += 1
-                    failed_rows.append(f"{state_name} / {issue_name} (Exact requires Min Time)")
-                    continue
-                max_val = min_val # Normalize for DB if schema expects it, or leave None if allowed.
-                                  # Current manual add sets both. Let's set both.
-
-            # Check Existing
-            cursor.execute("SELECT id FROM statutes WHERE state_id = %s AND issue_id = %s", (state_id, issue_id))
-            existing = cursor.fetchone()
-            
-            action_type = 'UPDATE' if existing else 'INSERT'
-            statute_id = existing['id'] if existing else None
-
-            # Insert Approval
-            try:
-                sql = """
-                    INSERT INTO statute_approvals (
-                        statute_id, state_id, issue_id, issue_info, time_limit_type, 
-                        time_limit_min, time_limit_max, duration, details, code_reference, 
-                        official_source_url, other_source_url, conditions_exceptions, 
-                        examples, tolling, action_type, status, submitted_by
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'PENDING', %s)
-                """
-                params = (
-                    statute_id, state_id, issue_id, 
-                    str(row.get('issue info', '')), time_limit_type, min_val, max_val, duration,
-                    str(row.get('details', '')), str(row.get('code reference', '')),
-                    str(row.get('official url', '')), str(row.get('other url', '')),
-                    str(row.get('exceptions', '')), str(row.get('examples', '')),
-                    str(row.get('tolling', '')), action_type, current_user.username
-                )
-                cursor.execute(sql, params)
-                
-                if action_type == 'UPDATE': updated_count += 1
-                else: new_count += 1
-                
-            except Error as e:
-                failed_count += 1
-                failed_rows.append(f"{state_name} / {issue_name} (DB Error: {e})")
-
-        conn.commit()
-        cursor.close()
-        conn.close()
-
-        flash(f"Upload Complete. New: {new_count}, Updated: {updated_count}, Failed: {failed_count}", 'info')
-        if failed_rows:
-            flash(f"Failed Rows: {', '.join(failed_rows[:10])}...", 'warning')
-
-        return redirect(url_for('admin_statutes'))
+    @app.route('/admin/statutes/upload/report/<token>')
+    @login_required
+    @permission_required('statutes', 'create')
+    def admin_statutes_upload_report(token):
+        path = statute_upload.report_path(current_app.config['UPLOAD_REPORT_DIR'], token)
+        if not path:
+            flash('Report not found or expired.', 'danger')
+            return redirect(url_for('admin_statutes'))
+        return send_file(path, mimetype='text/csv', as_attachment=True, download_name='statute_upload_report.csv')
 
     @app.route('/admin/statutes/add', methods=['GET', 'POST'])
     @login_required
@@ -642,43 +580,74 @@ def register(app):
             flash('Access denied', 'danger')
             return redirect(url_for('admin_dashboard'))
             
-        page = request.args.get('page', 1, type=int)
         status_filter = request.args.get('status', 'all') # all, pending, valid, invalid
         
-        per_page = 20
-        offset = (page - 1) * per_page
-        
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        conditions = []
-        params = []
-        
-        if status_filter == 'pending':
-            conditions.append("is_valid IS NULL")
-        elif status_filter == 'valid':
-            conditions.append("is_valid = 1")
-        elif status_filter == 'invalid':
-            conditions.append("is_valid = 0")
-            
+        conditions, params = _report_filters(status_filter)
         where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
         
-        # Count
-        count_sql = f"SELECT COUNT(*) as total FROM issue_reports {where_clause}"
-        cursor.execute(count_sql, tuple(params))
-        total_records = cursor.fetchone()['total']
-        total_pages = math.ceil(total_records / per_page)
+        # Count (cached) -- one list entry per reported page
+        count_sql = f"SELECT COUNT(DISTINCT COALESCE(page_context, '')) as total FROM issue_reports {where_clause}"
+        total = pagination.counts.get(cursor, count_sql, params)
+        
+        # Fetch pages, most recently reported first
+        pages_sql = f"""
+            SELECT * FROM (
+                SELECT COALESCE(page_context, '') AS page, COUNT(*) AS report_count,
+                       SUM(occurrences) AS occurrences, SUM(is_valid IS NULL) AS pending_count,
+                       MAX(last_reported_at) AS last_reported_at
+                FROM issue_reports {where_clause}
+                GROUP BY page
+            ) AS reported_pages
+        """
+        page = pagination.fetch_page(
+            cursor, pages_sql, [], params,
+            order=[('last_reported_at', 'last_reported_at'), ('page', 'page')], per_page=20, descending=True,
+            after=request.args.get('after'), before=request.args.get('before'), total=total,
+        )
         
-        # Fetch
-        sql = f"SELECT * FROM issue_reports {where_clause} ORDER BY created_at DESC LIMIT %s OFFSET %s"
-        params.extend([per_page, offset])
-        cursor.execute(sql, tuple(params))
-        reports = cursor.fetchall()
+        # The most-reported distinct reports of each page on this list page
+        reports_by_page = {}
+        if page.items:
+            page_keys = [p['page'] for p in page.items]
+            placeholders = ', '.join(['%s'] * len(page_keys))
+            page_conditions = conditions + [f"COALESCE(page_context, '') IN ({placeholders})"]
+            cursor.execute(f"""
+                SELECT * FROM (
+                    SELECT issue_reports.*, COALESCE(page_context, '') AS page,
+                           ROW_NUMBER() OVER (PARTITION BY COALESCE(page_context, '')
+                                              ORDER BY occurrences DESC, last_reported_at DESC) AS page_rank
+                    FROM issue_reports WHERE {" AND ".join(page_conditions)}
+                ) AS ranked
+                WHERE page_rank <= %s
+                ORDER BY page, page_rank
+            """, tuple(params + page_keys) + (REPORTS_PER_PAGE_CONTEXT,))
+            for report in cursor.fetchall():
+                reports_by_page.setdefault(report['page'], []).append(report)
         
         cursor.close()
         conn.close()
         
-        return render_template('admin/reports.html', reports=reports, page=page, total_pages=total_pages, status_filter=status_filter)
+        return render_template('admin/reports.html', pages=page.items, reports_by_page=reports_by_page,
+                               pagination=page, status_filter=status_filter)
+
+    @app.route('/admin/reports/export')
+    @login_required
+    def admin_reports_export():
+        if not current_user.can('statutes', 'read'):
+            flash('Access denied', 'danger')
+            return redirect(url_for('admin_dashboard'))
+        
+        # One row per distinct report, not grouped by page like the list
+        conditions, params = _report_filters(request.args.get('status', 'all'))
+        try:
+            return exports.export_response(request.args.get('format', 'csv'), 'issue-reports', exports.REPORT_COLUMNS,
+                                           'issue_reports', conditions, params, 'last_reported_at DESC, id DESC')
+        except Error as e:
+            flash(f'Database Error: {e}', 'danger')
+            return redirect(url_for('admin_reports', **request.args))
 
     @app.route('/admin/reports/validate/<int:report_id>/<int:is_valid>')
     @login_required
@@ -694,6 +663,7 @@ def register(app):
             val = 1 if is_valid else 0
             cursor.execute("UPDATE issue_reports SET is_valid = %s WHERE id = %s", (val, report_id))
             conn.commit()
+            pagination.counts.invalidate()
             status_msg = "marked as Valid" if val else "marked as Invalid"
             flash(f'Report {status_msg}.', 'success')
         except Error as e:
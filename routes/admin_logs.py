@@ -1,7 +1,41 @@
-import math
-from flask import render_template, request, redirect, url_for, flash
+import datetime
+from flask import render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_required, current_user
+from mysql.connector import Error
 from db import get_db_connection
+import exports
+import log_partitions
+import login_audit
+import pagination
+
+def _login_log_filters(search_username, filter_status, range_start, range_end):
+    """WHERE conditions and params shared by the login history list and its export."""
+    conditions = []
+    params = []
+    
+    if search_username:
+        # A prefix match (opt-in) lets the (username_attempted, login_dt) index apply
+        conditions.append("username_attempted LIKE %s")
+        if current_app.config['LOGIN_LOG_USERNAME_PREFIX_SEARCH']:
+            params.append(f"{search_username}%")
+        else:
+            params.append(f"%{search_username}%")
+    
+    if filter_status:
+        conditions.append("status = %s")
+        params.append(filter_status)
+        
+    # Compare raw timestamps (end date inclusive) so login_dt stays indexable
+    # and MySQL prunes the monthly partitions outside the range
+    if range_start:
+        conditions.append("login_dt >= %s")
+        params.append(range_start)
+        
+    if range_end:
+        conditions.append("login_dt < %s")
+        params.append(range_end)
+    
+    return conditions, params
 
 def register(app):
     @app.route('/admin/logs/login')
@@ -12,67 +46,74 @@ def register(app):
             flash('Access denied', 'danger')
             return redirect(url_for('admin_dashboard'))
             
-        page = request.args.get('page', 1, type=int)
         search_username = request.args.get('username', '')
         filter_status = request.args.get('status', '')
         # Date Range parameters
         start_date = request.args.get('start_date', '')
         end_date = request.args.get('end_date', '')
         
-        per_page = 20
-        offset = (page - 1) * per_page
-        
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
         # Build Query
-        conditions = []
-        params = []
-        
-        if search_username:
-            conditions.append("username_attempted LIKE %s")
-            params.append(f"%{search_username}%")
-        
-        if filter_status:
-            conditions.append("status = %s")
-            params.append(filter_status)
-            
-        # Date Range Logic
-        if start_date:
-            conditions.append("DATE(login_dt) >= %s")
-            params.append(start_date)
-            
-        if end_date:
-            conditions.append("DATE(login_dt) <= %s")
-            params.append(end_date)
-            
+        range_start, range_end = login_audit.date_range(start_date, end_date)
+        conditions, params = _login_log_filters(search_username, filter_status, range_start, range_end)
         where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
         
-        # Count Total
+        # Count Total (cached; the unfiltered count is the expensive one)
         count_sql = f"SELECT COUNT(*) as total FROM login_logs {where_clause}"
-        cursor.execute(count_sql, tuple(params))
-        total_records = cursor.fetchone()['total']
-        total_pages = math.ceil(total_records / per_page)
+        total = pagination.counts.get(cursor, count_sql, params)
+        
+        # Fetch Logs, newest first, seeking on (login_dt, id)
+        page = pagination.fetch_page(
+            cursor, "SELECT * FROM login_logs", conditions, params,
+            order=[('login_dt', 'login_dt'), ('id', 'id')], per_page=20, descending=True,
+            after=request.args.get('after'), before=request.args.get('before'), total=total,
+        )
         
-        # Fetch Logs
-        sql = f"""
-            SELECT * FROM login_logs 
-            {where_clause} 
-            ORDER BY login_dt DESC 
-            LIMIT %s OFFSET %s
-        """
-        params.extend([per_page, offset])
-        cursor.execute(sql, tuple(params))
-        logs = cursor.fetchall()
+        # Trends and brute-force summary come from the hourly rollup, not the raw log.
+        # Without a date filter: the last 30 days for the chart, the last 24 hours for the summary.
+        now = datetime.datetime.now()
+        trend_end = range_end or now
+        trend_start = range_start or trend_end - datetime.timedelta(days=30)
+        summary_start = range_start or now - datetime.timedelta(hours=24)
+        trend = login_audit.trend(cursor, trend_start, trend_end, current_app.config['LOGIN_TREND_MAX_DAYS'])
+        failing_ips = login_audit.top_failures(cursor, summary_start, trend_end, 'ip_address')
+        targeted_users = login_audit.top_failures(cursor, summary_start, trend_end, 'username')
         
         cursor.close()
         conn.close()
         
         return render_template('admin/login_history.html', 
-                               logs=logs, 
-                               page=page, 
-                               total_pages=total_pages,
+                               archived_months=log_partitions.archived_months(
+                                   current_app.config['LOGIN_LOG_ARCHIVE_DIR'], range_start, range_end),
+                               trend=trend,
+                               trend_max=max([p['successes'] + p['failures'] for p in trend] + [1]),
+                               failing_ips=failing_ips,
+                               targeted_users=targeted_users,
+                               summary_window='selected range' if range_start else 'last 24 hours',
+                               brute_force_threshold=current_app.config['LOGIN_BRUTE_FORCE_THRESHOLD'],
+                               logs=page.items, 
+                               pagination=page,
                                search_username=search_username,
                                filter_status=filter_status,
                                start_date=start_date,
                                end_date=end_date)
+
+    @app.route('/admin/logs/login/export')
+    @login_required
+    def admin_login_logs_export():
+        if not current_user.can('logs', 'read'):
+            flash('Access denied', 'danger')
+            return redirect(url_for('admin_dashboard'))
+        
+        range_start, range_end = login_audit.date_range(request.args.get('start_date', ''),
+                                                        request.args.get('end_date', ''))
+        conditions, params = _login_log_filters(request.args.get('username', ''), request.args.get('status', ''),
+                                                range_start, range_end)
+        try:
+            return exports.export_response(request.args.get('format', 'csv'), 'login-history', exports.LOGIN_LOG_COLUMNS,
+                                           'login_logs', conditions, params, 'login_dt DESC, id DESC')
+        except Error as e:
+            flash(f'Database Error: {e}', 'danger')
+            return redirect(url_for('admin_login_logs', **request.args))
@@ -1,10 +1,16 @@
 import json
-from flask import render_template, request, redirect, url_for, flash, current_app
+from flask import render_template, request, redirect, url_for, flash, current_app, jsonify
 from flask_login import login_required, current_user
 from werkzeug.security import generate_password_hash
 from mysql.connector import Error
-from db import get_db_connection
-from auth_utils import permission_required
+from db import get_db_connection, get_pool
+from auth_utils import permission_required, RESOURCES, ACTIONS
+import auth_utils
+import jobs
+import issue_reports
+import login_audit
+import compression
+import rate_limit
 
 def register(app):
     @app.route('/admin')
@@ -23,15 +29,58 @@ def register(app):
             
         if request.method == 'POST':
             try:
-                limit = int(request.form.get('upload_limit', 50))
+                limit = int(request.form.get('upload_limit', current_app.config['UPLOAD_ROW_LIMIT']))
                 current_app.config['UPLOAD_ROW_LIMIT'] = limit
                 flash('Settings updated successfully.', 'success')
             except ValueError:
                 flash('Invalid input for limit.', 'danger')
         
-        current_limit = current_app.config.get('UPLOAD_ROW_LIMIT', 50)
+        current_limit = current_app.config['UPLOAD_ROW_LIMIT']
         return render_template('admin/settings.html', upload_limit=current_limit)
 
+    @app.route('/admin/settings/stats')
+    @login_required
+    def admin_runtime_stats():
+        # Per-worker runtime counters for operators (JSON so it can be scraped)
+        if current_user.role_name != 'Administrator':
+            return jsonify({'error': 'Access denied'}), 403
+        return jsonify({
+            'db_pool': get_pool().stats(),
+            'login_audit': login_audit.writer.stats(),
+            'issue_reports': issue_reports.writer.stats(),
+            'rate_limit': rate_limit.limiter.stats(),
+            'user_cache': auth_utils.user_cache.stats(),
+            'compression': compression.compressor.stats(),
+        })
+
+    # --- BACKGROUND JOBS ---
+    def _visible_job(job_id):
+        job = jobs.get_job(job_id)
+        if job and (job['submitted_by'] == current_user.username or current_user.role_name == 'Administrator'):
+            return job
+        return None
+
+    @app.route('/admin/jobs/<int:job_id>')
+    @login_required
+    def admin_job(job_id):
+        job = _visible_job(job_id)
+        if not job:
+            flash('Job not found.', 'danger')
+            return redirect(url_for('admin_dashboard'))
+        return render_template('admin/job.html', job=job)
+
+    @app.route('/admin/jobs/<int:job_id>/status')
+    @login_required
+    def admin_job_status(job_id):
+        # Polled by admin/job.html while the job runs
+        job = _visible_job(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        token = job['result'].get('report_token')
+        if token:
+            job['report_url'] = url_for('admin_statutes_upload_report', token=token)
+        return jsonify(job)
+
     # --- USERS ---
     @app.route('/admin/users')
     @login_required
@@ -85,6 +134,7 @@ def register(app):
         cursor = conn.cursor()
         cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
         conn.commit()
+        auth_utils.invalidate_user(user_id)
         cursor.close()
         conn.close()
         flash('User deleted', 'success')
@@ -116,17 +166,14 @@ def register(app):
         cursor.execute("SELECT id FROM roles")
         all_roles = cursor.fetchall()
         
-        resources = ['users', 'roles', 'issues', 'small_claims', 'statutes', 'approvals', 'logs']
-        actions = ['create', 'read', 'update', 'delete']
-        
         try:
             for role in all_roles:
                 role_id = role['id']
                 new_perms = {}
                 
-                for res in resources:
+                for res in RESOURCES:
                     new_perms[res] = {}
-                    for act in actions:
+                    for act in ACTIONS:
                         # Key format matches template: perm_{role.id}_{res_key}_{action}
                         key = f"perm_{role_id}_{res}_{act}"
                         new_perms[res][act] = 1 if key in request.form else 0
@@ -139,6 +186,7 @@ def register(app):
                 )
             
             conn.commit()
+            auth_utils.invalidate_role()
             flash('All role permissions updated successfully.', 'success')
             
         except Error as e:
@@ -154,13 +202,10 @@ def register(app):
     @login_required
     @permission_required('roles', 'update')
     def update_role(role_id):
-        # Added 'logs' to resources list to support the new UI option
-        resources = ['users', 'roles', 'issues', 'small_claims', 'statutes', 'approvals', 'logs']
-        actions = ['create', 'read', 'update', 'delete']
         new_perms = {}
-        for res in resources:
+        for res in RESOURCES:
             new_perms[res] = {}
-            for act in actions:
+            for act in ACTIONS:
                 key = f"perm_{res}_{act}"
                 new_perms[res][act] = 1 if key in request.form else 0
         perm_json = json.dumps(new_perms)
@@ -171,6 +216,7 @@ def register(app):
             (perm_json, current_user.username, role_id)
         )
         conn.commit()
+        auth_utils.invalidate_role(role_id)
         cursor.close()
         conn.close()
         flash('Role permissions updated', 'success')
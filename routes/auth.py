@@ -1,8 +1,10 @@
-from flask import render_template, redirect, url_for, request, flash
+from flask import render_template, redirect, url_for, request, flash, make_response
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import check_password_hash
 from db import get_db_connection
 from auth_utils import load_user_from_db
+import login_audit
+import rate_limit
 
 def register(app):
     @app.route('/login', methods=['GET', 'POST'])
@@ -14,6 +16,13 @@ def register(app):
             username = request.form['username']
             password = request.form['password']
             
+            # Throttle before touching the database or hashing the password
+            retry_after = rate_limit.hit('login_ip', request.remote_addr) or \
+                rate_limit.hit('login_user', username.strip().lower())
+            if retry_after:
+                flash(f'Too many login attempts. Please try again in {retry_after} seconds.', 'danger')
+                return rate_limit.too_many_requests(make_response(render_template('admin/login.html')), retry_after)
+            
             conn = get_db_connection()
             cursor = conn.cursor(dictionary=True)
             
@@ -27,11 +36,7 @@ def register(app):
             
             if user_data and check_password_hash(user_data['password_hash'], password):
                 # Log Success
-                cursor.execute(
-                    "INSERT INTO login_logs (username_attempted, status, ip_address, user_agent) VALUES (%s, 'SUCCESS', %s, %s)",
-                    (username, ip_addr, user_agent)
-                )
-                conn.commit()
+                login_audit.record(username, 'SUCCESS', ip_addr, user_agent)
                 
                 # Perform Login
                 user_obj = load_user_from_db(user_data['id'])
@@ -42,11 +47,7 @@ def register(app):
                 return redirect(url_for('admin_dashboard'))
             else:
                 # Log Failure
-                cursor.execute(
-                    "INSERT INTO login_logs (username_attempted, status, ip_address, user_agent) VALUES (%s, 'FAILURE', %s, %s)",
-                    (username, ip_addr, user_agent)
-                )
-                conn.commit()
+                login_audit.record(username, 'FAILURE', ip_addr, user_agent)
                 
                 cursor.close()
                 conn.close()
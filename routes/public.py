@@ -1,90 +1,223 @@
-from flask import render_template, request, jsonify, Response, abort
-from mysql.connector import Error
-from db import get_db_connection
+import numpy as np
+from flask import render_template, stream_template, request, jsonify, Response, abort, make_response, url_for
+from catalog import get_catalog
+from http_cache import make_etag, page_day, latest, not_modified, add_validators
+from compression import cached_response
+import sitemaps
+import issue_reports
+import rate_limit
+import search_index
+import typeahead
+import deadlines
 
 def register(app):
     @app.route('/')
     @app.route('/home.html')
     def index():
-        conn = get_db_connection()
-        if not conn:
+        snapshot = get_catalog()
+        if not snapshot:
             return "Database Error", 500
-        cursor = conn.cursor(dictionary=True)
-        query_states = """
-            SELECT DISTINCT s.name, s.slug 
-            FROM states s 
-            JOIN statutes st ON s.id = st.state_id 
-            ORDER BY s.name ASC
-        """
-        cursor.execute(query_states)
-        states = cursor.fetchall()
-        cursor.close()
-        conn.close()
         # 'last_updated' is now provided via app.context_processor in app.py
-        return render_template('home.html', states=states)
+        day = page_day()
+        etag = make_etag(snapshot.version, snapshot.last_updated, day.date())
+        last_modified = latest(snapshot.last_modified, snapshot.last_updated, day)
+        cached = not_modified(etag, last_modified) or cached_response(etag, last_modified)
+        if cached:
+            return cached
+        return add_validators(make_response(render_template('home.html', states=snapshot.states)), etag, last_modified)
 
     @app.route('/api/issues/<state_slug>')
+    @rate_limit.limit('api_ip')
     def get_issues_by_state(state_slug):
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        query = """
-            SELECT DISTINCT i.id, i.name, i.slug, i.issue_group
-            FROM issues i
-            JOIN statutes st ON i.id = st.issue_id
-            JOIN states s ON st.state_id = s.id
-            WHERE s.slug = %s
-            ORDER BY i.name ASC
+        snapshot = get_catalog()
+        if not snapshot:
+            return jsonify({'status': 'error', 'message': 'Database Error'}), 500
+        etag = make_etag(snapshot.issue_versions.get(state_slug))
+        last_modified = snapshot.modified_by_state.get(state_slug)
+        cached = not_modified(etag, last_modified)
+        if cached:
+            return cached
+        return add_validators(jsonify(list(snapshot.get_issues(state_slug))), etag, last_modified)
+
+    @app.route('/api/typeahead')
+    @rate_limit.limit('api_ip')
+    def typeahead_lookup():
+        """
+        Prefix matches for the state and case type pickers, grouped by issue_group.
+        Query: ?q=<prefix>&state=<state_slug>&limit=<n>. With a state, only its issues are
+        searched; an empty prefix lists them in dropdown order.
+        """
+        prefix = request.args.get('q', '')[:100]
+        state_slug = request.args.get('state') or None
+        limit = max(1, min(request.args.get('limit', 10, type=int) or 10, app.config['TYPEAHEAD_RESULT_LIMIT']))
+        snapshot = get_catalog()
+        if not snapshot:
+            return jsonify({'status': 'error', 'message': 'Database Error'}), 500
+        etag = make_etag(snapshot.version, typeahead.normalize(prefix), state_slug, limit)
+        max_age = app.config['TYPEAHEAD_MAX_AGE']
+        cached = not_modified(etag, max_age=max_age)
+        if cached:
+            return cached
+        result = typeahead.get_index(snapshot).lookup(prefix, state_slug, limit)
+        return add_validators(jsonify(result), etag, max_age=max_age)
+
+    @app.route('/api/search')
+    @rate_limit.limit('api_ip')
+    def search_statutes():
+        """
+        Ranked, typo-tolerant search over published statutes.
+        Query: ?q=<text>&limit=<n>. Matches state and issue names, code references and statute text.
         """
-        cursor.execute(query, (state_slug,))
-        issues = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return jsonify(issues)
+        query = request.args.get('q', '').strip()[:200]
+        limit = max(1, min(request.args.get('limit', 10, type=int) or 10, app.config['SEARCH_RESULT_LIMIT']))
+        snapshot = get_catalog()
+        if not snapshot:
+            return jsonify({'status': 'error', 'message': 'Database Error'}), 500
+        etag = make_etag(snapshot.version, query, limit)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        results = [{
+            'state_name': record.state_name,
+            'state_slug': record.state_slug,
+            'issue_name': record.issue_name,
+            'issue_slug': record.issue_slug,
+            'issue_group': record.issue_group,
+            'url': url_for('statute_detail', state_slug=record.state_slug, issue_slug=record.issue_slug),
+            'score': round(score, 3),
+        } for record, score in search_index.search_statutes(query, limit)]
+        return add_validators(jsonify({'query': query, 'results': results}), etag)
 
     @app.route('/limitations/<state_slug>/<issue_slug>')
     def statute_detail(state_slug, issue_slug):
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        query = """
-            SELECT 
-                s.name as state_name,
-                s.state_code,
-                sc.small_claims_cap,
-                sc.small_claims_info,
-                i.name as issue_name,
-                i.issue_group,
-                i.description as issue_desc,
-                st.duration,
-                st.time_limit_type,
-                st.time_limit_min,
-                st.time_limit_max,
-                st.details,
-                st.issue_info,
-                st.conditions_exceptions,
-                st.examples,
-                st.code_reference, 
-                st.official_source_url,
-                st.other_source_url,
-                st.updated_dt
-            FROM statutes st
-            JOIN states s ON st.state_id = s.id
-            JOIN issues i ON st.issue_id = i.id
-            LEFT JOIN small_claims sc ON s.id = sc.state_id
-            WHERE s.slug = %s AND i.slug = %s
-        """
-        cursor.execute(query, (state_slug, issue_slug))
-        data = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
+        snapshot = get_catalog()
+        if not snapshot:
+            return "Database Error", 500
+        data = snapshot.get_statute(state_slug, issue_slug)
         if not data:
             abort(404)
-        return render_template('statute.html', data=data, state_slug=state_slug, issue_slug=issue_slug)
+        # The navbar badge (last_updated) and `now` are part of the page too
+        day = page_day()
+        etag = make_etag(data.version, snapshot.last_updated, day.date())
+        last_modified = latest(data.modified_dt, snapshot.last_updated, day)
+        cached = not_modified(etag, last_modified) or cached_response(etag, last_modified)
+        if cached:
+            return cached
+        html = render_template('statute.html', data=data, state_slug=state_slug, issue_slug=issue_slug)
+        return add_validators(make_response(html), etag, last_modified)
+
+    @app.route('/api/statutes/lookup', methods=['POST'])
+    def batch_statute_lookup():
+        """
+        Resolves many (state, issue) pairs in one call.
+        Body: {"items": [["california", "personal-injury"], {"state": "texas", "issue": "debt-collection"}, ...]}
+        Each result echoes its pair with found=true and the statute fields, or found=false.
+        """
+        data = request.get_json(silent=True) or {}
+        items = data.get('items')
+        if not isinstance(items, list) or not items:
+            return jsonify({'status': 'error', 'message': 'items must be a non-empty list of (state, issue) pairs.'}), 400
+        limit = app.config['BATCH_LOOKUP_LIMIT']
+        if len(items) > limit:
+            return jsonify({'status': 'error', 'message': f'Batch exceeds the limit of {limit} items.'}), 400
+
+        pairs = []
+        for item in items:
+            if isinstance(item, dict):
+                pair = (item.get('state'), item.get('issue'))
+            elif isinstance(item, (list, tuple)) and len(item) == 2:
+                pair = tuple(item)
+            else:
+                pair = (None, None)
+            if not all(isinstance(v, str) for v in pair):
+                return jsonify({'status': 'error', 'message': f'Invalid item: {item!r}'}), 400
+            pairs.append(pair)
+
+        snapshot = get_catalog()
+        if not snapshot:
+            return jsonify({'status': 'error', 'message': 'Database Error'}), 500
+
+        def result(pair):
+            record = snapshot.get_statute(*pair)
+            if record is None:
+                return {'state': pair[0], 'issue': pair[1], 'found': False}
+            return {'state': pair[0], 'issue': pair[1], 'found': True, 'statute': record.as_dict()}
+
+        if len(pairs) <= app.config['BATCH_STREAM_THRESHOLD']:
+            return jsonify({'results': [result(pair) for pair in pairs]})
+
+        def generate():
+            yield '{"results": ['
+            for n, pair in enumerate(pairs):
+                yield (',' if n else '') + app.json.dumps(result(pair))
+            yield ']}'
+        return Response(generate(), mimetype='application/json')
+
+    @app.route('/api/deadlines', methods=['POST'])
+    def batch_deadlines():
+        """
+        Bulk version of the statute page's deadline calculator, column-oriented.
+        Body: {"states": [...], "issues": [...], "incident_dates": ["YYYY-MM-DD", ...], "today": optional}
+        Returns arrays aligned with the input: found, earliest, latest, target, days_remaining, status.
+        """
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            data = {}
+        states = data.get('states')
+        issues = data.get('issues')
+        incident_dates = data.get('incident_dates')
+        if not all(isinstance(col, list) for col in (states, issues, incident_dates)) \
+                or not len(states) == len(issues) == len(incident_dates):
+            return jsonify({'status': 'error', 'message': 'states, issues and incident_dates must be lists of equal length.'}), 400
+        # Slugs are looked up as dict keys, so nested lists/objects are rejected up front
+        if not all(value is None or isinstance(value, str) for value in states + issues):
+            return jsonify({'status': 'error', 'message': 'states and issues must be lists of slugs.'}), 400
+        if not all(isinstance(value, str) for value in incident_dates) \
+                or not isinstance(data.get('today') or '', str):
+            return jsonify({'status': 'error', 'message': 'Dates must be in YYYY-MM-DD format.'}), 400
+        limit = app.config['DEADLINE_BATCH_LIMIT']
+        if len(states) > limit:
+            return jsonify({'status': 'error', 'message': f'Batch exceeds the limit of {limit} rows.'}), 400
+        try:
+            dates = np.array(incident_dates, dtype='datetime64[D]')
+            today = np.datetime64(data['today'], 'D') if data.get('today') else None
+        except (ValueError, TypeError):
+            return jsonify({'status': 'error', 'message': 'Dates must be in YYYY-MM-DD format.'}), 400
+
+        snapshot = get_catalog()
+        if not snapshot:
+            return jsonify({'status': 'error', 'message': 'Database Error'}), 500
+
+        # Resolve each distinct (state, issue) once, then broadcast its terms to every row
+        keys = list(zip(states, issues))
+        positions = {}
+        for key in keys:
+            positions.setdefault(key, len(positions))
+        unique = [snapshot.statutes_by_key.get(key) if key[0] is not None and key[1] is not None else None
+                  for key in positions]
+        rows = np.fromiter((positions[key] for key in keys), dtype='int64', count=len(keys))
+
+        found = np.array([r is not None for r in unique], dtype=bool)[rows]
+        limit_types = np.array([r.time_limit_type if r else '' for r in unique], dtype=object)[rows]
+        durations = np.array([r.duration if r else '' for r in unique], dtype=object)[rows]
+        min_times = np.array([r.time_limit_min if r and r.time_limit_min is not None else np.nan for r in unique], dtype='float64')[rows]
+        max_times = np.array([r.time_limit_max if r and r.time_limit_max is not None else np.nan for r in unique], dtype='float64')[rows]
+
+        result = deadlines.compute_deadlines(dates, limit_types, min_times, max_times, durations, today=today)
+        return jsonify({
+            'found': found.tolist(),
+            'earliest': deadlines.dates_to_list(result['earliest']),
+            'latest': deadlines.dates_to_list(result['latest']),
+            'target': deadlines.dates_to_list(result['target']),
+            'days_remaining': deadlines.numbers_to_list(result['days_remaining']),
+            'status': result['status'].tolist(),
+        })
 
     @app.route('/report-issue', methods=['POST'])
+    @rate_limit.limit('report_ip')
     def report_issue():
-        data = request.json
-        details = data.get('details')
+        data = request.get_json(silent=True) or {}
+        details = (data.get('details') or '').strip()
         email = data.get('email') # Re-added
         official_source = data.get('official_source')
         page_context = data.get('url')
@@ -93,36 +226,47 @@ def register(app):
         if not details:
             return jsonify({'status': 'error', 'message': 'Correction details are required.'}), 400
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        try:
-            # Re-added reporter_email to INSERT statement
-            cursor.execute("""
-                INSERT INTO issue_reports (details, reporter_email, official_source, page_context, is_valid, created_at)
-                VALUES (%s, %s, %s, %s, NULL, NOW())
-            """, (details, email, official_source, page_context))
-            conn.commit()
-            return jsonify({'status': 'success', 'message': 'Thank you. Your correction has been submitted for review.'})
-        except Error as e:
-            print(f"Database Error: {e}")
-            return jsonify({'status': 'error', 'message': 'Failed to save report.'}), 500
-        finally:
-            cursor.close()
-            conn.close()
+        # Persisted (and merged with matching pending reports) by the background writer
+        if not issue_reports.submit(page_context, details, email, official_source):
+            return jsonify({'status': 'error', 'message': 'We are receiving a lot of reports right now. Please try again shortly.'}), 503
+        return jsonify({'status': 'success', 'message': 'Thank you. Your correction has been submitted for review.'}), 202
+
+    def _xml_response(snapshot, key, template, etag, last_modified, **context):
+        body = sitemaps.get_body(snapshot, key)
+        if body is None:
+            body = sitemaps.stream_and_cache(snapshot, key, stream_template(template, **context))
+        return add_validators(Response(body, mimetype='application/xml'), etag, last_modified)
 
     @app.route('/sitemap.xml')
     def sitemap():
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        query = """
-            SELECT s.slug as state_slug, i.slug as issue_slug, st.updated_dt
-            FROM statutes st
-            JOIN states s ON st.state_id = s.id
-            JOIN issues i ON st.issue_id = i.id
-        """
-        cursor.execute(query)
-        urls = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        xml_sitemap = render_template('sitemap_template.xml', urls=urls, base_url=request.host_url.rstrip('/'))
-        return Response(xml_sitemap, mimetype='application/xml')
\ No newline at end of file
+        # Sitemap index; each child stays well under the 50,000 URL / 50 MB protocol limits
+        snapshot = get_catalog()
+        if not snapshot:
+            return "Database Error", 500
+        base_url = request.host_url.rstrip('/')
+        size = app.config['SITEMAP_SHARD_SIZE']
+        etag = make_etag(snapshot.version, base_url, size)
+        cached = not_modified(etag, snapshot.last_modified) or cached_response(etag, snapshot.last_modified)
+        if cached:
+            return cached
+        shards = sitemaps.get_shards(snapshot, size)
+        return _xml_response(snapshot, ('index', base_url), 'sitemap_index.xml', etag, snapshot.last_modified,
+                             shards=shards, base_url=base_url)
+
+    @app.route('/sitemap-<int:number>.xml')
+    def sitemap_shard(number):
+        snapshot = get_catalog()
+        if not snapshot:
+            return "Database Error", 500
+        size = app.config['SITEMAP_SHARD_SIZE']
+        shards = sitemaps.get_shards(snapshot, size)
+        if not 1 <= number <= len(shards):
+            abort(404)
+        shard = shards[number - 1]
+        base_url = request.host_url.rstrip('/')
+        etag = make_etag(snapshot.version, base_url, size, number)
+        cached = not_modified(etag, shard.last_modified) or cached_response(etag, shard.last_modified)
+        if cached:
+            return cached
+        return _xml_response(snapshot, (number, base_url), 'sitemap_template.xml', etag, shard.last_modified,
+                             urls=shard.records, include_home=shard.include_home, base_url=base_url)
@@ -0,0 +1,283 @@
+# In-process search over state names, issues and published statute text.
+# Each TextIndex is an inverted index (word -> documents) plus a trigram index over its
+# vocabulary (trigram -> words), so a query word is matched against the vocabulary by
+# exact word, prefix, trigram similarity or a small edit distance before any document is
+# touched. That keeps lookups typo-tolerant ("californa", "new yrok") without scanning text.
+#
+# The index follows the catalog: when a worker picks up a new catalog snapshot, statute
+# documents whose version changed are re-indexed and state/issue names are reloaded.
+import bisect
+import re
+import threading
+from collections import Counter
+from db import get_db_connection
+import catalog
+
+WORD_RE = re.compile(r'[a-z0-9]+')
+# Common English words, plus words every page of a statute of limitations site contains
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'as', 'at', 'by', 'for', 'in', 'is', 'of', 'on', 'or', 'the', 'to', 'with',
+    'limitation', 'limitations', 'statute', 'statutes',
+))
+MIN_SIMILARITY = 0.35   # trigram similarity a vocabulary word needs to count as a fuzzy match
+PREFIX_SIMILARITY = 0.9  # credit for a word that starts with the query word
+
+def tokenize(text):
+    return [w for w in WORD_RE.findall((text or '').lower()) if w not in STOP_WORDS]
+
+def trigrams(word):
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance (adjacent swaps count as one edit), or limit + 1 if above `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+def allowed_edits(word):
+    return 0 if len(word) < 4 else 1 if len(word) < 8 else 2
+
+class TextIndex:
+    """Inverted + trigram index over documents made of weighted text fields."""
+
+    def __init__(self):
+        self._postings = {}      # word -> {doc_id: weight}
+        self._trigrams = {}      # trigram -> set of words
+        self._trigram_counts = {}  # word -> number of trigrams
+        self._doc_words = {}     # doc_id -> set of words
+        self._sorted_words = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_words)
+
+    def add(self, doc_id, fields):
+        """(Re)indexes `doc_id` from `fields`, a list of (weight, text)."""
+        weights = {}
+        for weight, text in fields:
+            for word in tokenize(text):
+                if weight > weights.get(word, 0):
+                    weights[word] = weight
+        with self._lock:
+            self._remove(doc_id)
+            for word, weight in weights.items():
+                postings = self._postings.get(word)
+                if postings is None:
+                    postings = self._postings[word] = {}
+                    grams = trigrams(word)
+                    self._trigram_counts[word] = len(grams)
+                    for gram in grams:
+                        self._trigrams.setdefault(gram, set()).add(word)
+                    self._sorted_words = None
+                postings[doc_id] = weight
+            self._doc_words[doc_id] = set(weights)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        for word in self._doc_words.pop(doc_id, ()):
+            postings = self._postings[word]
+            del postings[doc_id]
+            if not postings:
+                # Last document using the word: drop it from the vocabulary too
+                del self._postings[word]
+                del self._trigram_counts[word]
+                for gram in trigrams(word):
+                    words = self._trigrams[gram]
+                    words.discard(word)
+                    if not words:
+                        del self._trigrams[gram]
+                self._sorted_words = None
+
+    def _expand(self, token):
+        """Vocabulary words matching `token`, with a similarity in (0, 1]."""
+        matches = {}
+        if token in self._postings:
+            matches[token] = 1.0
+        if self._sorted_words is None:
+            self._sorted_words = sorted(self._postings)
+        i = bisect.bisect_left(self._sorted_words, token)
+        while i < len(self._sorted_words) and self._sorted_words[i].startswith(token):
+            matches.setdefault(self._sorted_words[i], PREFIX_SIMILARITY)
+            i += 1
+        if len(token) >= 3:
+            grams = trigrams(token)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._trigrams.get(gram, ()))
+            limit = allowed_edits(token)
+            for word, count in shared.items():
+                similarity = count / (len(grams) + self._trigram_counts[word] - count)
+                if similarity < MIN_SIMILARITY and limit:
+                    # Swapped or substituted letters break most trigrams of a short word
+                    distance = edit_distance(token, word, limit)
+                    if distance <= limit:
+                        similarity = 1 - distance / max(len(token), len(word))
+                if similarity >= MIN_SIMILARITY and similarity > matches.get(word, 0):
+                    matches[word] = similarity
+        return matches
+
+    def _token_scores(self, token):
+        """doc_id -> best similarity x field weight for one query word."""
+        scores = {}
+        for word, similarity in self._expand(token).items():
+            for doc_id, weight in self._postings[word].items():
+                score = similarity * weight
+                if score > scores.get(doc_id, 0):
+                    scores[doc_id] = score
+        return scores
+
+    def match_token(self, token):
+        """Ids of documents matching one query word."""
+        with self._lock:
+            return set(self._token_scores(token))
+
+    def search(self, query, limit=None):
+        """
+        [(doc_id, score)] best first. Documents matching every word of `query` are returned
+        if there are any; otherwise those matching the most words.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        totals = Counter()
+        matched = Counter()
+        with self._lock:
+            for token in tokens:
+                for doc_id, score in self._token_scores(token).items():
+                    totals[doc_id] += score
+                    matched[doc_id] += 1
+        if not matched:
+            return []
+        best = max(matched.values())
+        ranked = sorted(((doc_id, total) for doc_id, total in totals.items() if matched[doc_id] == best),
+                        key=lambda item: -item[1])
+        return ranked[:limit] if limit else ranked
+
+class SearchIndex:
+    """The state name, issue name and statute indexes plus what is needed to keep them in sync."""
+
+    def __init__(self):
+        self.states = TextIndex()
+        self.issues = TextIndex()
+        self.names_loaded = False
+        self.statutes = TextIndex()
+        self.statute_records = {}
+        self._versions = {}  # (kind, id) -> content the document was indexed from
+        self.snapshot = None
+
+    def _sync(self, kind, index, docs):
+        """Re-indexes documents whose content changed and drops those that disappeared."""
+        seen = set()
+        for doc_id, (version, fields) in docs.items():
+            seen.add(doc_id)
+            if self._versions.get((kind, doc_id)) != version:
+                index.add(doc_id, fields())
+                self._versions[(kind, doc_id)] = version
+        for key in [key for key in self._versions if key[0] == kind and key[1] not in seen]:
+            index.remove(key[1])
+            del self._versions[key]
+
+    def sync_statutes(self, snapshot):
+        self._sync('statutes', self.statutes, {
+            st.id: (st.version, lambda st=st: [
+                (4, st.issue_name), (4, st.state_name), (2, st.state_code), (2, st.code_reference),
+                (1, st.issue_group), (1, st.issue_desc),
+                (0.5, st.details), (0.5, st.issue_info), (0.5, st.conditions_exceptions),
+                (0.5, st.examples), (0.5, st.tolling),
+            ])
+            for st in snapshot.statutes
+        })
+        self.statute_records = {st.id: st for st in snapshot.statutes}
+        self.snapshot = snapshot
+
+    def sync_states(self, rows):
+        self._sync('states', self.states, {
+            row['id']: (row['name'], lambda row=row: [(1, row['name'])]) for row in rows
+        })
+
+    def sync_issues(self, rows):
+        self._sync('issues', self.issues, {
+            row['id']: (row['name'], lambda row=row: [(1, row['name'])]) for row in rows
+        })
+
+_index = SearchIndex()
+_lock = threading.Lock()
+
+def _load_names():
+    conn = get_db_connection()
+    if not conn:
+        raise RuntimeError("Database unavailable")
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT id, name FROM states")
+    states = cursor.fetchall()
+    cursor.execute("SELECT id, name FROM issues")
+    issues = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return states, issues
+
+def get_index():
+    """The search index, brought up to date with the current catalog snapshot."""
+    snapshot = catalog.get_catalog()
+    if snapshot is None or snapshot is _index.snapshot:
+        return _index
+    with _lock:
+        if snapshot is not _index.snapshot:
+            try:
+                states, issues = _load_names()
+                _index.sync_states(states)
+                _index.sync_issues(issues)
+                _index.names_loaded = True
+            except Exception as e:
+                # Statutes still follow the snapshot; names are retried on the next publish
+                print(f"Search Index Error: {e}")
+            _index.sync_statutes(snapshot)
+    return _index
+
+def _like_condition(query, columns):
+    names = [name_column for _, name_column in columns.values()]
+    return '(' + ' OR '.join(f"{name} LIKE %s" for name in names) + ')', [f"%{query}%"] * len(names)
+
+def filter_condition(query, **columns):
+    """
+    SQL condition (and params) for admin list filters: every word of `query` must match
+    the name of one of the given entities, e.g. filter_condition(q, states=('st.state_id', 's.name'),
+    issues=('st.issue_id', 'i.name')). Until the names are loaded, or for a query with no
+    searchable words, it is the plain substring match on the name columns instead.
+    """
+    index = get_index()
+    tokens = tokenize(query)
+    if not index.names_loaded or not tokens:
+        return _like_condition(query, columns)
+    clauses, params = [], []
+    for token in tokens:
+        alternatives = []
+        for kind, (column, _) in columns.items():
+            ids = sorted(getattr(index, kind).match_token(token))
+            if ids:
+                alternatives.append(f"{column} IN ({', '.join(['%s'] * len(ids))})")
+                params.extend(ids)
+        if not alternatives:
+            return "1 = 0", []
+        clauses.append('(' + ' OR '.join(alternatives) + ')')
+    return ' AND '.join(clauses), params
+
+def search_statutes(query, limit=10):
+    """Published statutes ranked against `query`: [(StatuteRecord, score)]."""
+    index = get_index()
+    return [(index.statute_records[doc_id], score) for doc_id, score in index.statutes.search(query, limit)
+            if doc_id in index.statute_records]
@@ -0,0 +1,17 @@
+from config import Config
+from cache import CachedValue
+from db import get_db_connection
+
+def _load_last_updated():
+    conn = get_db_connection()
+    if not conn:
+        raise RuntimeError("Database unavailable")
+    cursor = conn.cursor()
+    cursor.execute("SELECT MAX(updated_dt) FROM statutes")
+    result = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    return result[0] if result else None
+
+# Navbar "Data Current" badge. Refreshed on statute approval, otherwise every LAST_UPDATED_TTL seconds.
+last_updated = CachedValue(_load_last_updated, ttl=Config.LAST_UPDATED_TTL)
@@ -0,0 +1,45 @@
+import threading
+
+class SitemapShard:
+    __slots__ = ('number', 'records', 'last_modified', 'include_home')
+
+    def __init__(self, number, records, include_home):
+        self.number = number
+        self.records = records
+        self.include_home = include_home
+        self.last_modified = max((r.updated_dt for r in records if r.updated_dt), default=None)
+
+# Shards and generated XML for the current catalog version only; a new version drops the lot
+_cache = {'version': None, 'size': None, 'shards': (), 'bodies': {}}
+_lock = threading.Lock()
+
+def _check_version(snapshot, size):
+    if _cache['version'] != snapshot.version or _cache['size'] != size:
+        statutes = snapshot.statutes
+        chunks = [statutes[i:i + size] for i in range(0, len(statutes), size)] or [()]
+        _cache['shards'] = tuple(SitemapShard(n, chunk, n == 1) for n, chunk in enumerate(chunks, start=1))
+        _cache['bodies'] = {}
+        _cache['version'] = snapshot.version
+        _cache['size'] = size
+
+def get_shards(snapshot, size):
+    """Fixed-size shards in statute id order, so existing URLs keep their shard as data grows."""
+    with _lock:
+        _check_version(snapshot, size)
+        return _cache['shards']
+
+def get_body(snapshot, key):
+    with _lock:
+        if _cache['version'] != snapshot.version:
+            return None
+        return _cache['bodies'].get(key)
+
+def stream_and_cache(snapshot, key, chunks):
+    """Yields a streamed body through unchanged and keeps a copy once it completes."""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    with _lock:
+        if _cache['version'] == snapshot.version:
+            _cache['bodies'][key] = ''.join(parts)
@@ -0,0 +1,165 @@
+# Pre-renders the public site into a directory that nginx or object storage can serve.
+# Layout mirrors the public URLs:
+#   index.html, home.html, 404.html, sitemap.xml, sitemap-<n>.xml
+#   limitations/<state_slug>/<issue_slug>/index.html
+#   api/issues/<state_slug>   (JSON, no extension; serve with default_type application/json)
+#                             The home page's case type picker falls back to it, since the
+#                             export has no /api/typeahead.
+#   static/...
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import click
+from flask import render_template
+import catalog
+import site_data
+import sitemaps
+
+# Inherited by forked render workers so snapshots are never pickled
+_job = {}
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def statute_path(output, state_slug, issue_slug):
+    return os.path.join(output, 'limitations', state_slug, issue_slug, 'index.html')
+
+def issues_path(output, state_slug):
+    return os.path.join(output, 'api', 'issues', state_slug)
+
+def _render_context(app):
+    return app.test_request_context(base_url=app.config['SITE_URL'])
+
+def _write_statute(output, record):
+    html = render_template('statute.html', data=record, state_slug=record.state_slug, issue_slug=record.issue_slug)
+    _write_atomic(statute_path(output, record.state_slug, record.issue_slug), html)
+
+def _write_issues(app, output, snapshot, state_slug):
+    _write_atomic(issues_path(output, state_slug), app.json.dumps(list(snapshot.get_issues(state_slug))))
+
+def _write_site_pages(app, output, snapshot):
+    home = render_template('home.html', states=snapshot.states)
+    _write_atomic(os.path.join(output, 'index.html'), home)
+    _write_atomic(os.path.join(output, 'home.html'), home)
+    _write_atomic(os.path.join(output, '404.html'), render_template('404.html'))
+    _write_sitemap(app, output, snapshot)
+
+def _write_sitemap(app, output, snapshot):
+    base_url = app.config['SITE_URL'].rstrip('/')
+    shards = sitemaps.get_shards(snapshot, app.config['SITEMAP_SHARD_SIZE'])
+    for shard in shards:
+        xml = render_template('sitemap_template.xml', urls=shard.records, include_home=shard.include_home, base_url=base_url)
+        _write_atomic(os.path.join(output, f'sitemap-{shard.number}.xml'), xml)
+    _write_atomic(os.path.join(output, 'sitemap.xml'), render_template('sitemap_index.xml', shards=shards, base_url=base_url))
+
+def _render_chunk(keys):
+    app, snapshot, output = _job['app'], _job['snapshot'], _job['output']
+    with _render_context(app):
+        for key in keys:
+            _write_statute(output, snapshot.statutes_by_key[key])
+    return len(keys)
+
+def export_site(app, output, workers=None, chunk_size=200):
+    """Full export. Statute pages are rendered by a pool of forked workers."""
+    with app.app_context():
+        snapshot = catalog.get_catalog()
+    if not snapshot:
+        raise click.ClickException('Could not load the catalog from the database.')
+    # Seed the navbar badge from the snapshot so render workers never query for it
+    site_data.last_updated.set(snapshot.last_updated)
+
+    started = time.monotonic()
+    keys = list(snapshot.statutes_by_key)
+    chunks = [keys[i:i + chunk_size] for i in range(0, len(keys), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    _job.update(app=app, snapshot=snapshot, output=output)
+    try:
+        if workers > 1 and len(chunks) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+                pages = sum(pool.map(_render_chunk, chunks))
+        else:
+            pages = sum(_render_chunk(chunk) for chunk in chunks)
+    finally:
+        _job.clear()
+
+    with _render_context(app):
+        for state in snapshot.states:
+            _write_issues(app, output, snapshot, state.slug)
+        _write_site_pages(app, output, snapshot)
+
+    shutil.copytree(app.static_folder, os.path.join(output, 'static'), dirs_exist_ok=True)
+    return pages, time.monotonic() - started
+
+def export_changes(app, output, previous, current):
+    """
+    Incremental export after a publish: rewrites only statute pages whose content
+    changed, the issue JSON of the affected states, the sitemap, and the home page
+    if the state list changed.
+    """
+    if current is None:
+        return
+    old_pages = previous.statutes_by_key if previous else {}
+    new_pages = current.statutes_by_key
+    changed = [rec for key, rec in new_pages.items()
+               if key not in old_pages or old_pages[key].version != rec.version]
+    removed = [key for key in old_pages if key not in new_pages]
+    touched_states = {rec.state_slug for rec in changed} | {state_slug for state_slug, _ in removed}
+
+    with _render_context(app):
+        for record in changed:
+            _write_statute(output, record)
+        for state_slug, issue_slug in removed:
+            _remove(statute_path(output, state_slug, issue_slug))
+        for state_slug in touched_states:
+            if state_slug in current.issues_by_state:
+                _write_issues(app, output, current, state_slug)
+            else:
+                _remove(issues_path(output, state_slug))
+        _write_sitemap(app, output, current)
+        old_states = [(s.slug, s.name) for s in previous.states] if previous else None
+        if old_states != [(s.slug, s.name) for s in current.states]:
+            home = render_template('home.html', states=current.states)
+            _write_atomic(os.path.join(output, 'index.html'), home)
+            _write_atomic(os.path.join(output, 'home.html'), home)
+
+def init_app(app):
+    @app.cli.command('export-static')
+    @click.option('--output', '-o', default=None, help='Target directory (defaults to STATIC_EXPORT_DIR).')
+    @click.option('--workers', '-w', default=None, type=int, help='Render processes (defaults to CPU count).')
+    def export_static_command(output, workers):
+        """Render every public page into a static directory."""
+        output = output or app.config.get('STATIC_EXPORT_DIR')
+        if not output:
+            raise click.UsageError('Pass --output or set STATIC_EXPORT_DIR.')
+        pages, elapsed = export_site(app, output, workers)
+        click.echo(f"Exported {pages} statute pages to {output} in {elapsed:.1f}s")
+
+    output = app.config.get('STATIC_EXPORT_DIR')
+    if output:
+        def on_publish(previous, current):
+            try:
+                export_changes(app, output, previous, current)
+            except Exception as e:
+                print(f"Static Export Error: {e}")
+        catalog.subscribe(on_publish)
@@ -30,7 +30,13 @@ CREATE TABLE `issue_reports` (
   `official_source` varchar(255) DEFAULT NULL,
   `is_valid` tinyint(1) DEFAULT NULL COMMENT 'NULL=Pending, 1=Valid, 0=Invalid',
   `created_at` datetime DEFAULT CURRENT_TIMESTAMP,
-  PRIMARY KEY (`id`)
+  `details_hash` char(40) NOT NULL DEFAULT '',
+  `occurrences` int NOT NULL DEFAULT '1',
+  `last_reported_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  KEY `created_at` (`created_at`),
+  KEY `details_hash` (`details_hash`,`last_reported_at`),
+  KEY `page_last_reported` (`page_context`,`last_reported_at`)
 ) ENGINE=InnoDB AUTO_INCREMENT=2 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -38,7 +44,7 @@ CREATE TABLE `issue_reports` (
 -- Dumping data for table `issue_reports`
 --
 
-INSERT INTO `issue_reports` VALUES (1,'/limitations/california/personal-injury','test','aj@bbc.com','https://abc.com',1,'2025-11-22 21:02:48');
+INSERT INTO `issue_reports` VALUES (1,'/limitations/california/personal-injury','test','aj@bbc.com','https://abc.com',1,'2025-11-22 21:02:48','a94a8fe5ccb19ba61c4c0873d391e987982fbbd3',1,'2025-11-22 21:02:48');
 
 --
 -- Table structure for table `issues`
@@ -66,6 +72,34 @@ CREATE TABLE `issues` (
 
 INSERT INTO `issues` VALUES (1,'Personal Injury (General Negligence)','personal-injury-general-negligence','Injuries caused by someone’s carelessness, such as accidents or unsafe conditions.','Personal & Bodily Injury','script_import','2025-11-22 23:57:39'),(2,'Medical Malpractice','medical-malpractice','Harm caused by a doctor or healthcare provider’s negligent medical care.','Personal & Bodily Injury','script_import','2025-11-22 23:57:39'),(3,'Dental / Nursing / Professional Medical Negligence','dental-nursing-professional-medical-negligence','Injury resulting from negligent treatment by dentists, nurses, or other medical professionals.','Personal & Bodily Injury','script_import','2025-11-22 23:57:39'),(4,'Product Liability','product-liability','Injuries caused by defective or dangerous products.','Personal & Bodily Injury','script_import','2025-11-22 23:57:39'),(5,'Premises Liability (Slip & Fall)','premises-liability-slip-fall','Injuries caused by unsafe property conditions, like slips, trips, or hazards.','Personal & Bodily Injury','script_import','2025-11-22 23:57:39'),(6,'Wrongful Death','wrongful-death','A claim brought when someone dies due to another party’s negligence or wrongdoing.','Personal & Bodily Injury','script_import','2025-11-22 23:57:39'),(7,'Assault & Battery (Civil)','assault-battery-civil','Lawsuits for intentional physical harm or unwanted physical contact.','Personal & Bodily Injury','script_import','2025-11-22 23:57:39'),(8,'Defamation (Libel / Slander)','defamation-libel-slander','False statements that damage someone’s reputation.','Personal & Bodily Injury','script_import','2025-11-22 23:57:39'),(9,'Breach of Contract – Written','breach-of-contract-written','Failure to follow the terms of a written agreement.','Contract & Business','script_import','2025-11-22 23:57:39'),(10,'Breach of Contract – Oral','breach-of-contract-oral','Failure to follow the terms of a verbal agreement.','Contract & Business','script_import','2025-11-22 23:57:39'),(11,'Breach of Contract – Implied / Quasi-contract','breach-of-contract-implied-quasi-contract','Claims based on promises or obligations inferred from conduct, not explicit contracts.','Contract & Business','script_import','2025-11-22 23:57:39'),(12,'Sales of Goods (UCC Transactions)','sales-of-goods-ucc-transactions','Disputes involving the sale of goods under the Uniform Commercial Code.','Contract & Business','script_import','2025-11-22 23:57:39'),(13,'Business Torts (Fraud, Misrepresentation)','business-torts-fraud-misrepresentation','Claims involving deception or dishonest business practices.','Contract & Business','script_import','2025-11-22 23:57:39'),(14,'Professional Malpractice (Non-medical) – legal, accounting, engineering','professional-malpractice-non-medical-legal-accounting-engineering','Negligent services by lawyers, accountants, engineers, or other licensed professionals.','Contract & Business','script_import','2025-11-22 23:57:39'),(15,'Debt Collection','debt-collection','Claims for unpaid debts owed by an individual or business.','Financial & Debt-Related','script_import','2025-11-22 23:57:39'),(16,'Credit Card Debt','credit-card-debt','Lawsuits seeking payment for unpaid credit card balances.','Financial & Debt-Related','script_import','2025-11-22 23:57:39'),(17,'Promissory Notes','promissory-notes','Claims based on written promises to repay borrowed money.','Financial & Debt-Related','script_import','2025-11-22 23:57:39'),(18,'Mortgage Foreclosure','mortgage-foreclosure','Legal actions to recover property when mortgage payments are not made.','Financial & Debt-Related','script_import','2025-11-22 23:57:39'),(19,'Check / Payment Disputes','check-payment-disputes','Issues involving bounced checks, payment failures, or unauthorized charges.','Financial & Debt-Related','script_import','2025-11-22 23:57:39'),(20,'Collection of Judgments','collection-of-judgments','Efforts to collect money awarded in a prior court judgment.','Financial & Debt-Related','script_import','2025-11-22 23:57:39'),(21,'Property Damage','property-damage','Damage caused to personal or real property.','Property & Real Estate','script_import','2025-11-22 23:57:39'),(22,'Trespass / Nuisance','trespass-nuisance','Interference with property use, such as entering land or creating ongoing disturbances.','Property & Real Estate','script_import','2025-11-22 23:57:39'),(23,'Construction Defect','construction-defect','Claims involving faulty design, construction, or building materials.','Property & Real Estate','script_import','2025-11-22 23:57:39'),(24,'Real Property Contract Disputes','real-property-contract-disputes','Disagreements involving real estate contracts or transactions.','Property & Real Estate','script_import','2025-11-22 23:57:39'),(25,'Boundary / Encroachment Issues','boundary-encroachment-issues','Disputes over property lines or structures built over boundaries.','Property & Real Estate','script_import','2025-11-22 23:57:39'),(26,'HOA / Condo Disputes','hoa-condo-disputes','Conflicts with homeowners’ associations or condominium boards.','Property & Real Estate','script_import','2025-11-22 23:57:39'),(27,'Eviction Actions','eviction-actions','Legal proceedings to remove a tenant from a property.','Landlord–Tenant','script_import','2025-11-22 23:57:39'),(28,'Security Deposit Claims','security-deposit-claims','Claims for the return or improper withholding of security deposits.','Landlord–Tenant','script_import','2025-11-22 23:57:39'),(29,'Rent Disputes','rent-disputes','Arguments over unpaid rent or rent-related terms.','Landlord–Tenant','script_import','2025-11-22 23:57:39'),(30,'Habitability Claims','habitability-claims','Issues involving unsafe or unlivable rental conditions.','Landlord–Tenant','script_import','2025-11-22 23:57:39'),(31,'Wrongful Lockout','wrongful-lockout','Cases where a landlord illegally locks out or removes a tenant.','Landlord–Tenant','script_import','2025-11-22 23:57:39'),(32,'Wrongful Termination','wrongful-termination','Claims that an employee was fired illegally or unfairly.','Employment','script_import','2025-11-22 23:57:39'),(33,'Wage & Hour / Unpaid Wages','wage-hour-unpaid-wages','Cases involving unpaid wages, overtime, or minimum wage violations.','Employment','script_import','2025-11-22 23:57:39'),(34,'Discrimination / Harassment','discrimination-harassment','Employment claims involving unfair treatment based on protected characteristics or harassment.','Employment','script_import','2025-11-22 23:57:39'),(35,'Retaliation / Whistleblower Claims','retaliation-whistleblower-claims','Claims for punishment after reporting misconduct or exercising legal rights.','Employment','script_import','2025-11-22 23:57:39'),(36,'Breach of Employment Contract','breach-of-employment-contract','Employers or employees failing to follow terms of an employment agreement.','Employment','script_import','2025-11-22 23:57:39'),(37,'Insurance Bad Faith','insurance-bad-faith','Claims that an insurance company acted unfairly or dishonestly.','Insurance-Related','script_import','2025-11-22 23:57:39'),(38,'Insurance Claim Denials','insurance-claim-denials','Disputes over denied insurance claims.','Insurance-Related','script_import','2025-11-22 23:57:39'),(39,'Property Insurance Claims','property-insurance-claims','Claims involving damage to homes, buildings, or belongings.','Insurance-Related','script_import','2025-11-22 23:57:39'),(40,'Auto Insurance Claims','auto-insurance-claims','Claims involving vehicle damage or auto policy disputes.','Insurance-Related','script_import','2025-11-22 23:57:39'),(41,'Claims Against Government Agencies','claims-against-government-agencies','Lawsuits brought against state or local government entities.','Government & Civil Claims','script_import','2025-11-22 23:57:39'),(42,'Federal Tort Claims Act (FTCA)','federal-tort-claims-act-ftca','Claims for injuries caused by federal government employees or agencies.','Government & Civil Claims','script_import','2025-11-22 23:57:39'),(43,'Civil Rights (Section 1983)','civil-rights-section-1983','Claims for violations of constitutional or civil rights by government actors.','Government & Civil Claims','script_import','2025-11-22 23:57:39'),(44,'Administrative Appeals','administrative-appeals','Challenges to government agency decisions or rulings.','Government & Civil Claims','script_import','2025-11-22 23:57:39'),(45,'Child Support Arrears','child-support-arrears','Actions to collect unpaid child support.','Family Law','script_import','2025-11-22 23:57:39'),(46,'Divorce-Related Enforcement','divorce-related-enforcement','Claims to enforce divorce judgments or orders.','Family Law','script_import','2025-11-22 23:57:39'),(47,'Domestic Violence Civil Actions','domestic-violence-civil-actions','Civil protective orders or other non-criminal domestic violence filings.','Family Law','script_import','2025-11-22 23:57:39'),(48,'Will Contests','will-contests','Challenges to the validity of a will.','Probate & Estate','script_import','2025-11-22 23:57:39'),(49,'Trust Litigation','trust-litigation','Disputes involving trusts, trustees, or beneficiaries.','Probate & Estate','script_import','2025-11-22 23:57:39'),(50,'Claims Against Estates','claims-against-estates','Claims for money owed by someone who has passed away.','Probate & Estate','script_import','2025-11-22 23:57:39'),(51,'Probate Deadlines','probate-deadlines','Timeline requirements for filing probate-related actions.','Probate & Estate','script_import','2025-11-22 23:57:39'),(52,'Consumer Protection Violations','consumer-protection-violations','Claims involving unfair, deceptive, or abusive business practices.','Consumer & Privacy','script_import','2025-11-22 23:57:39'),(53,'Lemon Law Claims','lemon-law-claims','Claims for defective new or used vehicles.','Consumer & Privacy','script_import','2025-11-22 23:57:39'),(54,'Privacy/Data Breach Claims','privacy-data-breach-claims','Claims involving unauthorized disclosure or misuse of personal data.','Consumer & Privacy','script_import','2025-11-22 23:57:39'),(55,'Unfair Business Practices','unfair-business-practices','Lawsuits against businesses for deceptive or unethical conduct.','Consumer & Privacy','script_import','2025-11-22 23:57:39'),(56,'Warranty Claims','warranty-claims','Claims based on broken promises or guarantees about a product or service.','Consumer & Privacy','script_import','2025-11-22 23:57:39'),(57,'Copyright Infringement','copyright-infringement','Unauthorized use of copyrighted works like books, videos, or software.','Intellectual Property (Civil)','script_import','2025-11-22 23:57:39'),(58,'Trademark Infringement','trademark-infringement','Unauthorized use of brand names, logos, or trademarks.','Intellectual Property (Civil)','script_import','2025-11-22 23:57:39'),(59,'Patent Infringement','patent-infringement','Unauthorized use of patented inventions or technology.','Intellectual Property (Civil)','script_import','2025-11-22 23:57:39'),(60,'Trade Secret Misappropriation','trade-secret-misappropriation','Theft or misuse of confidential business information.','Intellectual Property (Civil)','script_import','2025-11-22 23:57:39'),(61,'Environmental Claims','environmental-claims','Claims involving pollution, environmental damage, or regulatory violations.','Environmental & Public Safety','script_import','2025-11-22 23:57:39'),(62,'Toxic Exposure','toxic-exposure','Injuries caused by exposure to harmful chemicals or substances.','Environmental & Public Safety','script_import','2025-11-22 23:57:39'),(63,'OSHA-related civil actions','osha-related-civil-actions','Claims involving workplace safety violations reported to or involving OSHA.','Environmental & Public Safety','script_import','2025-11-22 23:57:39');
 
+--
+-- Table structure for table `jobs`
+--
+
+DROP TABLE IF EXISTS `jobs`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `jobs` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `job_type` varchar(50) NOT NULL,
+  `status` varchar(20) NOT NULL DEFAULT 'QUEUED',
+  `payload` text,
+  `progress` tinyint NOT NULL DEFAULT '0',
+  `rows_total` int DEFAULT NULL,
+  `rows_processed` int NOT NULL DEFAULT '0',
+  `rows_failed` int NOT NULL DEFAULT '0',
+  `message` text,
+  `result` text,
+  `submitted_by` varchar(50) DEFAULT NULL,
+  `created_dt` datetime DEFAULT CURRENT_TIMESTAMP,
+  `started_dt` datetime DEFAULT NULL,
+  `finished_dt` datetime DEFAULT NULL,
+  `updated_dt` datetime DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  KEY `status` (`status`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `login_logs`
 --
@@ -79,9 +113,15 @@ CREATE TABLE `login_logs` (
   `status` varchar(20) NOT NULL,
   `ip_address` varchar(45) DEFAULT NULL,
   `user_agent` varchar(255) DEFAULT NULL,
-  `login_dt` datetime DEFAULT CURRENT_TIMESTAMP,
-  PRIMARY KEY (`id`)
-) ENGINE=InnoDB AUTO_INCREMENT=3 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+  `login_dt` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`,`login_dt`),
+  KEY `login_dt` (`login_dt`),
+  KEY `status_login_dt` (`status`,`login_dt`),
+  KEY `username_login_dt` (`username_attempted`,`login_dt`)
+) ENGINE=InnoDB AUTO_INCREMENT=3 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
+/*!50500 PARTITION BY RANGE  COLUMNS(login_dt)
+(PARTITION p202511 VALUES LESS THAN ('2025-12-01 00:00:00') ENGINE = InnoDB,
+ PARTITION pmax VALUES LESS THAN (MAXVALUE) ENGINE = InnoDB) */;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
 --
@@ -90,6 +130,29 @@ CREATE TABLE `login_logs` (
 
 INSERT INTO `login_logs` VALUES (1,'admin','FAILURE','127.0.0.1','Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36','2025-11-22 21:00:22'),(2,'admin','SUCCESS','127.0.0.1','Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36','2025-11-22 21:01:27');
 
+--
+-- Table structure for table `login_stats_hourly`
+--
+
+DROP TABLE IF EXISTS `login_stats_hourly`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `login_stats_hourly` (
+  `bucket_start` datetime NOT NULL,
+  `username` varchar(50) NOT NULL DEFAULT '',
+  `ip_address` varchar(45) NOT NULL DEFAULT '',
+  `success_count` int NOT NULL DEFAULT '0',
+  `failure_count` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`bucket_start`,`username`,`ip_address`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `login_stats_hourly`
+--
+
+INSERT INTO `login_stats_hourly` VALUES ('2025-11-22 21:00:00','admin','127.0.0.1',1,1);
+
 --
 -- Table structure for table `roles`
 --
@@ -158,10 +221,11 @@ CREATE TABLE `small_claims_approvals` (
   `action_type` varchar(10) NOT NULL,
   `status` varchar(20) DEFAULT 'PENDING',
   `submitted_by` varchar(50) DEFAULT NULL,
-  `submitted_dt` datetime DEFAULT CURRENT_TIMESTAMP,
+  `submitted_dt` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (`id`),
   KEY `claim_id` (`claim_id`),
   KEY `state_id` (`state_id`),
+  KEY `status_submitted` (`status`,`submitted_dt`),
   CONSTRAINT `small_claims_approvals_ibfk_1` FOREIGN KEY (`claim_id`) REFERENCES `small_claims` (`id`) ON DELETE SET NULL,
   CONSTRAINT `small_claims_approvals_ibfk_2` FOREIGN KEY (`state_id`) REFERENCES `states` (`id`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -222,11 +286,12 @@ CREATE TABLE `statute_approvals` (
   `action_type` varchar(10) NOT NULL,
   `status` varchar(20) DEFAULT 'PENDING',
   `submitted_by` varchar(50) DEFAULT NULL,
-  `submitted_dt` datetime DEFAULT CURRENT_TIMESTAMP,
+  `submitted_dt` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (`id`),
   KEY `statute_id` (`statute_id`),
   KEY `state_id` (`state_id`),
   KEY `issue_id` (`issue_id`),
+  KEY `status_submitted` (`status`,`submitted_dt`),
   CONSTRAINT `statute_approvals_ibfk_1` FOREIGN KEY (`statute_id`) REFERENCES `statutes` (`id`) ON DELETE SET NULL,
   CONSTRAINT `statute_approvals_ibfk_2` FOREIGN KEY (`state_id`) REFERENCES `states` (`id`),
   CONSTRAINT `statute_approvals_ibfk_3` FOREIGN KEY (`issue_id`) REFERENCES `issues` (`id`)
@@ -0,0 +1,321 @@
+import csv
+import os
+import uuid
+import numpy as np
+import pandas as pd
+from flask import current_app
+from mysql.connector import Error
+from openpyxl import load_workbook
+import jobs
+from db import get_db_connection
+
+VALID_TYPES = ['exact', 'range', 'conditional']
+VALID_DURATIONS = ['years', 'months', 'days']
+EXTENSIONS = ('.csv', '.xlsx')
+# Range of the time_limit_min/max columns (MySQL INT)
+MAX_TIME_VALUE = 2 ** 31 - 1
+
+# Spreadsheet header (lower-cased) -> statute_approvals column, for the free-text fields
+TEXT_COLUMNS = {
+    'issue info': 'issue_info',
+    'details': 'details',
+    'code reference': 'code_reference',
+    'official url': 'official_source_url',
+    'other url': 'other_source_url',
+    'exceptions': 'conditions_exceptions',
+    'examples': 'examples',
+    'tolling': 'tolling',
+}
+
+INSERT_APPROVAL_SQL = """
+    INSERT INTO statute_approvals (
+        statute_id, state_id, issue_id, issue_info, time_limit_type,
+        time_limit_min, time_limit_max, duration, details, code_reference,
+        official_source_url, other_source_url, conditions_exceptions,
+        examples, tolling, action_type, status, submitted_by
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'PENDING', %s)
+"""
+
+class UploadError(Exception):
+    pass
+
+class UploadResult:
+    """Running totals plus the per-row outcome CSV, appended chunk by chunk so memory stays flat."""
+
+    def __init__(self, report_dir):
+        self.new_count = 0
+        self.updated_count = 0
+        self.failed_count = 0
+        self.rows = 0
+        self.token = uuid.uuid4().hex
+        os.makedirs(report_dir, exist_ok=True)
+        self.report_path = os.path.join(report_dir, f'{self.token}.csv')
+        self._part_path = self.report_path + '.part'
+        self._report = open(self._part_path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._report)
+        self._writer.writerow(['row', 'state', 'issue', 'result', 'error'])
+
+    def add_report(self, frame):
+        self._writer.writerows(frame.itertuples(index=False, name=None))
+
+    def finish(self):
+        """Closes the report; keeps it (and returns its token) only if some rows failed."""
+        self._report.close()
+        if self.failed_count:
+            os.replace(self._part_path, self.report_path)
+            return self.token
+        os.remove(self._part_path)
+        return None
+
+    def discard(self):
+        self._report.close()
+        os.remove(self._part_path)
+
+def file_extension(filename):
+    """Lower-cased extension of an accepted upload, else raises UploadError."""
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension not in EXTENSIONS:
+        raise UploadError('Unsupported file type. Upload a .xlsx or .csv file.')
+    return extension
+
+def count_rows(path, filename):
+    """
+    Cheap data-row estimate for progress reporting: the sheet dimension for XLSX,
+    line count for CSV (quoted multi-line cells make it an over-estimate). None if unknown.
+    """
+    if file_extension(filename) == '.xlsx':
+        workbook = load_workbook(path, read_only=True)
+        try:
+            max_row = workbook.active.max_row
+        finally:
+            workbook.close()
+        return max(max_row - 1, 0) if max_row else None
+    with open(path, 'rb') as f:
+        lines = sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b''))
+    return max(lines - 1, 0)
+
+def _normalize_headers(df):
+    df.columns = [str(c).lower().strip() for c in df.columns]
+    return df
+
+def iter_chunks(file, filename, chunk_size):
+    """
+    Yields the sheet as DataFrames of at most chunk_size rows without loading it whole.
+    CSV is read with pandas' chunked reader, XLSX with openpyxl's read-only row iterator.
+    Blank rows are dropped; each frame's index is the row's position after the header,
+    so index + 2 is its spreadsheet row number.
+    """
+    extension = file_extension(filename)
+    if extension == '.csv':
+        # Blank lines are read (and dropped here) so the reader's running index keeps counting them
+        for chunk in pd.read_csv(file, chunksize=chunk_size, dtype=str, skip_blank_lines=False):
+            chunk = chunk.dropna(how='all')
+            if len(chunk):
+                yield _normalize_headers(chunk)
+    elif extension == '.xlsx':
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            batch, positions = [], []
+            for position, values in enumerate(rows):
+                if all(v is None for v in values):
+                    continue
+                batch.append(values)
+                positions.append(position)
+                if len(batch) == chunk_size:
+                    yield _frame(batch, positions, header)
+                    batch, positions = [], []
+            if batch:
+                yield _frame(batch, positions, header)
+        finally:
+            workbook.close()
+
+def _frame(batch, positions, header):
+    df = pd.DataFrame(batch, index=positions, columns=[h if h is not None else '' for h in header])
+    # Empty cells arrive as None; treat them like pandas' NaN so validation behaves as with read_excel
+    return _normalize_headers(df.fillna(np.nan))
+
+def _text(df, column, default=''):
+    if column not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    return df[column].astype(str).str.strip()
+
+def fetch_mappings(cursor):
+    cursor.execute("SELECT id, name FROM states")
+    state_map = {row['name'].lower(): row['id'] for row in cursor.fetchall()}
+    cursor.execute("SELECT id, name FROM issues")
+    issue_map = {row['name'].lower(): row['id'] for row in cursor.fetchall()}
+    cursor.execute("SELECT id, state_id, issue_id FROM statutes")
+    existing = {(row['state_id'], row['issue_id']): row['id'] for row in cursor.fetchall()}
+    return state_map, issue_map, existing
+
+def validate(df, state_map, issue_map):
+    """
+    Column-wise validation of an upload frame (headers already lower-cased).
+    Returns a frame aligned with `df` holding the normalized values and an `error`
+    column (None for valid rows). Rules and messages match the old row-by-row loop.
+    """
+    out = pd.DataFrame(index=df.index)
+    out['state'] = _text(df, 'state')
+    out['issue'] = _text(df, 'issue')
+    out['state_id'] = out['state'].str.lower().map(state_map)
+    out['issue_id'] = out['issue'].str.lower().map(issue_map)
+    out['time_limit_type'] = _text(df, 'time limit type', 'exact').str.lower()
+    out['duration'] = _text(df, 'duration', 'years').str.lower()
+
+    raw_min = df['min time'] if 'min time' in df.columns else pd.Series(np.nan, index=df.index)
+    raw_max = df['max time'] if 'max time' in df.columns else pd.Series(np.nan, index=df.index)
+    min_num = pd.to_numeric(raw_min, errors='coerce').astype('float64')
+    max_num = pd.to_numeric(raw_max, errors='coerce').astype('float64')
+    # inf, 1e400 and the like fail their row instead of the integer cast below
+    min_num = min_num.where(min_num.abs() <= MAX_TIME_VALUE)
+    max_num = max_num.where(max_num.abs() <= MAX_TIME_VALUE)
+    numeric_error = (raw_min.notna() & min_num.isna()) | (raw_max.notna() & max_num.isna())
+    # int(float(x)) truncates toward zero
+    out['min_val'] = np.trunc(min_num).astype('Int64')
+    out['max_val'] = np.trunc(max_num).astype('Int64')
+
+    limit_type = out['time_limit_type']
+    is_exact = limit_type == 'exact'
+    is_ranged = limit_type.isin(['range', 'conditional'])
+    label = out['state'] + ' / ' + out['issue']
+
+    # First matching rule wins, in the same order the old loop checked them
+    checks = [
+        (out['state_id'].isna() | out['issue_id'].isna(), label + ' (Invalid State or Issue)'),
+        (~limit_type.isin(VALID_TYPES), label + ' (Invalid Type: ' + limit_type + ')'),
+        (~out['duration'].isin(VALID_DURATIONS), label + ' (Invalid Duration: ' + out['duration'] + ')'),
+        (numeric_error, label + ' (Numeric Error)'),
+        (is_exact & out['max_val'].notna(), label + ' (Exact type cannot have Max Time)'),
+        (is_ranged & (out['min_val'].isna() | out['max_val'].isna()), label + ' (Range/Conditional needs both Min and Max)'),
+        (is_exact & out['min_val'].isna(), label + ' (Exact requires Min Time)'),
+    ]
+    out['error'] = np.select([cond.to_numpy(dtype=bool) for cond, _ in checks],
+                             [msg.to_numpy(dtype=object) for _, msg in checks], default=None)
+
+    # Exact limits are stored with min == max, like the manual add form
+    out['max_val'] = out['max_val'].where(~is_exact, out['min_val'])
+    for header, column in TEXT_COLUMNS.items():
+        out[column] = df[header].fillna('').astype(str) if header in df.columns else ''
+    return out
+
+def build_approvals(valid, existing, username):
+    """Parameter tuples for INSERT_APPROVAL_SQL plus the matching action types."""
+    keys = zip(valid['state_id'].astype(int), valid['issue_id'].astype(int))
+    statute_ids = [existing.get(key) for key in keys]
+    actions = ['UPDATE' if sid else 'INSERT' for sid in statute_ids]
+
+    def nullable(series):
+        return [None if pd.isna(v) else int(v) for v in series]
+
+    params = list(zip(
+        statute_ids,
+        valid['state_id'].astype(int).tolist(), valid['issue_id'].astype(int).tolist(),
+        valid['issue_info'].tolist(), valid['time_limit_type'].tolist(),
+        nullable(valid['min_val']), nullable(valid['max_val']), valid['duration'].tolist(),
+        valid['details'].tolist(), valid['code_reference'].tolist(),
+        valid['official_source_url'].tolist(), valid['other_source_url'].tolist(),
+        valid['conditions_exceptions'].tolist(), valid['examples'].tolist(),
+        valid['tolling'].tolist(), actions, [username] * len(actions),
+    ))
+    return params, actions
+
+def process_frame(cursor, df, mappings, username, result):
+    """
+    Validates one frame and queues its valid rows as approvals with a single executemany.
+    The caller owns the transaction.
+    """
+    state_map, issue_map, existing = mappings
+    result.rows += len(df)
+    checked = validate(df, state_map, issue_map)
+    failed = checked['error'].notna()
+    valid = checked[~failed]
+
+    if len(valid):
+        params, actions = build_approvals(valid, existing, username)
+        cursor.executemany(INSERT_APPROVAL_SQL, params)
+        updated = actions.count('UPDATE')
+        result.updated_count += updated
+        result.new_count += len(actions) - updated
+    result.failed_count += int(failed.sum())
+
+    result.add_report(pd.DataFrame({
+        'row': df.index.to_numpy() + 2,  # spreadsheet row number (see iter_chunks)
+        'state': checked['state'].to_numpy(),
+        'issue': checked['issue'].to_numpy(),
+        'result': np.where(failed, 'FAILED', 'QUEUED'),
+        'error': checked['error'].fillna('').to_numpy(),
+    }))
+
+def process_upload(cursor, file, filename, username, result, row_limit, chunk_size, on_chunk=None):
+    """
+    Streams the file through validation and approval inserts, chunk by chunk.
+    Raises UploadError once row_limit is exceeded; the caller should roll back.
+    `on_chunk(result)` is called after each chunk, e.g. to report progress.
+    """
+    mappings = fetch_mappings(cursor)
+    for chunk in iter_chunks(file, filename, chunk_size):
+        if result.rows + len(chunk) > row_limit:
+            raise UploadError(f'Upload failed: Exceeds row limit of {row_limit}.')
+        process_frame(cursor, chunk, mappings, username, result)
+        if on_chunk:
+            on_chunk(result)
+
+@jobs.handler('statute_upload')
+def run_upload_job(job, payload):
+    """
+    Background runner for an upload saved to JOB_UPLOAD_DIR by the upload route.
+    All chunks share one transaction, as before; the saved file is removed afterwards.
+    """
+    path, filename = payload['path'], payload['filename']
+    result = UploadResult(current_app.config['UPLOAD_REPORT_DIR'])
+    conn = get_db_connection()
+    cursor = None
+    try:
+        if conn is None:
+            raise UploadError('Upload failed, no rows were queued. Could not connect to the database.')
+        cursor = conn.cursor(dictionary=True)
+        total = count_rows(path, filename)
+        job.update(rows_total=total)
+
+        def report(result):
+            progress = min(99, result.rows * 100 // total) if total else 0
+            job.update(progress=progress, rows_processed=result.rows, rows_failed=result.failed_count)
+
+        with open(path, 'rb') as f:
+            process_upload(
+                cursor, f, filename, payload['username'], result,
+                row_limit=payload['row_limit'], chunk_size=payload['chunk_size'], on_chunk=report,
+            )
+        conn.commit()
+    except Exception as e:
+        if conn is not None:
+            conn.rollback()
+        result.discard()
+        if isinstance(e, UploadError):
+            raise
+        if isinstance(e, Error):
+            raise UploadError(f'Upload failed, no rows were queued. Database Error: {e}') from e
+        raise UploadError(f'Error reading file: {e}') from e
+    finally:
+        if cursor is not None:
+            cursor.close()
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    token = result.finish()
+    job.set_result(new=result.new_count, updated=result.updated_count, failed=result.failed_count, report_token=token)
+    job.update(rows_total=result.rows, rows_processed=result.rows, rows_failed=result.failed_count,
+               message=f"Upload Complete. New: {result.new_count}, Updated: {result.updated_count}, Failed: {result.failed_count}")
+
+def report_path(report_dir, token):
+    # Tokens are uuid4 hex; anything else could be a path traversal attempt
+    if len(token) != 32 or any(c not in '0123456789abcdef' for c in token):
+        return None
+    path = os.path.join(report_dir, f'{token}.csv')
+    return path if os.path.exists(path) else None
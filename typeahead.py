@@ -0,0 +1,106 @@
+# Prefix lookup for the home page's state and case type pickers.
+# Every name is indexed under each of its word starts ("personal injury general
+# negligence", "injury general negligence", ...) in one sorted array, so a prefix query
+# is two binary searches plus a walk over the matching slice. The arrays are built once
+# per catalog version and shared by all requests.
+import bisect
+import re
+import threading
+
+NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+
+def normalize(text):
+    return NON_WORD_RE.sub(' ', (text or '').lower()).strip()
+
+def _later_words_match(key, prefixes):
+    """True if each of `prefixes` starts a word of `key` after the first, in order ("bre wri")."""
+    words = iter(key.split(' ')[1:])
+    return all(any(word.startswith(prefix) for word in words) for prefix in prefixes)
+
+class PrefixIndex:
+    """Entries' names indexed under every word start, kept as one sorted array of keys."""
+
+    def __init__(self, entries, name):
+        keys = []
+        for rank, entry in enumerate(entries):
+            words = normalize(name(entry)).split(' ')
+            for i in range(len(words)):
+                # Matches at the start of the name sort ahead of matches on a later word
+                keys.append((' '.join(words[i:]), 0 if i == 0 else 1, rank))
+        keys.sort()
+        self._keys = [key for key, _, _ in keys]
+        self._hits = [(position, rank) for _, position, rank in keys]
+        self._entries = list(entries)
+
+    def match(self, prefix, accept=None, limit=10):
+        """
+        Up to `limit` entries with a word starting with `prefix`, name-start matches first.
+        Later words of a multi-word prefix must start later words of the name, in order.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            matches = [(0, rank) for rank in range(len(self._entries))]
+        else:
+            first, *rest = prefix.split(' ')
+            start = bisect.bisect_left(self._keys, first)
+            end = bisect.bisect_left(self._keys, first + '\uffff', start)
+            best = {}
+            for i in range(start, end):
+                position, rank = self._hits[i]
+                if position < best.get(rank, 2) and (not rest or _later_words_match(self._keys[i], rest)):
+                    best[rank] = position
+            matches = sorted((position, rank) for rank, position in best.items())
+        results = []
+        for _, rank in matches:
+            entry = self._entries[rank]
+            if accept is None or accept(entry):
+                results.append(entry)
+                if len(results) == limit:
+                    break
+        return results
+
+class TypeaheadIndex:
+    def __init__(self, snapshot):
+        issues = {}
+        self.states_by_issue = {}
+        for st in snapshot.statutes:
+            issues.setdefault(st.issue_id, {'id': st.issue_id, 'name': st.issue_name, 'slug': st.issue_slug,
+                                            'issue_group': st.issue_group})
+            self.states_by_issue.setdefault(st.issue_id, set()).add(st.state_slug)
+        # Ranks break ties in id order, the order the dropdown lists issues within a group
+        self.issues = PrefixIndex(sorted(issues.values(), key=lambda i: i['id']), lambda i: i['name'])
+        self.states = PrefixIndex(
+            [{'name': s.name, 'slug': s.slug} for s in snapshot.states], lambda s: s['name']
+        )
+
+    def lookup(self, prefix, state_slug=None, limit=10):
+        """
+        {'states': [...], 'groups': [{'group': name or None, 'issues': [...]}, ...]} for `prefix`.
+        With a state, only that state's issues are returned and states are not searched.
+        """
+        accept = None
+        if state_slug:
+            accept = lambda issue: state_slug in self.states_by_issue[issue['id']]
+        groups = {}
+        for issue in self.issues.match(prefix, accept, limit):
+            groups.setdefault(issue['issue_group'] or None, []).append(
+                {'id': issue['id'], 'name': issue['name'], 'slug': issue['slug']}
+            )
+        return {
+            'states': [] if state_slug else self.states.match(prefix, limit=limit),
+            'groups': [
+                {'group': group, 'issues': sorted(items, key=lambda i: i['id'])}
+                for group, items in sorted(groups.items(), key=lambda item: (item[0] is None, item[0] or ''))
+            ],
+        }
+
+# Index for the current catalog version only
+_cache = {'version': None, 'index': None}
+_lock = threading.Lock()
+
+def get_index(snapshot):
+    with _lock:
+        if _cache['version'] != snapshot.version:
+            _cache['index'] = TypeaheadIndex(snapshot)
+            _cache['version'] = snapshot.version
+        return _cache['index']
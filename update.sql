@@ -0,0 +1,124 @@
+-- Schema changes applied by deploy.sh on the next deployment.
+-- Every statement is idempotent so a re-run is harmless. MySQL has no IF NOT EXISTS for
+-- keys, columns or partitioning, so those run through a prepared statement that is
+-- 'DO 0' when information_schema shows the change is already there.
+
+-- Background jobs (statute uploads, "approve all matching" bulk approvals)
+CREATE TABLE IF NOT EXISTS `jobs` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `job_type` varchar(50) NOT NULL,
+  `status` varchar(20) NOT NULL DEFAULT 'QUEUED',
+  `payload` text,
+  `progress` tinyint NOT NULL DEFAULT '0',
+  `rows_total` int DEFAULT NULL,
+  `rows_processed` int NOT NULL DEFAULT '0',
+  `rows_failed` int NOT NULL DEFAULT '0',
+  `message` text,
+  `result` text,
+  `submitted_by` varchar(50) DEFAULT NULL,
+  `created_dt` datetime DEFAULT CURRENT_TIMESTAMP,
+  `started_dt` datetime DEFAULT NULL,
+  `finished_dt` datetime DEFAULT NULL,
+  `updated_dt` datetime DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  KEY `status` (`status`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Sort indexes for keyset pagination of the admin lists (InnoDB appends the id).
+-- The keyset seek compares (sort column, id) tuples, so the sort columns are NOT NULL.
+SET @sql = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'issue_reports' AND INDEX_NAME = 'created_at') = 0,
+              'ALTER TABLE `issue_reports` ADD KEY `created_at` (`created_at`)', 'DO 0');
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+SET @sql = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'login_logs' AND INDEX_NAME = 'login_dt') = 0,
+              'ALTER TABLE `login_logs` ADD KEY `login_dt` (`login_dt`)', 'DO 0');
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+SET @sql = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'small_claims_approvals' AND INDEX_NAME = 'status_submitted') = 0,
+              'ALTER TABLE `small_claims_approvals` ADD KEY `status_submitted` (`status`,`submitted_dt`)', 'DO 0');
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+UPDATE `small_claims_approvals` SET `submitted_dt` = NOW() WHERE `submitted_dt` IS NULL;
+SET @sql = IF((SELECT IS_NULLABLE FROM information_schema.COLUMNS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'small_claims_approvals' AND COLUMN_NAME = 'submitted_dt') = 'YES',
+              'ALTER TABLE `small_claims_approvals` MODIFY `submitted_dt` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP', 'DO 0');
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+SET @sql = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'statute_approvals' AND INDEX_NAME = 'status_submitted') = 0,
+              'ALTER TABLE `statute_approvals` ADD KEY `status_submitted` (`status`,`submitted_dt`)', 'DO 0');
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+UPDATE `statute_approvals` SET `submitted_dt` = NOW() WHERE `submitted_dt` IS NULL;
+SET @sql = IF((SELECT IS_NULLABLE FROM information_schema.COLUMNS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'statute_approvals' AND COLUMN_NAME = 'submitted_dt') = 'YES',
+              'ALTER TABLE `statute_approvals` MODIFY `submitted_dt` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP', 'DO 0');
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- Login history: indexes for the status/username filters and the hourly rollup
+SET @sql = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'login_logs' AND INDEX_NAME = 'status_login_dt') = 0,
+              'ALTER TABLE `login_logs` ADD KEY `status_login_dt` (`status`,`login_dt`), ADD KEY `username_login_dt` (`username_attempted`,`login_dt`)',
+              'DO 0');
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+CREATE TABLE IF NOT EXISTS `login_stats_hourly` (
+  `bucket_start` datetime NOT NULL,
+  `username` varchar(50) NOT NULL DEFAULT '',
+  `ip_address` varchar(45) NOT NULL DEFAULT '',
+  `success_count` int NOT NULL DEFAULT '0',
+  `failure_count` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`bucket_start`,`username`,`ip_address`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Backfill the rollup from the existing log (only while it is empty: once the log has
+-- been pruned, recounting it would undercount the expired months)
+INSERT INTO `login_stats_hourly` (bucket_start, username, ip_address, success_count, failure_count)
+SELECT DATE_ADD(DATE(login_dt), INTERVAL HOUR(login_dt) HOUR), COALESCE(username_attempted, ''), COALESCE(ip_address, ''),
+       SUM(status = 'SUCCESS'), SUM(status <> 'SUCCESS')
+FROM login_logs
+WHERE login_dt IS NOT NULL AND NOT EXISTS (SELECT 1 FROM `login_stats_hourly`)
+GROUP BY 1, 2, 3;
+
+-- Monthly partitioning of login_logs. The partition column must be part of every unique
+-- key, so the primary key becomes (id, login_dt). Everything starts in `pmax`;
+-- `flask rotate-login-logs` then splits it into monthly partitions (which a re-run must
+-- not collapse, hence the check for existing partitions).
+UPDATE `login_logs` SET `login_dt` = NOW() WHERE `login_dt` IS NULL;
+SET @sql = IF((SELECT COUNT(*) FROM information_schema.KEY_COLUMN_USAGE
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'login_logs'
+                 AND CONSTRAINT_NAME = 'PRIMARY' AND COLUMN_NAME = 'login_dt') = 0,
+              'ALTER TABLE `login_logs` MODIFY `login_dt` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP, DROP PRIMARY KEY, ADD PRIMARY KEY (`id`,`login_dt`)',
+              'DO 0');
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+SET @sql = IF((SELECT COUNT(*) FROM information_schema.PARTITIONS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'login_logs' AND PARTITION_NAME IS NOT NULL) = 0,
+              'ALTER TABLE `login_logs` PARTITION BY RANGE COLUMNS(`login_dt`) (PARTITION pmax VALUES LESS THAN (MAXVALUE))',
+              'DO 0');
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+
+-- Issue report deduplication: repeated reports of the same page and details are counted
+-- on one row. details_hash is SHA1 of the lowercased, whitespace-collapsed details.
+SET @sql = IF((SELECT COUNT(*) FROM information_schema.COLUMNS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'issue_reports' AND COLUMN_NAME = 'details_hash') = 0,
+              'ALTER TABLE `issue_reports` ADD COLUMN `details_hash` char(40) NOT NULL DEFAULT '''', ADD COLUMN `occurrences` int NOT NULL DEFAULT ''1'', ADD COLUMN `last_reported_at` datetime DEFAULT CURRENT_TIMESTAMP, ADD KEY `details_hash` (`details_hash`,`last_reported_at`), ADD KEY `page_last_reported` (`page_context`,`last_reported_at`)',
+              'DO 0');
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;
+-- Rows from before deduplication (no details_hash yet) get the same page_context new
+-- reports store (issue_reports.normalize_page): the path only, without scheme/host,
+-- query string, fragment or trailing slash.
+UPDATE `issue_reports`
+SET `page_context` = CASE WHEN `page_context` IS NULL OR `page_context` = '' THEN NULL ELSE
+      LEFT(COALESCE(NULLIF(TRIM(TRAILING '/' FROM
+        REGEXP_REPLACE(REGEXP_REPLACE(TRIM(`page_context`), '^([a-zA-Z][a-zA-Z0-9+.-]*:)?//[^/?#]*', ''), '[?#].*$', '')
+      ), ''), '/'), 255) END,
+    `details_hash` = SHA1(LOWER(TRIM(REGEXP_REPLACE(`details`, '[[:space:]]+', ' ')))),
+    `last_reported_at` = COALESCE(`created_at`, NOW())
+WHERE `details_hash` = '';
+-- last_reported_at sorts the reports list (keyset pagination), so it is NOT NULL
+UPDATE `issue_reports` SET `last_reported_at` = COALESCE(`created_at`, NOW()) WHERE `last_reported_at` IS NULL;
+SET @sql = IF((SELECT IS_NULLABLE FROM information_schema.COLUMNS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'issue_reports' AND COLUMN_NAME = 'last_reported_at') = 'YES',
+              'ALTER TABLE `issue_reports` MODIFY `last_reported_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP', 'DO 0');
+PREPARE stmt FROM @sql; EXECUTE stmt; DEALLOCATE PREPARE stmt;